@@ -0,0 +1 @@
+"""BiteWise application package: the GTK tabs and dialogs, with the GTK-free data layer in core."""
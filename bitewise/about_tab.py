@@ -4,6 +4,9 @@ from gi.repository import Gtk, Gdk, GdkPixbuf, Pango
 import webbrowser
 import os
 from pathlib import Path
+from .memory_report import build_report
+
+REPORT_CYCLES = 5
 
 class AboutTab(Gtk.Box):
     def __init__(self, window_width, window_height):
@@ -84,6 +87,15 @@ class AboutTab(Gtk.Box):
         
         main_box.pack_start(grid, False, False, 0)
         
+        # Diagnostics
+        self.memory_button = Gtk.Button(label="Memory Report")
+        self.memory_button.set_halign(Gtk.Align.CENTER)
+        self.memory_button.set_tooltip_text(
+            f"Measure the data each tab holds, then refresh the charts {REPORT_CYCLES} times and show what grew"
+        )
+        self.memory_button.connect("clicked", self._on_memory_report_clicked)
+        main_box.pack_start(self.memory_button, False, False, 0)
+        
         # License
         license_label = Gtk.Label()
         license_label.set_markup(
@@ -147,3 +159,32 @@ class AboutTab(Gtk.Box):
     def _on_github_clicked(self, label, uri):
         webbrowser.open(uri)
         return True
+
+    def _on_memory_report_clicked(self, button):
+        window = self.get_toplevel()
+        button.set_sensitive(False)
+        try:
+            report = build_report(window.loaded_tabs(), REPORT_CYCLES)
+        except Exception as e:
+            print(f"Error building memory report: {e}")
+            report = f"The memory report failed:\n{e}"
+        finally:
+            button.set_sensitive(True)
+        print(report)
+        
+        dialog = Gtk.Dialog(title="Memory Report", transient_for=window, flags=0)
+        dialog.add_button("Close", Gtk.ResponseType.CLOSE)
+        dialog.set_default_size(820, 560)
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        text_view = Gtk.TextView()
+        text_view.set_editable(False)
+        text_view.set_monospace(True)
+        text_view.get_buffer().set_text(report)
+        scrolled.add(text_view)
+        dialog.get_content_area().pack_start(scrolled, True, True, 0)
+        
+        dialog.show_all()
+        dialog.run()
+        dialog.destroy()
@@ -0,0 +1,165 @@
+import gi
+import os
+import threading
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+from .core.barcode_index import BarcodeIndex
+from .core.fdc_import import ImportCancelled
+from .core.storage import load_settings, save_settings
+
+class BarcodeDialog(Gtk.Dialog):
+    """Looks up an EAN/UPC code in the local Open Food Facts dump.
+
+    The dump's path is kept in settings.json. The first lookup against a
+    new dump builds its barcode index on a worker thread. After an OK
+    response, self.record holds the product as an ingredient record.
+    """
+    def __init__(self, parent, db_dir):
+        super().__init__(title="Add by Barcode", transient_for=parent, modal=True)
+        self.set_default_size(420, -1)
+        self.db_dir = db_dir
+        self.settings = load_settings(db_dir)
+        self.index = None
+        self.record = None
+        self.building = False
+        self.cancelled = False
+
+        content_area = self.get_content_area()
+        content_area.set_spacing(10)
+        content_area.set_border_width(10)
+
+        self.code_entry = Gtk.Entry(placeholder_text="EAN / UPC barcode")
+        self.code_entry.connect("activate", self.on_lookup_clicked)
+        content_area.pack_start(self.code_entry, False, False, 0)
+
+        dump_box = Gtk.Box(spacing=10)
+        self.dump_label = Gtk.Label()
+        self.dump_label.set_xalign(0)
+        self.dump_label.set_ellipsize(3)  # Pango.EllipsizeMode.END
+        dump_box.pack_start(self.dump_label, True, True, 0)
+        choose_button = Gtk.Button(label="Choose dump...")
+        choose_button.connect("clicked", self.on_choose_clicked)
+        dump_box.pack_start(choose_button, False, False, 0)
+        content_area.pack_start(dump_box, False, False, 0)
+
+        self.status_label = Gtk.Label()
+        self.status_label.set_xalign(0)
+        self.status_label.set_line_wrap(True)
+        content_area.pack_start(self.status_label, False, False, 0)
+        self.progress_bar = Gtk.ProgressBar()
+        self.progress_bar.set_no_show_all(True)
+        content_area.pack_start(self.progress_bar, False, False, 0)
+
+        self.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        self.lookup_button = Gtk.Button(label="Look up")
+        self.lookup_button.connect("clicked", self.on_lookup_clicked)
+        self.get_action_area().pack_end(self.lookup_button, False, False, 0)
+        self.connect("response", self.on_response)
+
+        self._show_dump()
+        self.show_all()
+
+    def _dump_path(self):
+        return self.settings.get('off_dump')
+
+    def _show_dump(self):
+        path = self._dump_path()
+        if path:
+            self.dump_label.set_text(f"Open Food Facts dump: {os.path.basename(path)}")
+            self.dump_label.set_tooltip_text(path)
+        else:
+            self.dump_label.set_text("No Open Food Facts dump selected")
+
+    def on_choose_clicked(self, button):
+        chooser = Gtk.FileChooserDialog(
+            title="Select an Open Food Facts CSV or JSONL dump",
+            transient_for=self,
+            action=Gtk.FileChooserAction.OPEN
+        )
+        chooser.add_buttons("Cancel", Gtk.ResponseType.CANCEL, "Select", Gtk.ResponseType.OK)
+        response = chooser.run()
+        path = chooser.get_filename()
+        chooser.destroy()
+
+        if response == Gtk.ResponseType.OK and path:
+            self.settings['off_dump'] = path
+            try:
+                save_settings(self.db_dir, self.settings)
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+            if self.index:
+                self.index.close()
+            self.index = None
+            self._show_dump()
+
+    def on_response(self, dialog, response):
+        # Stops an index build; the worker notices at its next batch
+        self.cancelled = True
+        if self.index and not self.building:
+            self.index.close()
+
+    def on_lookup_clicked(self, widget):
+        if self.building:
+            return
+        code = self.code_entry.get_text().strip()
+        path = self._dump_path()
+        if not code:
+            self.status_label.set_text("Enter a barcode")
+            return
+        if not path or not os.path.exists(path):
+            self.status_label.set_text("Choose the Open Food Facts dump to look barcodes up in")
+            return
+
+        if self.index is None:
+            self.index = BarcodeIndex(path)
+        if not self.index.is_built():
+            self._build_index()
+            return
+        self._lookup(code)
+
+    def _lookup(self, code):
+        try:
+            record = self.index.lookup(code)
+        except Exception as e:
+            self.status_label.set_text(f"Lookup failed: {e}")
+            return
+        if record is None:
+            self.status_label.set_text(f"No product with barcode {code} in the dump")
+            return
+        self.record = record
+        self.response(Gtk.ResponseType.OK)
+
+    def _build_index(self):
+        self.building = True
+        self.lookup_button.set_sensitive(False)
+        self.status_label.set_text("Indexing the dump's barcodes; this happens once per dump...")
+        self.progress_bar.show()
+        threading.Thread(target=self._run_build, args=(self.index,), daemon=True).start()
+
+    def _run_build(self, index):
+        error = None
+        try:
+            index.build(progress=lambda fraction, text: GLib.idle_add(self._show_progress, fraction),
+                        cancelled=lambda: self.cancelled)
+        except ImportCancelled:
+            return
+        except Exception as e:
+            error = e
+        GLib.idle_add(self._on_built, error)
+
+    def _show_progress(self, fraction):
+        if not self.cancelled:
+            self.progress_bar.set_fraction(fraction)
+        return False
+
+    def _on_built(self, error):
+        if self.cancelled:
+            return False
+        self.building = False
+        self.lookup_button.set_sensitive(True)
+        self.progress_bar.hide()
+        if error is not None:
+            self.status_label.set_text(f"Could not index the dump: {error}")
+        else:
+            self._lookup(self.code_entry.get_text().strip())
+        return False
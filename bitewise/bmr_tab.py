@@ -2,37 +2,60 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk
 import cairo
-import json
-import os
-import sys
-from datetime import datetime
-from collections import OrderedDict
+from datetime import date
 from math import pi
-from .diet_guidelines import calculate_bmr
+from .core.aggregation import process_bmr_kcal_data
+from .core.profiler import timed
+from .core.storage import get_db_dir, load_diet, load_journal
+from .downsample import lttb_union
+from .hit_test import nearest_in_series
+from .jobs import jobs
+from .label_cache import LabelCache
+from .viewport import DateViewport, ViewportControls, mean_over
 
-class BMRGraph(Gtk.DrawingArea):
+class BMRGraph(ViewportControls, Gtk.DrawingArea):
     def __init__(self, bmr_kcal_data, journal_data):
         super().__init__()
         self.bmr_kcal_data = bmr_kcal_data
         self.journal_data = journal_data
+        self.dates = sorted(bmr_kcal_data.keys())
+        self.bmr_values = [bmr_kcal_data[d]['bmr'] for d in self.dates]
+        self.kcal_values = [bmr_kcal_data[d]['kcal'] for d in self.dates]
+        
+        # Calculate 7-day moving average of calories over the whole history,
+        # so zooming in doesn't change what a day's average is
+        self.avg_kcal_values = []
+        for i in range(len(self.kcal_values)):
+            start_idx = max(0, i - 6)  # Go back up to 6 days to get 7 days total
+            window = self.kcal_values[start_idx:i+1]
+            self.avg_kcal_values.append(sum(window) / len(window))
+        
+        self.viewport = DateViewport([date.fromisoformat(d).toordinal() for d in self.dates])
+        
+        self.label_cache = LabelCache()
         self.set_hexpand(True)
         self.set_vexpand(True)
         self.connect("draw", self.on_draw)
         
         self.hover_point = None
+        self._sample_key = None
+        self._sample_indices = []
         self.set_has_tooltip(True)
         self.connect("query-tooltip", self.on_query_tooltip)
         
         self.add_events(Gdk.EventMask.POINTER_MOTION_MASK | Gdk.EventMask.LEAVE_NOTIFY_MASK)
         self.connect("motion-notify-event", self.on_motion_notify)
         self.connect("leave-notify-event", self.on_leave_notify)
+        self.connect_viewport_controls()
 
+    @timed()
     def on_draw(self, widget, cr):
-        width, height = widget.get_allocated_width(), widget.get_allocated_height()
         style_context = widget.get_style_context()
-        bg_color = style_context.get_background_color(Gtk.StateFlags.NORMAL)
-        text_color = style_context.get_color(Gtk.StateFlags.NORMAL)
-        
+        self.render(cr, widget.get_allocated_width(), widget.get_allocated_height(),
+                    style_context.get_background_color(Gtk.StateFlags.NORMAL),
+                    style_context.get_color(Gtk.StateFlags.NORMAL))
+
+    def render(self, cr, width, height, bg_color, text_color):
         cr.set_source_rgba(bg_color.red, bg_color.green, bg_color.blue, bg_color.alpha)
         cr.rectangle(0, 0, width, height)
         cr.fill()
@@ -41,21 +64,16 @@ class BMRGraph(Gtk.DrawingArea):
             self._draw_no_data(cr, width, height, text_color)
             return
             
-        dates = sorted(self.bmr_kcal_data.keys())
-        bmr_values = [self.bmr_kcal_data[d]['bmr'] for d in dates]
-        kcal_values = [self.bmr_kcal_data[d]['kcal'] for d in dates]
-        
-        # Calculate 7-day moving average of calories
-        avg_kcal_values = []
-        for i in range(len(kcal_values)):
-            start_idx = max(0, i - 6)  # Go back up to 6 days to get 7 days total
-            window = kcal_values[start_idx:i+1]
-            avg_kcal_values.append(sum(window) / len(window))
-        
-        if not dates or not bmr_values or not kcal_values:
-            self._draw_no_data(cr, width, height, text_color, "Incomplete BMR/Calorie data")
+        groups = self.viewport.groups()
+        if not groups:
+            self.graph_groups, self.graph_xs, self.graph_line_ys = [], [], []
+            self._draw_no_data(cr, width, height, text_color, "No BMR/Calorie data in this range")
             return
         
+        bmr_values = mean_over(self.bmr_values, groups)
+        kcal_values = mean_over(self.kcal_values, groups)
+        avg_kcal_values = mean_over(self.avg_kcal_values, groups)
+        
         # Calculate min/max values including all PAL levels
         pal_levels = [1.20, 1.35, 1.50, 1.70, 1.85, 2.10, 2.40]
         pal_values = []
@@ -70,11 +88,15 @@ class BMRGraph(Gtk.DrawingArea):
         top_margin, bottom_margin = 80, 60
         graph_width = max(width - left_margin - right_margin, 1)
         graph_height = max(height - top_margin - bottom_margin, 1)
+        self.graph_left, self.graph_width = left_margin, graph_width
         
         self._draw_title(cr, width, text_color)
         self._draw_axes(cr, width, height, left_margin, right_margin, top_margin, bottom_margin, text_color)
         self._draw_y_labels(cr, height, left_margin, bottom_margin, graph_height, graph_width, min_value, value_range, text_color)
-        self._draw_x_labels(cr, width, height, left_margin, bottom_margin, graph_width, dates, text_color)
+        self._draw_x_labels(cr, width, height, left_margin, bottom_margin, graph_width, groups, text_color)
+        
+        # PAL lines are BMR scaled, so they share the BMR picks
+        indices = self._sampled_indices([bmr_values, kcal_values, avg_kcal_values], graph_width)
         
         bmr_color = (0.4, 0.7, 1.0, 1.0)
         kcal_color = (1.0, 0.5, 0.0, 1.0)
@@ -105,47 +127,61 @@ class BMRGraph(Gtk.DrawingArea):
         self.pal_points = {}
         for pal, color in zip(pal_levels, pal_colors):
             pal_values = [bmr * pal for bmr in bmr_values]
-            points = self._draw_line(cr, dates, pal_values, left_margin, height, bottom_margin, 
+            points = self._draw_line(cr, indices, len(groups), pal_values, left_margin, height, bottom_margin, 
                                    graph_width, graph_height, min_value, value_range, color)
             self.pal_points[pal] = points
             
             # Draw points for PAL lines
-            if len(dates) <= 100:
+            if len(groups) <= 100:
                 self._draw_points(cr, points, color, radius=3)
         
         # Draw main lines on top
-        bmr_points = self._draw_line(cr, dates, bmr_values, left_margin, height, bottom_margin, 
+        bmr_points = self._draw_line(cr, indices, len(groups), bmr_values, left_margin, height, bottom_margin, 
                                    graph_width, graph_height, min_value, value_range, bmr_color)
-        kcal_points = self._draw_line(cr, dates, kcal_values, left_margin, height, bottom_margin, 
+        kcal_points = self._draw_line(cr, indices, len(groups), kcal_values, left_margin, height, bottom_margin, 
                                     graph_width, graph_height, min_value, value_range, kcal_color)
-        avg_kcal_points = self._draw_line(cr, dates, avg_kcal_values, left_margin, height, bottom_margin,
+        avg_kcal_points = self._draw_line(cr, indices, len(groups), avg_kcal_values, left_margin, height, bottom_margin,
                                          graph_width, graph_height, min_value, value_range, avg_kcal_color, dash=[5, 3])
         
-        if len(dates) <= 100:
+        if len(groups) <= 100:
             self._draw_points(cr, bmr_points, bmr_color)
             self._draw_points(cr, kcal_points, kcal_color)
             # Don't draw points for average line to keep it clean
         
-        if self.hover_point is not None and self.hover_point < len(bmr_points):
-            self._draw_highlight(cr, bmr_points[self.hover_point], bmr_color)
-            self._draw_highlight(cr, kcal_points[self.hover_point], kcal_color)
-            self._draw_highlight(cr, avg_kcal_points[self.hover_point], avg_kcal_color)
+        if self.hover_point is not None and self.hover_point < len(groups):
+            i = self.hover_point
+            x_pos = left_margin + (i * graph_width / max(len(groups) - 1, 1))
+            def y_of(value):
+                return height - bottom_margin - ((value - min_value) / value_range * graph_height)
+            self._draw_highlight(cr, (x_pos, y_of(bmr_values[i])), bmr_color)
+            self._draw_highlight(cr, (x_pos, y_of(kcal_values[i])), kcal_color)
+            self._draw_highlight(cr, (x_pos, y_of(avg_kcal_values[i])), avg_kcal_color)
             # Highlight all PAL points for this date
-            for pal, points in self.pal_points.items():
-                if self.hover_point < len(points):
-                    self._draw_highlight(cr, points[self.hover_point], pal_colors[pal_levels.index(pal)], radius=5)
+            for pal, color in zip(pal_levels, pal_colors):
+                self._draw_highlight(cr, (x_pos, y_of(bmr_values[i] * pal)), color, radius=5)
         
         self._draw_legend(cr, width, bmr_color, kcal_color, text_color, pal_levels, pal_colors, pal_descriptions, avg_kcal_color)
         
-        self.graph_bmr_points = bmr_points
-        self.graph_kcal_points = kcal_points
-        self.graph_avg_kcal_points = avg_kcal_points
-        self.graph_dates = dates
+        # Every line shares the same sampled x positions, in x order, so
+        # hovers bisect once on x and then check each line's y
+        self.graph_xs = [x for x, y in bmr_points]
+        self.graph_line_ys = [[y for x, y in points] for points in
+                              [bmr_points, kcal_points, avg_kcal_points] + list(self.pal_points.values())]
+        self.graph_indices = indices
+        self.graph_groups = groups
         self.graph_bmr = bmr_values
         self.graph_kcal = kcal_values
         self.graph_avg_kcal = avg_kcal_values
         self.pal_levels = pal_levels
     
+    def _sampled_indices(self, series, graph_width):
+        # Downsample to about one vertex per pixel; only redone on resize or zoom
+        key = (int(graph_width), self.viewport.start, self.viewport.end)
+        if self._sample_key != key:
+            self._sample_key = key
+            self._sample_indices = lttb_union(series, int(graph_width))
+        return self._sample_indices
+
     def _draw_no_data(self, cr, width, height, text_color, text="No BMR/Calorie data available"):
         cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
@@ -194,27 +230,19 @@ class BMRGraph(Gtk.DrawingArea):
             cr.stroke()
             cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
     
-    def _draw_x_labels(self, cr, width, height, left_margin, bottom_margin, graph_width, dates, text_color):
+    def _draw_x_labels(self, cr, width, height, left_margin, bottom_margin, graph_width, groups, text_color):
         cr.set_font_size(10)
-        num_dates = len(dates)
+        num_dates = len(groups)
         step = max(1, num_dates // 10)
         
         for i in range(0, num_dates, step):
-            if i >= num_dates:
-                continue
-                
-            date_str = dates[i]
-            try:
-                label = datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %d")
-            except:
-                label = date_str
-            
+            label = self.viewport.label(groups[i])
             x_pos = left_margin + (i * graph_width / max(num_dates - 1, 1))
-            extents = cr.text_extents(label)
+            extents = self.label_cache.text_extents(cr, label)
             cr.move_to(x_pos - extents.width/2, height - bottom_margin + extents.height + 5)
             cr.show_text(label)
     
-    def _draw_line(self, cr, dates, values, left_margin, height, bottom_margin, graph_width, graph_height, min_value, value_range, color, dash=None):
+    def _draw_line(self, cr, indices, num_dates, values, left_margin, height, bottom_margin, graph_width, graph_height, min_value, value_range, color, dash=None):
         points = []
         cr.set_source_rgba(*color)
         cr.set_line_width(2)
@@ -222,12 +250,12 @@ class BMRGraph(Gtk.DrawingArea):
         if dash:
             cr.set_dash(dash)
         
-        for i, value in enumerate(values):
-            x_pos = left_margin + (i * graph_width / max(len(dates) - 1, 1))
-            y_pos = height - bottom_margin - ((value - min_value) / value_range * graph_height)
+        for n, i in enumerate(indices):
+            x_pos = left_margin + (i * graph_width / max(num_dates - 1, 1))
+            y_pos = height - bottom_margin - ((values[i] - min_value) / value_range * graph_height)
             points.append((x_pos, y_pos))
             
-            if i == 0:
+            if n == 0:
                 cr.move_to(x_pos, y_pos)
             else:
                 cr.line_to(x_pos, y_pos)
@@ -356,25 +384,14 @@ class BMRGraph(Gtk.DrawingArea):
                 current_pal_y += max_pal_text_height + 5
 
     def on_motion_notify(self, widget, event):
-        if not hasattr(self, 'graph_bmr_points') or not hasattr(self, 'graph_kcal_points'):
+        if self.drag_motion(event):
+            return True
+        if not hasattr(self, 'graph_xs'):
             return False
-            
-        closest_point = None
-        min_dist = float('inf')
-        
-        # Check all points (BMR, Calories, and PAL levels)
-        all_points = []
-        all_points.extend(self.graph_bmr_points)
-        all_points.extend(self.graph_kcal_points)
-        all_points.extend(self.graph_avg_kcal_points)
-        for pal_points in self.pal_points.values():
-            all_points.extend(pal_points)
-        
-        for i, point in enumerate(all_points):
-            dist = ((point[0] - event.x) ** 2 + (point[1] - event.y) ** 2) ** 0.5
-            if dist < min_dist and dist < 20:
-                min_dist = dist
-                closest_point = i % len(self.graph_bmr_points)  # Map back to date index
+        
+        # Check all lines (BMR, Calories, average and PAL levels)
+        nearest = nearest_in_series(self.graph_xs, self.graph_line_ys, event.x, event.y, 20)
+        closest_point = self.graph_indices[nearest[1]] if nearest is not None else None  # Map back to date index
         
         if closest_point != self.hover_point:
             self.hover_point = closest_point
@@ -388,19 +405,22 @@ class BMRGraph(Gtk.DrawingArea):
             self.queue_draw()
     
     def on_query_tooltip(self, widget, x, y, keyboard_mode, tooltip):
-        if not hasattr(self, 'graph_bmr_points') or self.hover_point is None:
+        if not hasattr(self, 'graph_xs') or self.hover_point is None:
             return False
         
-        date = self.graph_dates[self.hover_point]
+        group = self.graph_groups[self.hover_point]
+        days = group[1] - group[0]
         bmr = self.graph_bmr[self.hover_point]
         kcal = self.graph_kcal[self.hover_point]
         avg_kcal = self.graph_avg_kcal[self.hover_point]
-        weight = next((e.get('weight') for e in self.journal_data if e.get('date') == date), None)
+        weight = None
+        if days == 1:
+            day = self.dates[group[0]]
+            weight = next((e.get('weight') for e in self.journal_data if e.get('date') == day), None)
         
-        try:
-            date_str = datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
-        except:
-            date_str = date
+        date_str = self.viewport.label(group, long=True)
+        if days > 1:
+            date_str += f" (avg of {days} days)"
         
         # Calculate PAL comparisons
         pal_comparisons = []
@@ -424,86 +444,23 @@ class BMRGraph(Gtk.DrawingArea):
         tooltip.set_markup(tooltip_text)
         return True
 
+def prepare_bmr_data(db_dir):
+    """Worker-thread job: load private journal and diet copies and aggregate them"""
+    journal_data = [entry for entry in load_journal(db_dir) if entry.get('date') and entry.get('weight')]
+    return journal_data, process_bmr_kcal_data(journal_data, load_diet(db_dir))
+
 class BMRStatsTab(Gtk.Box):
     def __init__(self, window_width, window_height):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         self.set_border_width(10)
         
-        self.db_dir = self._get_db_dir()
-        self.journal_data = self._load_journal_data()
-        self.diet_data = self._load_diet_data()
-        self.bmr_kcal_data = self._process_bmr_kcal_data()
+        self.db_dir = get_db_dir()
+        self.journal_data = []
+        self.bmr_kcal_data = None
+        self.loading = True
         
         self.create_bmr_kcal_plot()
-
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
-    def _load_journal_data(self):
-        try:
-            journal_path = os.path.join(self.db_dir, 'journal.json')
-            with open(journal_path, 'r', encoding='utf-8') as f:
-                data = json.load(f).get('entries', [])
-                return [entry for entry in data if entry.get('date') and entry.get('weight')]
-        except Exception as e:
-            print(f"Error loading journal data: {e}")
-            return []
-
-    def _load_diet_data(self):
-        try:
-            diet_path = os.path.join(self.db_dir, 'diet.json')
-            with open(diet_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if all(k in data for k in ['date_of_birth', 'height_cm', 'gender']):
-                    return data
-                return {}
-        except Exception as e:
-            print(f"Error loading diet data: {e}")
-            return {}
-
-    def _process_bmr_kcal_data(self):
-        if not self.journal_data or not self.diet_data:
-            return None
-            
-        daily_data = OrderedDict()
-        for entry in self.journal_data:
-            date = entry.get('date')
-            weight = entry.get('weight', 0)
-            if not date or weight <= 0:
-                continue
-                
-            if date not in daily_data:
-                daily_data[date] = {'kcal': 0.0, 'weight': weight}
-            daily_data[date]['kcal'] += entry.get('kcal', 0)
-        
-        bmr_kcal_data = OrderedDict()
-        for date, values in sorted(daily_data.items()):
-            kcal = values['kcal']
-            weight = values['weight']
-            bmr = 0
-            
-            try:
-                dob = self.diet_data['date_of_birth']
-                height = self.diet_data['height_cm']
-                gender = self.diet_data['gender']
-                age = datetime.now().year - int(dob[:4])
-                bmr = calculate_bmr(gender, weight, height, age)
-            except Exception as e:
-                print(f"BMR calculation error: {e}")
-                continue
-            
-            bmr_kcal_data[date] = {'bmr': bmr, 'kcal': kcal}
-        
-        return bmr_kcal_data if bmr_kcal_data else None
+        self.update_bmr_plot()
 
     def create_bmr_kcal_plot(self):
         for child in self.get_children():
@@ -515,7 +472,11 @@ class BMRStatsTab(Gtk.Box):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         scrolled.add(box)
         
-        if not self.bmr_kcal_data:
+        if self.loading:
+            spinner = Gtk.Spinner()
+            spinner.start()
+            box.pack_start(spinner, True, True, 0)
+        elif not self.bmr_kcal_data:
             label = Gtk.Label(label="No BMR data available. Ensure you have:\n"
                                   "- Journal entries with dates and weights\n"
                                   "- Complete diet settings (birth date, height, gender)")
@@ -529,7 +490,9 @@ class BMRStatsTab(Gtk.Box):
         self.show_all()
 
     def update_bmr_plot(self):
-        self.journal_data = self._load_journal_data()
-        self.diet_data = self._load_diet_data()
-        self.bmr_kcal_data = self._process_bmr_kcal_data()
+        jobs.submit('bmr', prepare_bmr_data, self.db_dir, on_done=self._on_bmr_data)
+
+    def _on_bmr_data(self, result):
+        self.journal_data, self.bmr_kcal_data = result
+        self.loading = False
         self.create_bmr_kcal_plot()
@@ -0,0 +1,96 @@
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+from .core import nutrients
+
+class BulkEditDialog(Gtk.Dialog):
+    """One change for many ingredients at once.
+
+    Scaling a value by a percentage and setting a value apply to the
+    selected ingredients; a CSV of corrections applies to the ingredients
+    it names. After an OK response, edit() returns the change.
+    """
+    def __init__(self, parent, selected):
+        super().__init__(title="Bulk Edit Ingredients", transient_for=parent, modal=True)
+        self.set_default_size(460, -1)
+
+        content_area = self.get_content_area()
+        content_area.set_spacing(10)
+        content_area.set_border_width(10)
+
+        grid = Gtk.Grid()
+        grid.set_column_spacing(10)
+        grid.set_row_spacing(10)
+        content_area.pack_start(grid, False, False, 0)
+
+        self.scale_radio = Gtk.RadioButton.new_with_label_from_widget(None, f"Scale for {selected} selected")
+        self.scale_field = self._field_combo('cost')
+        self.scale_entry = Gtk.Entry(placeholder_text="Percent, e.g. 5 or -10")
+        grid.attach(self.scale_radio, 0, 0, 1, 1)
+        grid.attach(self.scale_field, 1, 0, 1, 1)
+        grid.attach(self.scale_entry, 2, 0, 1, 1)
+
+        self.value_radio = Gtk.RadioButton.new_with_label_from_widget(self.scale_radio, f"Set for {selected} selected")
+        self.value_field = self._field_combo('cost')
+        self.value_entry = Gtk.Entry(placeholder_text="Value per 100 g")
+        grid.attach(self.value_radio, 0, 1, 1, 1)
+        grid.attach(self.value_field, 1, 1, 1, 1)
+        grid.attach(self.value_entry, 2, 1, 1, 1)
+
+        self.csv_radio = Gtk.RadioButton.new_with_label_from_widget(self.scale_radio, "Apply corrections")
+        self.csv_chooser = Gtk.FileChooserButton(title="Select a CSV of corrections")
+        csv_filter = Gtk.FileFilter()
+        csv_filter.set_name("CSV files")
+        csv_filter.add_pattern("*.csv")
+        self.csv_chooser.add_filter(csv_filter)
+        self.csv_chooser.set_tooltip_text("First row: name and the columns to correct, e.g. name,cost,kcal")
+        grid.attach(self.csv_radio, 0, 2, 1, 1)
+        grid.attach(self.csv_chooser, 1, 2, 2, 1)
+
+        if not selected:
+            self.scale_radio.set_sensitive(False)
+            self.value_radio.set_sensitive(False)
+            self.csv_radio.set_active(True)
+
+        self.update_recipes_check = Gtk.CheckButton(label="Also update recipes")
+        content_area.pack_start(self.update_recipes_check, False, False, 0)
+
+        journal_box = Gtk.Box(spacing=10)
+        content_area.pack_start(journal_box, False, False, 0)
+        self.update_journal_check = Gtk.CheckButton(label="Also update journal")
+        journal_box.pack_start(self.update_journal_check, False, False, 0)
+        self.journal_from_entry = Gtk.Entry(placeholder_text="From YYYY-MM-DD (all dates if empty)")
+        self.journal_from_entry.set_width_chars(30)
+        self.journal_from_entry.set_sensitive(False)
+        self.update_journal_check.connect(
+            "toggled", lambda check: self.journal_from_entry.set_sensitive(check.get_active()))
+        journal_box.pack_start(self.journal_from_entry, False, False, 0)
+
+        self.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        self.add_button("Apply", Gtk.ResponseType.OK)
+        self.show_all()
+
+    def _field_combo(self, active):
+        combo = Gtk.ComboBoxText()
+        for key, nutrient in nutrients.REGISTRY.items():
+            combo.append(key, nutrient.title)
+        combo.set_active_id(active)
+        return combo
+
+    def _number(self, entry):
+        text = entry.get_text().strip()
+        try:
+            return float(text.replace(',', '.'))
+        except ValueError:
+            raise ValueError(f"Invalid number: {text}")
+
+    def edit(self):
+        """('scale', key, percent), ('set', key, value) or ('csv', path, None); raises ValueError for bad input"""
+        if self.scale_radio.get_active():
+            return 'scale', self.scale_field.get_active_id(), self._number(self.scale_entry)
+        if self.value_radio.get_active():
+            return 'set', self.value_field.get_active_id(), self._number(self.value_entry)
+        path = self.csv_chooser.get_filename()
+        if not path:
+            raise ValueError("Select a CSV file of corrections")
+        return 'csv', path, None
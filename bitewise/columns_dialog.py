@@ -0,0 +1,82 @@
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+from .core import nutrients
+from .core.storage import load_settings, save_settings
+
+# Store columns
+SHOW, TITLE, KEY = range(3)
+
+class ColumnsDialog(Gtk.Dialog):
+    """Picks the nutrient columns a view shows, and their order.
+
+    Every registered nutrient is listed, plus extra ({key: title}) values
+    the view can also show, the shown ones first; rows can be dragged to
+    reorder them. An OK response saves the choice in
+    settings.json under columns/<view> and leaves it in self.keys.
+    """
+    def __init__(self, parent, db_dir, view, extra=None):
+        super().__init__(title="Columns", transient_for=parent, modal=True)
+        self.set_default_size(320, 480)
+        self.db_dir = db_dir
+        self.view = view
+        self.extra = extra or {}
+        self.keys = None
+
+        content_area = self.get_content_area()
+        content_area.set_spacing(10)
+        content_area.set_border_width(10)
+
+        label = Gtk.Label(label="Tick the values to show; drag to reorder")
+        label.set_xalign(0)
+        content_area.pack_start(label, False, False, 0)
+
+        self.store = Gtk.ListStore(bool, str, str)
+        shown = nutrients.visible_columns(load_settings(db_dir), view, self.extra)
+        titles = {key: nutrient.title for key, nutrient in nutrients.REGISTRY.items()}
+        titles.update(self.extra)
+        for key in shown + [key for key in titles if key not in shown]:
+            self.store.append([key in shown, titles[key], key])
+
+        tree = Gtk.TreeView(model=self.store)
+        tree.set_headers_visible(False)
+        tree.set_reorderable(True)
+        renderer = Gtk.CellRendererToggle()
+        renderer.connect("toggled", self.on_show_toggled)
+        tree.append_column(Gtk.TreeViewColumn("Show", renderer, active=SHOW))
+        tree.append_column(Gtk.TreeViewColumn("Value", Gtk.CellRendererText(), text=TITLE))
+
+        scrolled_window = Gtk.ScrolledWindow()
+        scrolled_window.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled_window.add(tree)
+        frame = Gtk.Frame()
+        frame.add(scrolled_window)
+        content_area.pack_start(frame, True, True, 0)
+
+        self.add_button("Defaults", Gtk.ResponseType.REJECT)
+        self.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        self.add_button("OK", Gtk.ResponseType.OK)
+        self.connect("response", self.on_response)
+        self.show_all()
+
+    def on_show_toggled(self, renderer, path):
+        self.store[path][SHOW] = not self.store[path][SHOW]
+
+    def on_response(self, dialog, response):
+        if response == Gtk.ResponseType.OK:
+            keys = [row[KEY] for row in self.store if row[SHOW]]
+        elif response == Gtk.ResponseType.REJECT:
+            keys = None
+        else:
+            return
+        try:
+            settings = load_settings(self.db_dir)
+            columns = settings.setdefault('columns', {})
+            if keys is None:
+                columns.pop(self.view, None)
+            else:
+                columns[self.view] = keys
+            save_settings(self.db_dir, settings)
+        except Exception as e:
+            print(f"Error saving columns: {e}")
+        self.keys = nutrients.visible_columns(load_settings(self.db_dir), self.view, self.extra)
@@ -0,0 +1,4 @@
+"""BiteWise data layer without GTK: db storage, record math, aggregation, diet rules.
+
+Importable from scripts and benchmarks that have no display; the tabs call into it.
+"""
@@ -0,0 +1,140 @@
+import operator
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from .columns import NutrientColumns
+from .diet import bmr_from_settings, has_bmr_settings
+
+DAILY_KEYS = ['gram', 'kcal', 'carbs', 'sugar', 'fat', 'protein', 'fiber', 'salt', 'cost']
+
+def daily_totals(entries):
+    """Per-date sums of DAILY_KEYS plus the last weight logged that day"""
+    daily_data = {}
+    for entry in entries:
+        date = entry['date']
+        if date not in daily_data:
+            daily_data[date] = {k: 0.0 for k in DAILY_KEYS}
+            daily_data[date]['weight'] = entry.get('weight', 0)
+        for nutrient in daily_data[date]:
+            if nutrient in entry:
+                daily_data[date][nutrient] += entry[nutrient]
+        daily_data[date]['weight'] = entry.get('weight', daily_data[date]['weight'])
+    return daily_data
+
+def daily_sums(entries, keys):
+    """(dates in the order first logged, {key: per-date totals}) for 'gram' and any nutrient keys.
+
+    Totals come from the entries held column by column, so adding
+    vitamins and minerals to the keys adds a pass over the entries that
+    have them rather than a lookup per entry per key.
+    """
+    index = {}
+    groups = [index.setdefault(entry['date'], len(index)) for entry in entries]
+    return list(index), NutrientColumns(entries, keys).sums(keys, groups, len(index))
+
+def day_entries(entries, date):
+    """Entries of one date, newest first"""
+    return sorted([e for e in entries if e['date'] == date], key=lambda x: x['timestamp'], reverse=True)
+
+def day_weight(entries, date):
+    return next((e.get('weight', 0) for e in entries if e['date'] == date), 0)
+
+def day_values(entries, date, keys):
+    values = {}
+    for entry in entries:
+        if entry['date'] == date:
+            for key in keys:
+                values[key] = values.get(key, 0) + entry.get(key, 0)
+    return values
+
+def remove_dates(entries, dates):
+    """Drop every entry logged on one of dates, in place"""
+    entries[:] = [e for e in entries if e['date'] not in dates]
+
+def process_weight_data(journal_data):
+    return OrderedDict((e['date'], e['weight']) for e in journal_data
+            if isinstance(e, dict) and 'date' in e and 'weight' in e
+            and isinstance(e['weight'], (int, float)) and e['weight'] > 0)
+
+def process_bmr_kcal_data(journal_data, diet_data):
+    if not journal_data or not diet_data or not has_bmr_settings(diet_data):
+        return None
+
+    daily_data = OrderedDict()
+    for entry in journal_data:
+        date = entry.get('date')
+        weight = entry.get('weight', 0)
+        if not date or weight <= 0:
+            continue
+
+        if date not in daily_data:
+            daily_data[date] = {'kcal': 0.0, 'weight': weight}
+        daily_data[date]['kcal'] += entry.get('kcal', 0)
+
+    year = datetime.now().year
+    bmr_kcal_data = OrderedDict()
+    for date, values in sorted(daily_data.items()):
+        try:
+            bmr = bmr_from_settings(diet_data, values['weight'], year)
+        except Exception as e:
+            print(f"BMR calculation error: {e}")
+            continue
+        bmr_kcal_data[date] = {'bmr': bmr, 'kcal': values['kcal']}
+
+    return bmr_kcal_data if bmr_kcal_data else None
+
+def process_macro_data(journal_data, metrics, limit=10):
+    """Top foods for every metric, from a single pass over the journal"""
+    totals = {metric: defaultdict(float) for metric in metrics}
+    for entry in journal_data:
+        food = entry.get('ate', 'Unknown')
+        for metric, metric_totals in totals.items():
+            metric_totals[food] += entry.get(metric, 0)
+    return {metric: dict(sorted(metric_totals.items(), key=operator.itemgetter(1), reverse=True)[:limit])
+            for metric, metric_totals in totals.items()}
+
+def process_nutrient_data(entries):
+    nutrient_data = OrderedDict()
+    for entry in entries:
+        if not entry.get('date'):
+            continue
+        date = entry['date']
+        if date not in nutrient_data:
+            nutrient_data[date] = {n: 0.0 for n in ['protein', 'carbs', 'sugar', 'fat', 'fiber', 'salt']}
+        for nutrient in nutrient_data[date]:
+            nutrient_data[date][nutrient] += entry.get(nutrient, 0)
+    return nutrient_data
+
+def process_cost_data(journal_data):
+    daily_costs = OrderedDict()
+    for entry in journal_data:
+        if isinstance(entry, dict) and 'date' in entry and 'cost' in entry:
+            date = entry['date']
+            daily_costs[date] = daily_costs.get(date, 0.0) + entry.get('cost', 0)
+    return daily_costs
+
+def entries_by_date(journal_data):
+    """Entries grouped by date as (parsed timestamp, entry) pairs in time order"""
+    timeline_data = defaultdict(list)
+    for entry in journal_data:
+        if isinstance(entry, dict) and entry.get('date') and entry.get('timestamp'):
+            try:
+                dt = datetime.strptime(entry['timestamp'], "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                continue
+            timeline_data[entry['date']].append((dt, entry))
+
+    for date in timeline_data:
+        timeline_data[date].sort(key=lambda x: x[0])
+
+    return timeline_data
+
+def usage_stats(journal_data):
+    """{food name: (times logged, last date logged)} for ranking picker results"""
+    stats = {}
+    for entry in journal_data:
+        name = entry.get('ate')
+        if not name:
+            continue
+        count, last = stats.get(name, (0, ''))
+        stats[name] = (count + 1, max(last, entry.get('date', '')))
+    return stats
@@ -0,0 +1,247 @@
+import csv
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+from .fdc_import import ImportCancelled
+
+# Index file: a header naming the dump it was built from, then
+# (barcode, byte offset of the product's line) records sorted by barcode
+HEADER = struct.Struct('<8sQQ')
+MAGIC = b'BWBARC01'
+RECORD = struct.Struct('<QQ')
+
+# Records sorted in memory before they are spilled to a run file (16 MB)
+RUN_SIZE = 1000000
+
+JSON_CODE = re.compile(rb'"code"\s*:\s*"(\d+)"')
+
+# Open Food Facts per-100 g keys -> BiteWise fields
+OFF_FIELDS = {
+    'carbohydrates_100g': 'carbs',
+    'sugars_100g': 'sugar',
+    'fat_100g': 'fat',
+    'proteins_100g': 'protein',
+    'fiber_100g': 'fiber',
+}
+
+# Open Food Facts per-100 g keys, which are in grams, -> (micronutrient,
+# factor to its registered unit)
+OFF_MICRO = {
+    'saturated-fat_100g': ('saturated_fat', 1),
+    'monounsaturated-fat_100g': ('monounsaturated_fat', 1),
+    'polyunsaturated-fat_100g': ('polyunsaturated_fat', 1),
+    'trans-fat_100g': ('trans_fat', 1),
+    'omega-3-fat_100g': ('omega_3', 1),
+    'omega-6-fat_100g': ('omega_6', 1),
+    'cholesterol_100g': ('cholesterol', 1e3),
+    'starch_100g': ('starch', 1),
+    'sodium_100g': ('sodium', 1e3),
+    'vitamin-a_100g': ('vitamin_a', 1e6),
+    'vitamin-d_100g': ('vitamin_d', 1e6),
+    'vitamin-e_100g': ('vitamin_e', 1e3),
+    'vitamin-k_100g': ('vitamin_k', 1e6),
+    'vitamin-c_100g': ('vitamin_c', 1e3),
+    'vitamin-b1_100g': ('thiamin', 1e3),
+    'vitamin-b2_100g': ('riboflavin', 1e3),
+    'vitamin-pp_100g': ('niacin', 1e3),
+    'vitamin-b6_100g': ('vitamin_b6', 1e3),
+    'vitamin-b9_100g': ('folate', 1e6),
+    'vitamin-b12_100g': ('vitamin_b12', 1e6),
+    'calcium_100g': ('calcium', 1e3),
+    'iron_100g': ('iron', 1e3),
+    'magnesium_100g': ('magnesium', 1e3),
+    'phosphorus_100g': ('phosphorus', 1e3),
+    'potassium_100g': ('potassium', 1e3),
+    'zinc_100g': ('zinc', 1e3),
+    'selenium_100g': ('selenium', 1e6),
+    'iodine_100g': ('iodine', 1e6),
+    'caffeine_100g': ('caffeine', 1e3),
+}
+
+def normalize_code(text):
+    """Barcode as an integer; UPC-A and its zero-padded EAN-13 form are equal"""
+    digits = ''.join(c for c in str(text) if c.isdigit())
+    return int(digits) if digits else None
+
+def _number(values, key):
+    try:
+        return float(values.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def product_record(product, code):
+    """Ingredient record for an Open Food Facts product (a CSV row dict or JSONL object)"""
+    values = product.get('nutriments') or product
+    name = (product.get('product_name') or '').strip() or f"Barcode {code}"
+    brand = (product.get('brands') or '').split(',')[0].strip()
+    if brand and brand.lower() not in name.lower():
+        name = f"{name} ({brand})"
+    kcal = _number(values, 'energy-kcal_100g') or _number(values, 'energy_100g') / 4.184
+    record = {'name': name, 'kcal': round(kcal, 1)}
+    for key, field in OFF_FIELDS.items():
+        record[field] = round(_number(values, key), 2)
+    salt = _number(values, 'salt_100g') or _number(values, 'sodium_100g') * 2.5
+    record['salt'] = round(salt, 3)
+    record['cost'] = 0.0
+    micro = {}
+    for key, (field, factor) in OFF_MICRO.items():
+        if values.get(key) not in (None, ''):
+            micro[field] = round(_number(values, key) * factor, 3)
+    if micro:
+        record['micro'] = micro
+    return record
+
+class BarcodeIndex:
+    """Barcode lookups in a local Open Food Facts dump without loading it.
+
+    build() reads the dump once and writes a sorted file of 16-byte
+    (barcode, line offset) records next to it, using sorted runs merged
+    from disk so memory stays bounded. lookup() binary-searches that file
+    through mmap and reads the one matching line from the dump. The dump
+    is the tab-separated CSV export or the JSONL export, uncompressed.
+    """
+    def __init__(self, dump_path, index_path=None):
+        self.dump_path = dump_path
+        self.index_path = index_path or dump_path + '.bwidx'
+        self.is_json = dump_path.lower().endswith(('.jsonl', '.json'))
+        self.columns = None
+        self.map = None
+        self.count = 0
+
+    def _dump_signature(self):
+        stat = os.stat(self.dump_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def is_built(self):
+        """Whether an index for the dump as it is now exists"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, size, mtime = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return magic == MAGIC and (size, mtime) == self._dump_signature()
+
+    def _codes(self, f):
+        """(barcode, offset) for every product line of the open dump"""
+        offset = 0
+        code_column = None
+        for line in f:
+            start, offset = offset, offset + len(line)
+            if self.is_json:
+                match = JSON_CODE.search(line)
+                code = match.group(1) if match else None
+            elif code_column is None:
+                header = line.rstrip(b'\r\n').split(b'\t')
+                if b'code' not in header:
+                    raise ValueError(f"{os.path.basename(self.dump_path)} has no 'code' column")
+                code_column = header.index(b'code')
+                continue
+            else:
+                fields = line.split(b'\t', code_column + 1)
+                code = fields[code_column] if len(fields) > code_column else None
+            code = normalize_code(code.decode('ascii', 'ignore')) if code else None
+            if code is not None and code < 1 << 64:
+                yield code, start
+
+    def build(self, progress=None, cancelled=None):
+        """Write the index; progress(fraction, text) and cancelled() as for import_fdc"""
+        if self.dump_path.lower().endswith('.gz'):
+            raise ValueError("Unpack the Open Food Facts dump first; compressed files can't be indexed")
+        size = os.path.getsize(self.dump_path) or 1
+        folder = os.path.dirname(os.path.abspath(self.index_path))
+        with tempfile.TemporaryDirectory(prefix='bitewise-barcodes-', dir=folder) as scratch:
+            runs = []
+            with open(self.dump_path, 'rb') as f:
+                records = []
+                for code, offset in self._codes(f):
+                    records.append((code, offset))
+                    if len(records) >= RUN_SIZE:
+                        runs.append(self._write_run(scratch, len(runs), records))
+                        records = []
+                        if cancelled and cancelled():
+                            raise ImportCancelled()
+                        if progress:
+                            progress(0.9 * offset / size, "Reading barcodes")
+                runs.append(self._write_run(scratch, len(runs), records))
+
+            if progress:
+                progress(0.9, "Sorting barcodes")
+            partial = os.path.join(scratch, 'index')
+            with open(partial, 'wb') as out:
+                out.write(HEADER.pack(MAGIC, *self._dump_signature()))
+                previous = None
+                for code, offset in heapq.merge(*[self._read_run(path) for path in runs]):
+                    # Dumps hold the odd duplicate product; the first one wins
+                    if code != previous:
+                        out.write(RECORD.pack(code, offset))
+                        previous = code
+            self.close()
+            os.replace(partial, self.index_path)
+        if progress:
+            progress(1.0, "Barcode index ready")
+
+    def _write_run(self, scratch, number, records):
+        records.sort()
+        path = os.path.join(scratch, f"run-{number}")
+        with open(path, 'wb') as f:
+            f.write(b''.join(RECORD.pack(code, offset) for code, offset in records))
+        return path
+
+    def _read_run(self, path):
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(RECORD.size * 65536)
+                if not block:
+                    return
+                yield from RECORD.iter_unpack(block)
+
+    def open(self):
+        if self.map is not None:
+            return
+        with open(self.index_path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = (len(self.map) - HEADER.size) // RECORD.size
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def offset(self, code):
+        """Line offset of a barcode in the dump, or None"""
+        self.open()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            found, offset = RECORD.unpack_from(self.map, HEADER.size + middle * RECORD.size)
+            if found < code:
+                low = middle + 1
+            elif found > code:
+                high = middle
+            else:
+                return offset
+        return None
+
+    def lookup(self, text):
+        """Ingredient record for a scanned or typed barcode, or None"""
+        code = normalize_code(text)
+        if code is None:
+            return None
+        offset = self.offset(code)
+        if offset is None:
+            return None
+        with open(self.dump_path, 'rb') as f:
+            if not self.is_json and self.columns is None:
+                self.columns = f.readline().decode('utf-8', 'replace').rstrip('\r\n').split('\t')
+            f.seek(offset)
+            line = f.readline().decode('utf-8', 'replace')
+        if self.is_json:
+            product = json.loads(line)
+        else:
+            row = next(csv.reader([line.rstrip('\r\n')], delimiter='\t', quoting=csv.QUOTE_NONE))
+            product = dict(zip(self.columns, row))
+        return product_record(product, code)
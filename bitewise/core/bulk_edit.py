@@ -0,0 +1,71 @@
+import csv
+from . import nutrients
+from .models import NUTRIENTS
+
+def _set(record, key, value):
+    if key in NUTRIENTS:
+        record[key] = value
+    else:
+        micro = dict(record.get('micro') or {})
+        if value is None:
+            micro.pop(key, None)
+        else:
+            micro[key] = value
+        record['micro'] = micro
+
+def field_value(record, key):
+    if key in NUTRIENTS:
+        return record.get(key, 0.0)
+    return (record.get('micro') or {}).get(key, 0.0)
+
+def scale_field(record, key, percent):
+    """Record with key changed by percent (10 raises it by a tenth); missing micronutrients stay missing"""
+    record = dict(record)
+    if key in NUTRIENTS or key in (record.get('micro') or {}):
+        _set(record, key, field_value(record, key) * (1 + percent / 100))
+    return record
+
+def set_field(record, key, value):
+    """Record with key set to value; None clears a micronutrient"""
+    record = dict(record)
+    _set(record, key, value)
+    return record
+
+def read_corrections(path):
+    """{lowercased name: {key: value}} from a CSV of corrections.
+
+    The first row names the columns: 'name' and any registered nutrient
+    keys. Empty cells leave a value as it is. Raises ValueError naming the
+    line of a bad value or an unknown column.
+    """
+    corrections = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        if 'name' not in header:
+            raise ValueError("The first row needs a 'name' column")
+        unknown = [key for key in header if key != 'name' and key not in nutrients.REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        name_column = header.index('name')
+        for line, row in enumerate(reader, start=2):
+            if not row or not row[name_column].strip():
+                continue
+            values = {}
+            for key, text in zip(header, row):
+                text = text.strip()
+                if key == 'name' or not text:
+                    continue
+                try:
+                    values[key] = float(text.replace(',', '.'))
+                except ValueError:
+                    raise ValueError(f"Line {line}: invalid number for {key}: {text}")
+            corrections[row[name_column].strip().lower()] = values
+    return corrections
+
+def apply_corrections(record, values):
+    """Record with every {key: value} of a correction set"""
+    record = dict(record)
+    for key, value in values.items():
+        _set(record, key, value)
+    return record
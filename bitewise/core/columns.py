@@ -0,0 +1,106 @@
+from array import array
+from bisect import bisect_left
+from .models import NUTRIENTS
+
+class SparseColumn:
+    """Values of one nutrient for the few rows that have it.
+
+    Row numbers and values sit in two parallel arrays sorted by row, so a
+    column costs 16 bytes per present value and nothing for the rest, and
+    sums only visit the values that exist.
+    """
+    def __init__(self):
+        self.rows = array('q')
+        self.values = array('d')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, row, value):
+        """Add a value for a row after every row already present"""
+        self.rows.append(row)
+        self.values.append(value)
+
+    def get(self, row, default=0.0):
+        i = bisect_left(self.rows, row)
+        if i < len(self.rows) and self.rows[i] == row:
+            return self.values[i]
+        return default
+
+    def set(self, row, value):
+        """Store a value; None removes the row's value"""
+        i = bisect_left(self.rows, row)
+        present = i < len(self.rows) and self.rows[i] == row
+        if value is None:
+            if present:
+                del self.rows[i]
+                del self.values[i]
+        elif present:
+            self.values[i] = value
+        else:
+            self.rows.insert(i, row)
+            self.values.insert(i, value)
+
+    def items(self):
+        return zip(self.rows, self.values)
+
+    def nbytes(self):
+        return self.rows.itemsize * len(self.rows) + self.values.itemsize * len(self.values)
+
+    def renumbered(self, new_rows):
+        """Column for a table whose rows were renumbered by new_rows ({old: new}, dropped rows missing)"""
+        column = SparseColumn()
+        for row, value in self.items():
+            if row in new_rows:
+                column.append(new_rows[row], value)
+        return column
+
+    def sums(self, groups, count):
+        """Per-group totals, where groups[row] is the group of each row"""
+        totals = array('d', bytes(8 * count))
+        for row, value in zip(self.rows, self.values):
+            totals[groups[row]] += value
+        return totals
+
+def dense_sums(column, groups, count):
+    """Per-group totals of a full column"""
+    totals = array('d', bytes(8 * count))
+    for group, value in zip(groups, column):
+        totals[group] += value
+    return totals
+
+class NutrientColumns:
+    """Journal entries, or any records with nutrient values, held column by column.
+
+    NUTRIENTS and grams are full arrays of doubles; every vitamin, mineral
+    or other key found in the records' 'micro' dicts gets a SparseColumn.
+    Totals then run one column at a time over packed arrays instead of
+    visiting a dict per record per nutrient.
+    """
+    def __init__(self, records, keys=None):
+        """Columns of every key, or only of keys"""
+        dense = [key for key in ['gram'] + NUTRIENTS if keys is None or key in keys]
+        self.dense = {key: array('d', [float(record.get(key, 0) or 0) for record in records]) for key in dense}
+        self.sparse = {}
+        if keys is not None and all(key in self.dense for key in keys):
+            return
+        for row, record in enumerate(records):
+            micro = record.get('micro')
+            if micro:
+                for key, value in micro.items():
+                    column = self.sparse.get(key)
+                    if column is None:
+                        column = self.sparse[key] = SparseColumn()
+                    column.append(row, float(value))
+
+    def sums(self, keys, groups, count):
+        """{key: per-group totals} for keys, where groups[row] is each record's group"""
+        totals = {}
+        for key in keys:
+            if key in self.dense:
+                totals[key] = dense_sums(self.dense[key], groups, count)
+            elif key in self.sparse:
+                totals[key] = self.sparse[key].sums(groups, count)
+            else:
+                totals[key] = array('d', bytes(8 * count))
+        return totals
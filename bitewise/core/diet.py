@@ -1,11 +1,23 @@
+from datetime import datetime
+
 COLOR_GREEN_BG = "#9DFE9D"
 COLOR_YELLOW_BG = "#FEFE9D"
 COLOR_RED_BG = "#FE9D9D"
 COLOR_TEXT_DARK = "#000000"
 
+BMR_SETTINGS = ('date_of_birth', 'height_cm', 'gender')
+
 def calculate_bmr(gender, weight, height, age):
     return (10 * weight) + (6.25 * height) - (5 * age) + (5 if gender.lower() == "male" else -161)
 
+def has_bmr_settings(settings):
+    return all(k in settings for k in BMR_SETTINGS)
+
+def bmr_from_settings(settings, weight, year=None):
+    """BMR at a body weight, with the age taken from the birth year in the diet settings"""
+    age = (year or datetime.now().year) - int(settings['date_of_birth'][:4])
+    return calculate_bmr(settings['gender'], weight, settings['height_cm'], age)
+
 DIET_LIMITS = {
     "WHO Guidelines": {'fat_percent_max': 30, 'carbs_percent_max': 55, 'protein_percent_max': 15, 'fiber_grams_max': 25, 'salt_max': 5},
     "LCHF": {'fat_percent_max': 75, 'carbs_percent_max': 5, 'protein_percent_max': 20, 'fiber_grams_max': 30, 'salt_max': 15},
@@ -72,8 +84,18 @@ def calculate_remaining(all_values, diet, bmr=None):
     
     return remaining
 
-def get_diet_colors(diet, col_index, value, total_kcal, bmr=None):
-    if col_index == 2 and bmr is not None and bmr > 0:
+# Nutrient key -> (diet limit, kcal per gram); limits with no kcal factor are grams
+DIET_COLOR_LIMITS = {
+    'fat': ('fat_percent_max', 9),
+    'carbs': ('carbs_percent_max', 4),
+    'protein': ('protein_percent_max', 4),
+    'fiber': ('fiber_grams_max', None),
+    'salt': ('salt_max', None),
+}
+
+def get_diet_colors(diet, key, value, total_kcal, bmr=None):
+    """Cell colors for a day's total of the nutrient key, or None when it isn't rated"""
+    if key == 'kcal' and bmr is not None and bmr > 0:
         percent = (value / bmr) * 100 if bmr else 0
         return {
             'foreground': COLOR_TEXT_DARK,
@@ -82,24 +104,13 @@ def get_diet_colors(diet, col_index, value, total_kcal, bmr=None):
                           COLOR_RED_BG)
         }
     
-    if not diet:
-        return None
-    
-    color_map = {
-        5: ('fat_percent_max', 9),
-        3: ('carbs_percent_max', 4),
-        6: ('protein_percent_max', 4),
-        7: ('fiber_grams_max', 1),
-        8: ('salt_max', 1)
-    }
-    
-    if col_index not in color_map:
+    if not diet or key not in DIET_COLOR_LIMITS:
         return None
     
-    limit_key, kcal_per_gram = color_map[col_index]
+    limit_key, kcal_per_gram = DIET_COLOR_LIMITS[key]
     max_val = DIET_LIMITS[diet].get(limit_key, 1) or 1
     
-    if col_index in (7, 8):  # Fiber or Salt
+    if kcal_per_gram is None:  # Fiber or Salt
         ratio = value / max_val if max_val > 0 else 0
     else:  # Fat, Carbs, Protein
         ratio = (value * kcal_per_gram) / total_kcal * 100 / max_val if (total_kcal and max_val > 0) else 0
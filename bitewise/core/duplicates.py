@@ -0,0 +1,179 @@
+import re
+from collections import Counter, defaultdict
+from .models import ingredient_amount
+
+# Words that don't tell two foods apart
+STOP_WORDS = {'a', 'an', 'and', 'as', 'for', 'in', 'of', 'or', 'the', 'to', 'with', 'w'}
+
+TOKEN = re.compile(r'\d+(?:[.,]\d+)?|[^\W\d_]+')
+
+# Share of tokens two names must have in common (Jaccard)
+NAME_SIMILARITY = 0.5
+
+# Per-100 g values compared, with the difference that counts as negligible
+# however small the values are
+NUTRIENT_FLOORS = {'kcal': 15.0, 'carbs': 2.0, 'sugar': 2.0, 'fat': 1.5,
+                   'protein': 1.5, 'fiber': 1.5, 'salt': 0.15}
+
+FLOORS = tuple(NUTRIENT_FLOORS.values())
+
+# Largest difference, relative to the larger value, still counted as the same food
+NUTRIENT_TOLERANCE = 0.15
+
+def tokens(name):
+    """Normalized words of a name: case folded, plurals reduced, stop words dropped"""
+    found = set()
+    for word in TOKEN.findall(name.casefold()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        found.add(word.replace(',', '.'))
+    return frozenset(found)
+
+def name_similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def nutrient_vector(ingredient):
+    return tuple(float(ingredient.get(key, 0) or 0) for key in NUTRIENT_FLOORS)
+
+def highest_close(vector):
+    """Per nutrient, the largest value still within NUTRIENT_TOLERANCE of the vector's"""
+    return tuple(max(x + floor, x / (1 - NUTRIENT_TOLERANCE)) for x, floor in zip(vector, FLOORS))
+
+def nutrients_close(a, b, highest_a, highest_b):
+    """Whether two nutrient_vector()s agree, given their highest_close()"""
+    for x, y, x_high, y_high in zip(a, b, highest_a, highest_b):
+        if y > x_high or x > y_high:
+            return False
+    return True
+
+class _Clusters:
+    """Union-find over row numbers"""
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, row):
+        root = self.parent.setdefault(row, row)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while row != root:
+            row, self.parent[row] = self.parent[row], root
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+    def groups(self):
+        groups = defaultdict(list)
+        for row in self.parent:
+            groups[self.find(row)].append(row)
+        return list(groups.values())
+
+def find_duplicates(ingredients, usage=None):
+    """Groups of ingredient names that look like one food entered more than once.
+
+    Two ingredients match when their names share most of their words in
+    any order ("Oats, rolled" and "rolled oats") and their per-100 g
+    values agree within NUTRIENT_TOLERANCE. Comparing every pair is out of
+    reach for large databases, so candidates are blocked instead: a name is
+    filed under its set of words and each set with one word left out, and
+    only names meeting under a key with close energy values are compared.
+    Names differing by an added, dropped or swapped word meet that way;
+    word order and plurals are already normalized away.
+    Each group lists the suggested name to keep first: the one referenced
+    most often per usage ({lowercased name: count}), then the shortest.
+    """
+    usage = usage or {}
+    names = [i['name'] for i in ingredients]
+    words = [tokens(name) for name in names]
+    vectors = [nutrient_vector(i) for i in ingredients]
+    highest = [highest_close(vector) for vector in vectors]
+
+    blocks = defaultdict(list)
+    for row, found in enumerate(words):
+        keys = {found} | {found - {word} for word in found} if len(found) > 1 else {found}
+        for key in keys:
+            if key:
+                blocks[key].append(row)
+
+    clusters = _Clusters()
+    for rows in blocks.values():
+        if len(rows) < 2:
+            continue
+        # Sorted by energy, each name is only compared with the ones after
+        # it up to the highest energy that could still be the same food
+        rows.sort(key=lambda row: vectors[row][0])
+        for i, a in enumerate(rows):
+            highest_kcal = highest[a][0]
+            for b in rows[i + 1:]:
+                if vectors[b][0] > highest_kcal:
+                    break
+                if (nutrients_close(vectors[a], vectors[b], highest[a], highest[b])
+                        and name_similarity(words[a], words[b]) >= NAME_SIMILARITY):
+                    clusters.union(a, b)
+
+    groups = []
+    for rows in clusters.groups():
+        if len(rows) < 2:
+            continue
+        group = sorted((names[row] for row in rows),
+                       key=lambda name: (-usage.get(name.lower(), 0), len(name), name.lower()))
+        groups.append(group)
+    groups.sort(key=lambda group: (-len(group), group[0].lower()))
+    return groups
+
+def reference_counts(recipes, entries):
+    """{lowercased name: rows naming it} over recipe ingredients and journal entries"""
+    counts = Counter()
+    for recipe in recipes:
+        for row in recipe.get('ingredients', []):
+            counts[row.get('name', '').lower()] += 1
+    for entry in entries:
+        counts[entry.get('ate', '').lower()] += 1
+    return counts
+
+def merge_duplicates(ingredients, recipes, entries, merges):
+    """Fold duplicates into the ingredient kept for them, in one pass per file.
+
+    merges maps the name to keep to the names merged into it. The merged
+    ingredients are removed; recipe rows using them are renamed and
+    rescaled to the kept ingredient, journal entries are renamed and keep
+    the values they were logged with, dropping any version reference.
+    Returns (ingredients, recipes changed, journal entries changed).
+    """
+    by_name = {i['name'].lower(): i for i in ingredients}
+    targets = {}
+    for keep, merged in merges.items():
+        kept = by_name.get(keep.lower())
+        if kept is None:
+            continue
+        for name in merged:
+            if name.lower() != keep.lower():
+                targets[name.lower()] = kept
+
+    remaining = [i for i in ingredients if i['name'].lower() not in targets]
+    recipes_changed = 0
+    for recipe in recipes:
+        changed = False
+        for row in recipe.get('ingredients', []):
+            kept = targets.get(row.get('name', '').lower())
+            if kept is not None:
+                row['name'] = kept['name']
+                row.pop('micro', None)
+                row.update(ingredient_amount(kept, row.get('gram', 0)))
+                changed = True
+        recipes_changed += changed
+    entries_changed = 0
+    for entry in entries:
+        kept = targets.get(entry.get('ate', '').lower())
+        if kept is not None:
+            entry['ate'] = kept['name']
+            # A version reference would bring the old name back on load
+            entry.pop('ref', None)
+            entries_changed += 1
+    return remaining, recipes_changed, entries_changed
@@ -0,0 +1,224 @@
+import csv
+import os
+import sqlite3
+import tempfile
+from .models import NUTRIENTS
+
+# FDC nutrient id -> (BiteWise field, preference); when a food has several
+# ids for one field, the lowest preference wins. Fields other than
+# NUTRIENTS are registered micronutrients and go in the record's 'micro',
+# in FDC's units, which the registry uses too.
+FDC_NUTRIENTS = {
+    1008: ('kcal', 0),      # Energy (kcal)
+    2047: ('kcal', 1),      # Energy (Atwater general factors)
+    2048: ('kcal', 2),      # Energy (Atwater specific factors)
+    1005: ('carbs', 0),     # Carbohydrate, by difference
+    2000: ('sugar', 0),     # Sugars, total
+    1063: ('sugar', 1),     # Sugars, total NLEA
+    1004: ('fat', 0),       # Total lipid (fat)
+    1003: ('protein', 0),   # Protein
+    1079: ('fiber', 0),     # Fiber, total dietary
+    1093: ('sodium', 0),    # Sodium, Na (mg)
+    1106: ('vitamin_a', 0),         # Vitamin A, RAE (µg)
+    1105: ('retinol', 0),           # Retinol (µg)
+    1107: ('beta_carotene', 0),     # Carotene, beta (µg)
+    1114: ('vitamin_d', 0),         # Vitamin D (D2 + D3) (µg)
+    1109: ('vitamin_e', 0),         # Vitamin E (alpha-tocopherol) (mg)
+    1185: ('vitamin_k', 0),         # Vitamin K (phylloquinone) (µg)
+    1162: ('vitamin_c', 0),         # Vitamin C, total ascorbic acid (mg)
+    1165: ('thiamin', 0),           # Thiamin (mg)
+    1166: ('riboflavin', 0),        # Riboflavin (mg)
+    1167: ('niacin', 0),            # Niacin (mg)
+    1170: ('pantothenic_acid', 0),  # Pantothenic acid (mg)
+    1175: ('vitamin_b6', 0),        # Vitamin B-6 (mg)
+    1176: ('biotin', 0),            # Biotin (µg)
+    1177: ('folate', 0),            # Folate, total (µg)
+    1190: ('folate', 1),            # Folate, DFE (µg)
+    1178: ('vitamin_b12', 0),       # Vitamin B-12 (µg)
+    1180: ('choline', 0),           # Choline, total (mg)
+    1087: ('calcium', 0),           # Calcium, Ca (mg)
+    1089: ('iron', 0),              # Iron, Fe (mg)
+    1090: ('magnesium', 0),         # Magnesium, Mg (mg)
+    1091: ('phosphorus', 0),        # Phosphorus, P (mg)
+    1092: ('potassium', 0),         # Potassium, K (mg)
+    1095: ('zinc', 0),              # Zinc, Zn (mg)
+    1098: ('copper', 0),            # Copper, Cu (mg)
+    1101: ('manganese', 0),         # Manganese, Mn (mg)
+    1103: ('selenium', 0),          # Selenium, Se (µg)
+    1100: ('iodine', 0),            # Iodine, I (µg)
+    1096: ('chromium', 0),          # Chromium, Cr (µg)
+    1102: ('molybdenum', 0),        # Molybdenum, Mo (µg)
+    1099: ('fluoride', 0),          # Fluoride, F (µg)
+    1088: ('chloride', 0),          # Chlorine, Cl (mg)
+    1258: ('saturated_fat', 0),     # Fatty acids, total saturated (g)
+    1292: ('monounsaturated_fat', 0),  # Fatty acids, total monounsaturated (g)
+    1293: ('polyunsaturated_fat', 0),  # Fatty acids, total polyunsaturated (g)
+    1257: ('trans_fat', 0),         # Fatty acids, total trans (g)
+    1253: ('cholesterol', 0),       # Cholesterol (mg)
+    1009: ('starch', 0),            # Starch (g)
+    1051: ('water', 0),             # Water (g)
+    1018: ('alcohol', 0),           # Alcohol, ethyl (g)
+    1057: ('caffeine', 0),          # Caffeine (mg)
+}
+
+# When two foods share a description, the one from the better curated
+# dataset is kept
+DATA_TYPES = ['foundation_food', 'sr_legacy_food', 'survey_fndds_food', 'branded_food']
+
+BATCH_SIZE = 50000
+
+class ImportCancelled(Exception):
+    pass
+
+def sodium_to_salt(sodium_mg):
+    """Grams of salt for milligrams of sodium"""
+    return sodium_mg * 2.5 / 1000
+
+def _rows(path, progress, start, span, cancelled):
+    """Stream a CSV as (header index, row) pairs, reporting progress by bytes read"""
+    size = os.path.getsize(path) or 1
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = {name: i for i, name in enumerate(next(reader, []))}
+        for count, row in enumerate(reader, start=1):
+            if count % BATCH_SIZE == 0:
+                if cancelled and cancelled():
+                    raise ImportCancelled()
+                if progress:
+                    progress(start + span * f.buffer.tell() / size, f"Reading {os.path.basename(path)}")
+            yield header, row
+
+def _column(header, name, path):
+    if name not in header:
+        raise ValueError(f"{os.path.basename(path)} has no '{name}' column")
+    return header[name]
+
+def _index_nutrients(db, path, progress, cancelled):
+    batch = []
+    columns = None
+    for header, row in _rows(path, progress, 0.0, 0.8, cancelled):
+        if columns is None:
+            columns = [_column(header, name, path) for name in ['fdc_id', 'nutrient_id', 'amount']]
+        try:
+            fdc_id, nutrient_id, amount = (row[i] for i in columns)
+            field, preference = FDC_NUTRIENTS.get(int(nutrient_id), (None, None))
+            if field is None or amount == '':
+                continue
+            batch.append((int(fdc_id), field, preference, float(amount)))
+        except (IndexError, ValueError):
+            continue
+        if len(batch) >= BATCH_SIZE:
+            db.executemany("INSERT INTO amount VALUES (?, ?, ?, ?)", batch)
+            db.commit()
+            batch = []
+    db.executemany("INSERT INTO amount VALUES (?, ?, ?, ?)", batch)
+    db.commit()
+
+def _index_foods(db, path, progress, cancelled):
+    priorities = {data_type: i for i, data_type in enumerate(DATA_TYPES)}
+    batch = []
+    columns = None
+    for header, row in _rows(path, progress, 0.8, 0.1, cancelled):
+        if columns is None:
+            columns = [_column(header, name, path) for name in ['fdc_id', 'data_type', 'description']]
+        try:
+            fdc_id, data_type, description = (row[i] for i in columns)
+            batch.append((int(fdc_id), priorities.get(data_type, len(DATA_TYPES)), description.strip()))
+        except (IndexError, ValueError):
+            continue
+        if len(batch) >= BATCH_SIZE:
+            db.executemany("INSERT OR IGNORE INTO food VALUES (?, ?, ?)", batch)
+            db.commit()
+            batch = []
+    db.executemany("INSERT OR IGNORE INTO food VALUES (?, ?, ?)", batch)
+    db.commit()
+
+def _record(description, values):
+    record = {'name': description}
+    for field in ['kcal', 'carbs', 'sugar', 'fat', 'protein', 'fiber']:
+        record[field] = round(values.get(field, (0, 0.0))[1], 2)
+    record['salt'] = round(sodium_to_salt(values.get('sodium', (0, 0.0))[1]), 3)
+    record['cost'] = 0.0
+    micro = {field: round(value, 3) for field, (_, value) in values.items() if field not in NUTRIENTS}
+    if micro:
+        record['micro'] = micro
+    return record
+
+def _foods(db, progress, cancelled):
+    """(description, {field: (preference, amount)}) per food, best dataset first"""
+    total = db.execute("SELECT COUNT(*) FROM food").fetchone()[0] or 1
+    rows = db.execute(
+        "SELECT f.fdc_id, f.description, a.field, a.preference, a.value "
+        "FROM food f JOIN amount a ON a.fdc_id = f.fdc_id "
+        "ORDER BY f.priority, f.fdc_id")
+    current, description, values, done = None, None, {}, 0
+    for fdc_id, name, field, preference, value in rows:
+        if fdc_id != current:
+            if current is not None:
+                yield description, values
+            current, description, values = fdc_id, name, {}
+            done += 1
+            if done % BATCH_SIZE == 0:
+                if cancelled and cancelled():
+                    raise ImportCancelled()
+                if progress:
+                    progress(0.9 + 0.1 * min(done / total, 1.0), "Matching nutrients to foods")
+        if field not in values or preference < values[field][0]:
+            values[field] = (preference, value)
+    if current is not None:
+        yield description, values
+
+def import_fdc(fdc_dir, existing_names=(), progress=None, cancelled=None):
+    """New ingredient records from the food.csv and food_nutrient.csv in fdc_dir.
+
+    food_nutrient.csv is often gigabytes, so both files are streamed into a
+    temporary SQLite file holding only the nutrients BiteWise knows and read
+    back food by food through an index; memory stays flat however large
+    the download is. FDC amounts are per 100 g, like ingredients.json.
+    Foods without an energy value are skipped, as are names already in
+    existing_names or imported earlier in the run (ignoring case).
+    progress(fraction, text) is called every BATCH_SIZE rows and
+    cancelled(), when it returns true, stops the import with
+    ImportCancelled. Returns (records, stats).
+
+    Only the staging is batched. The new records come back as one list
+    because ingredients.json is a single document that save_ingredients
+    writes whole after giving every record a version, and the app holds
+    every ingredient in memory once loaded anyway.
+    """
+    food_csv = os.path.join(fdc_dir, 'food.csv')
+    nutrient_csv = os.path.join(fdc_dir, 'food_nutrient.csv')
+    for path in [food_csv, nutrient_csv]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{os.path.basename(path)} not found in {fdc_dir}")
+
+    seen = {name.lower() for name in existing_names}
+    records = []
+    stats = {'imported': 0, 'duplicates': 0, 'without energy': 0}
+    with tempfile.TemporaryDirectory(prefix='bitewise-fdc-') as scratch:
+        db = sqlite3.connect(os.path.join(scratch, 'index.sqlite'))
+        try:
+            db.execute("PRAGMA journal_mode = OFF")
+            db.execute("PRAGMA synchronous = OFF")
+            db.execute("CREATE TABLE food (fdc_id INTEGER PRIMARY KEY, priority INTEGER, description TEXT)")
+            db.execute("CREATE TABLE amount (fdc_id INTEGER, field TEXT, preference INTEGER, value REAL)")
+            _index_nutrients(db, nutrient_csv, progress, cancelled)
+            _index_foods(db, food_csv, progress, cancelled)
+            db.execute("CREATE INDEX amount_food ON amount (fdc_id)")
+            db.execute("CREATE INDEX food_order ON food (priority, fdc_id)")
+            for description, values in _foods(db, progress, cancelled):
+                if 'kcal' not in values or not description:
+                    stats['without energy'] += 1
+                    continue
+                key = description.lower()
+                if key in seen:
+                    stats['duplicates'] += 1
+                    continue
+                seen.add(key)
+                records.append(_record(description, values))
+        finally:
+            db.close()
+    stats['imported'] = len(records)
+    if progress:
+        progress(1.0, f"Imported {len(records)} foods")
+    return records, stats
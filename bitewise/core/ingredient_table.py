@@ -0,0 +1,180 @@
+import sys
+from array import array
+from .columns import SparseColumn
+from .models import NUTRIENTS
+from .rankings import METRICS, ordered, top
+
+class IngredientTable:
+    """ingredients.json held column by column instead of as one dict per ingredient.
+
+    Names are a list and every nutrient is an array of doubles, so a large
+    food database costs a few bytes per value instead of a dict per row.
+    Vitamins and other values in a record's 'micro' dict get a SparseColumn
+    per key, holding only the rows that list them.
+    The rankings in METRICS are derived columns, computed on first use
+    after a change and kept until the next one.
+    Rows are numbered in load order; remove() renumbers them. Keys other
+    than name, NUTRIENTS and micro are kept per row and written back by
+    records().
+    """
+    def __init__(self, records=()):
+        self.names = []
+        self.columns = {key: array('d') for key in NUTRIENTS}
+        self.micro = {}
+        self.extras = []
+        self.rows_by_key = {}
+        self.orders = {}
+        self.derived = {}
+        for record in records:
+            self._append(record)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _append(self, record):
+        row = len(self.names)
+        self.names.append(record['name'])
+        for key, column in self.columns.items():
+            column.append(float(record.get(key, 0) or 0))
+        for key, value in (record.get('micro') or {}).items():
+            self._micro_column(key).append(row, float(value))
+        self.extras.append(self._extra(record))
+        self.rows_by_key[record['name'].lower()] = row
+        return row
+
+    def _extra(self, record):
+        extra = {k: v for k, v in record.items() if k not in ('name', 'micro') and k not in self.columns}
+        return extra or None
+
+    def _micro_column(self, key):
+        column = self.micro.get(key)
+        if column is None:
+            column = self.micro[key] = SparseColumn()
+        return column
+
+    def nbytes(self):
+        """Rough bytes held: the arrays, names, extras and the caches built from them"""
+        size = sys.getsizeof(self.names) + sum(sys.getsizeof(name) for name in self.names)
+        size += sum(column.itemsize * len(column) for column in self.columns.values())
+        size += sum(column.nbytes() for column in self.micro.values())
+        size += sys.getsizeof(self.extras) + sum(sys.getsizeof(extra) for extra in self.extras if extra)
+        size += sys.getsizeof(self.rows_by_key)
+        size += sum(sys.getsizeof(order) for order in self.orders.values())
+        size += sum(values.itemsize * len(values) for values in self.derived.values())
+        return size
+
+    def row(self, row):
+        """[name, *NUTRIENTS] of one row"""
+        return [self.names[row]] + [self.columns[key][row] for key in NUTRIENTS]
+
+    def _changed(self):
+        self.orders.clear()
+        self.derived.clear()
+
+    def ranking(self, key):
+        """Values of the METRICS ranking key for every row, NaN where undefined"""
+        if key not in self.derived:
+            self.derived[key] = METRICS[key].compute(self.columns)
+        return self.derived[key]
+
+    def top(self, key, k, rows=None):
+        """The k best rows (of rows, or all) by the METRICS ranking key, best first"""
+        return top(self.ranking(key), k, METRICS[key].higher_is_better, rows)
+
+    def value(self, row, key):
+        """A nutrient or ranking of one row; 0 for a missing nutrient, NaN for an undefined ranking"""
+        column = self.columns.get(key)
+        if column is not None:
+            return column[row]
+        if key in METRICS:
+            return self.ranking(key)[row]
+        column = self.micro.get(key)
+        return column.get(row) if column is not None else 0.0
+
+    def _record(self, row):
+        record = {'name': self.names[row]}
+        for key in NUTRIENTS:
+            record[key] = self.columns[key][row]
+        if self.extras[row]:
+            record.update(self.extras[row])
+        return record
+
+    def record(self, row):
+        record = self._record(row)
+        micro = {key: column.get(row, None) for key, column in self.micro.items()}
+        micro = {key: value for key, value in micro.items() if value is not None}
+        if micro:
+            record['micro'] = micro
+        return record
+
+    def records(self):
+        """Every row as an ingredients.json record, in row order"""
+        records = [self._record(row) for row in range(len(self.names))]
+        # One pass per sparse column rather than a lookup per row and key
+        for key, column in self.micro.items():
+            for row, value in column.items():
+                records[row].setdefault('micro', {})[key] = value
+        return records
+
+    def find(self, name):
+        """Row of the ingredient called name, ignoring case, or None"""
+        return self.rows_by_key.get(name.lower())
+
+    def append(self, record):
+        self._changed()
+        return self._append(record)
+
+    def update(self, row, record):
+        """Replace a row's values; record may carry a new name.
+
+        Other keys the row had, such as its id, stay, and so do its micro
+        values unless record has a 'micro' dict to replace them.
+        """
+        self._changed()
+        old_key = self.names[row].lower()
+        # Another row may hold the key when two names differ only in case
+        if self.rows_by_key.get(old_key) == row:
+            del self.rows_by_key[old_key]
+        self.names[row] = record['name']
+        self.rows_by_key[record['name'].lower()] = row
+        for key, column in self.columns.items():
+            column[row] = float(record.get(key, 0) or 0)
+        if 'micro' in record:
+            micro = record['micro'] or {}
+            for key in set(self.micro) | set(micro):
+                value = micro.get(key)
+                self._micro_column(key).set(row, None if value is None else float(value))
+        extra = dict(self.extras[row] or {})
+        extra.update(self._extra(record) or {})
+        self.extras[row] = extra or None
+
+    def keep_extras(self, records):
+        """Take the other keys of records() passed to save_ingredients(), which adds ids and versions"""
+        self.extras = [self._extra(record) for record in records]
+
+    def remove(self, rows):
+        rows = set(rows)
+        keep = [row for row in range(len(self.names)) if row not in rows]
+        self.names = [self.names[row] for row in keep]
+        self.columns = {key: array('d', (column[row] for row in keep)) for key, column in self.columns.items()}
+        new_rows = {old: new for new, old in enumerate(keep)}
+        self.micro = {key: column.renumbered(new_rows) for key, column in self.micro.items()}
+        self.extras = [self.extras[row] for row in keep]
+        self.rows_by_key = {name.lower(): row for row, name in enumerate(self.names)}
+        self._changed()
+
+    def order(self, column, descending=False):
+        """Row numbers sorted by column ('name', any nutrient or a ranking); cached until the table changes"""
+        key = (column, descending)
+        if key not in self.orders and column in METRICS:
+            self.orders[key] = ordered(self.ranking(column), descending)
+        elif key not in self.orders:
+            if column == 'name':
+                sort_key = [name.lower() for name in self.names].__getitem__
+            elif column in self.columns:
+                sort_key = self.columns[column].__getitem__
+            else:
+                values = dict(self.micro[column].items()) if column in self.micro else {}
+                sort_key = lambda row: values.get(row, 0.0)
+            self.orders[key] = sorted(range(len(self.names)), key=sort_key, reverse=descending)
+        return self.orders[key]
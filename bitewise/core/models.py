@@ -0,0 +1,98 @@
+# Ingredients store these per 100 g; recipe ingredients and journal entries
+# carry the same keys already scaled to their gram amount
+NUTRIENTS = ['kcal', 'carbs', 'sugar', 'fat', 'protein', 'fiber', 'salt', 'cost']
+
+def scaled(values, factor):
+    result = {key: values[key] * factor for key in NUTRIENTS}
+    # Vitamins, minerals and other registered nutrients; only the ones known
+    micro = values.get('micro')
+    if micro:
+        result['micro'] = {key: value * factor for key, value in micro.items()}
+    return result
+
+def ingredient_amount(ingredient, gram):
+    """Nutrient values of gram grams of an ingredient"""
+    return scaled(ingredient, gram / 100)
+
+def recipe_totals(ingredients):
+    """Summed grams and nutrients of a recipe's ingredient rows"""
+    totals = {key: 0.0 for key in ['gram'] + NUTRIENTS}
+    micro = {}
+    for ingredient in ingredients:
+        for key in NUTRIENTS + ['gram']:
+            totals[key] += ingredient[key]
+        for key, value in ingredient.get('micro', {}).items():
+            micro[key] = micro.get(key, 0.0) + value
+    if micro:
+        totals['micro'] = micro
+    return totals
+
+def ingredient_entry(ingredient, gram):
+    """Journal values for eating gram grams of an ingredient, referencing its version when it has one"""
+    entry = {'ate': ingredient['name']}
+    entry.update(ingredient_amount(ingredient, gram))
+    if 'id' in ingredient:
+        entry['ref'] = [ingredient['id'], ingredient['version']]
+    return entry
+
+def recipe_entry(recipe, amount, portions_mode):
+    """Journal values for a recipe, eaten by grams or by portions when portions_mode.
+
+    Raises ValueError when eating by grams from a recipe without ingredients.
+    """
+    totals = recipe_totals(recipe['ingredients'])
+    entry = {'ate': recipe['name']}
+    if portions_mode:
+        portions = recipe.get('portions', 1)
+        if portions <= 0:
+            portions = 1
+        entry.update(scaled(totals, amount / portions))
+        entry['pts'] = True
+        entry['gram'] = totals['gram'] / portions * amount
+    else:
+        if totals['gram'] == 0:
+            raise ValueError("Recipe has no ingredients")
+        entry.update(scaled(totals, amount / totals['gram']))
+        entry['pts'] = False
+    return entry
+
+def walk_entry(distance, weight, date, timestamp):
+    """Journal entry for a walk; burnt calories are logged as negative kcal"""
+    return {
+        'timestamp': timestamp,
+        'date': date,
+        'ate': f"Walk: {distance:.2f}km",
+        'kcal': -(0.5 * weight * distance),
+        'weight': weight
+    }
+
+def fill_timestamps(entries):
+    """Entries from before timestamps were recorded count as eaten at midnight"""
+    for entry in entries:
+        if 'timestamp' not in entry and 'date' in entry:
+            entry['timestamp'] = f"{entry['date']} 00:00:00"
+    return entries
+
+def apply_ingredient_update(rows, name_key, old_name, ingredient):
+    """Rename and rescale the rows that use old_name to the new ingredient values.
+
+    rows are recipe ingredients (name_key 'name') or journal entries
+    (name_key 'ate'). Returns whether anything changed.
+    """
+    return apply_ingredient_updates(rows, name_key, {old_name.lower(): ingredient}) > 0
+
+def apply_ingredient_updates(rows, name_key, updates):
+    """apply_ingredient_update() for many ingredients in one pass over rows.
+
+    updates maps lowercased old names to the new ingredient values.
+    Returns the number of rows changed.
+    """
+    changed = 0
+    for row in rows:
+        ingredient = updates.get(row.get(name_key, '').lower())
+        if ingredient is not None:
+            row[name_key] = ingredient['name']
+            row.pop('micro', None)
+            row.update(ingredient_amount(ingredient, row.get('gram', 0)))
+            changed += 1
+    return changed
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from .models import NUTRIENTS
+
+class Nutrient:
+    """One value the app can track, per 100 g on ingredients"""
+    def __init__(self, key, label, unit, decimals=1):
+        self.key = key
+        self.label = label
+        self.unit = unit
+        self.decimals = decimals
+
+    @property
+    def format(self):
+        return "{:.%df}" % self.decimals
+
+    @property
+    def title(self):
+        return self.label if self.unit in ('g', 'kcal', '') else f"{self.label} ({self.unit})"
+
+REGISTRY = OrderedDict()
+
+def register(key, label, unit='mg', decimals=1):
+    """Add a nutrient, or relabel one; the key is what records store it under"""
+    REGISTRY[key] = Nutrient(key, label, unit, decimals)
+    return REGISTRY[key]
+
+for _key, _label, _unit, _decimals in [
+        ('kcal', "Kcal", 'kcal', 1), ('carbs', "Carbs", 'g', 1), ('sugar', "Sugar", 'g', 1),
+        ('fat', "Fat", 'g', 1), ('protein', "Protein", 'g', 1), ('fiber', "Fiber", 'g', 2),
+        ('salt', "Salt", 'g', 2), ('cost', "Cost", '', 3)]:
+    register(_key, _label, _unit, _decimals)
+
+# Vitamins and minerals are stored sparsely, in a record's 'micro' dict,
+# since most foods only list a few of them
+for _key, _label, _unit, _decimals in [
+        ('vitamin_a', "Vitamin A", 'µg', 0), ('retinol', "Retinol", 'µg', 0),
+        ('beta_carotene', "Beta-carotene", 'µg', 0), ('vitamin_d', "Vitamin D", 'µg', 1),
+        ('vitamin_e', "Vitamin E", 'mg', 1), ('vitamin_k', "Vitamin K", 'µg', 1),
+        ('vitamin_c', "Vitamin C", 'mg', 1), ('thiamin', "Thiamin (B1)", 'mg', 2),
+        ('riboflavin', "Riboflavin (B2)", 'mg', 2), ('niacin', "Niacin (B3)", 'mg', 1),
+        ('pantothenic_acid', "Pantothenic acid (B5)", 'mg', 2), ('vitamin_b6', "Vitamin B6", 'mg', 2),
+        ('biotin', "Biotin (B7)", 'µg', 1), ('folate', "Folate (B9)", 'µg', 0),
+        ('vitamin_b12', "Vitamin B12", 'µg', 2), ('choline', "Choline", 'mg', 0),
+        ('calcium', "Calcium", 'mg', 0), ('iron', "Iron", 'mg', 1), ('magnesium', "Magnesium", 'mg', 0),
+        ('phosphorus', "Phosphorus", 'mg', 0), ('potassium', "Potassium", 'mg', 0),
+        ('sodium', "Sodium", 'mg', 0), ('zinc', "Zinc", 'mg', 1), ('copper', "Copper", 'mg', 2),
+        ('manganese', "Manganese", 'mg', 2), ('selenium', "Selenium", 'µg', 1),
+        ('iodine', "Iodine", 'µg', 0), ('chromium', "Chromium", 'µg', 1),
+        ('molybdenum', "Molybdenum", 'µg', 1), ('fluoride', "Fluoride", 'µg', 1),
+        ('chloride', "Chloride", 'mg', 0), ('saturated_fat', "Saturated fat", 'g', 1),
+        ('monounsaturated_fat', "Monounsaturated fat", 'g', 1),
+        ('polyunsaturated_fat', "Polyunsaturated fat", 'g', 1), ('trans_fat', "Trans fat", 'g', 2),
+        ('omega_3', "Omega-3", 'g', 2), ('omega_6', "Omega-6", 'g', 2),
+        ('cholesterol', "Cholesterol", 'mg', 0), ('starch', "Starch", 'g', 1),
+        ('water', "Water", 'g', 1), ('alcohol', "Alcohol", 'g', 1), ('caffeine', "Caffeine", 'mg', 0)]:
+    register(_key, _label, _unit, _decimals)
+
+# Columns each view shows until settings.json says otherwise
+DEFAULT_COLUMNS = {
+    'journal': list(NUTRIENTS),
+    'ingredients': list(NUTRIENTS),
+    'recipes': list(NUTRIENTS),
+}
+
+def get(key):
+    return REGISTRY[key]
+
+def micronutrients():
+    """Keys of every registered nutrient stored in 'micro'"""
+    return [key for key in REGISTRY if key not in NUTRIENTS]
+
+def register_custom(settings):
+    """Register the nutrients listed under 'nutrients' in settings.json"""
+    for item in settings.get('nutrients', []):
+        try:
+            if item['key'] not in NUTRIENTS:
+                register(item['key'], item.get('label', item['key']), item.get('unit', 'mg'),
+                         int(item.get('decimals', 1)))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error registering nutrient {item}: {e}")
+
+def visible_columns(settings, view, extra=()):
+    """Nutrient keys, or keys in extra, a view shows, in order, as configured in settings.json"""
+    keys = settings.get('columns', {}).get(view)
+    if not isinstance(keys, list):
+        return list(DEFAULT_COLUMNS[view])
+    return [key for key in keys if key in REGISTRY or key in extra]
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+# Opt-in: BITEWISE_PROFILE=1 records wall time per phase and prints a
+# summary table when the app exits
+ENABLED = os.environ.get('BITEWISE_PROFILE', '') not in ('', '0')
+
+_stats = {}
+_lock = threading.Lock()
+
+def record(name, seconds):
+    if not ENABLED:
+        return
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [1, seconds, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block under name"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name=None):
+    """Decorator timing every call; returns the function untouched when disabled"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def summary():
+    with _lock:
+        rows = sorted(_stats.items(), key=lambda item: item[1][1], reverse=True)
+    width = max([len(name) for name, stat in rows] + [9])
+    lines = [f"{'Operation':<{width}}  {'Calls':>6}  {'Total ms':>10}  {'Mean ms':>9}  {'Max ms':>9}"]
+    lines.append("-" * len(lines[0]))
+    for name, (count, total, longest) in rows:
+        lines.append(f"{name:<{width}}  {count:>6}  {total * 1000:>10.1f}  "
+                     f"{total * 1000 / count:>9.2f}  {longest * 1000:>9.2f}")
+    return "\n".join(lines)
+
+def _print_summary():
+    if _stats:
+        print("\nBiteWise profile\n" + summary(), file=sys.stderr)
+
+if ENABLED:
+    atexit.register(_print_summary)
@@ -0,0 +1,60 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+# Value of a ranking an ingredient has no meaningful figure for
+UNDEFINED = float('nan')
+
+class Metric:
+    """Ratio of two per-100 g values of an ingredient, used to rank them.
+
+    Defined only where the denominator and every key in required are
+    above zero, so foods without a price or without energy aren't ranked
+    as free or infinite.
+    """
+    def __init__(self, key, label, numerator, denominator, factor=1.0, decimals=1,
+                 higher_is_better=True, required=()):
+        self.key = key
+        self.label = label
+        self.numerator = numerator
+        self.denominator = denominator
+        self.factor = factor
+        self.decimals = decimals
+        self.higher_is_better = higher_is_better
+        self.required = tuple(required)
+
+    @property
+    def format(self):
+        return "{:.%df}" % self.decimals
+
+    def compute(self, columns):
+        """One value per row from {key: column} of per-100 g values"""
+        factor = self.factor
+        values = [n / d * factor if d > 0 else UNDEFINED
+                  for n, d in zip(columns[self.numerator], columns[self.denominator])]
+        for key in self.required:
+            values = [value if x > 0 else UNDEFINED for value, x in zip(values, columns[key])]
+        return array('d', values)
+
+METRICS = OrderedDict((metric.key, metric) for metric in [
+    Metric('protein_per_kcal', "Protein g/100 kcal", 'protein', 'kcal', 100, 1),
+    Metric('fiber_per_kcal', "Fiber g/100 kcal", 'fiber', 'kcal', 100, 2),
+    Metric('cost_per_protein', "Cost/100 g protein", 'cost', 'protein', 100, 2,
+           higher_is_better=False, required=('cost',)),
+    Metric('kcal_per_cost', "Kcal per cost unit", 'kcal', 'cost', 1, 0, required=('kcal',)),
+    Metric('sugar_share', "Sugar % of carbs", 'sugar', 'carbs', 100, 0, higher_is_better=False),
+])
+
+def ordered(values, descending=False):
+    """Row numbers sorted by values, undefined ones last either way"""
+    defined = [row for row, value in enumerate(values) if value == value]
+    defined.sort(key=values.__getitem__, reverse=descending)
+    return defined + [row for row, value in enumerate(values) if value != value]
+
+def top(values, k, highest=True, rows=None):
+    """The k rows (of rows, or all) with the highest or lowest defined values, best first"""
+    if rows is None:
+        rows = range(len(values))
+    candidates = (row for row in rows if values[row] == values[row])
+    pick = heapq.nlargest if highest else heapq.nsmallest
+    return pick(k, candidates, key=values.__getitem__)
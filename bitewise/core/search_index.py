@@ -0,0 +1,275 @@
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+
+# Words shorter than this only match by prefix; typos in them are too ambiguous
+FUZZY_MIN_LENGTH = 4
+# Words this long tolerate two typos instead of one
+TWO_TYPO_LENGTH = 8
+
+# Words of a name or query; punctuation such as the comma in "Yogurt, plain" splits them
+WORD = re.compile(r'[^\W_]+')
+
+# Rank tiers, best first
+EXACT_PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(4)
+
+def fold(text):
+    return text.casefold()
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def max_typos(word):
+    if len(word) < FUZZY_MIN_LENGTH:
+        return 0
+    return 1 if len(word) < TWO_TYPO_LENGTH else 2
+
+def split_words(key):
+    return WORD.findall(key)
+
+def deletions(word, depth):
+    """word and every string made by deleting up to depth characters from it"""
+    found = {word}
+    layer = {word}
+    for _ in range(depth):
+        layer = {w[:i] + w[i + 1:] for w in layer for i in range(len(w))}
+        found |= layer
+    return found
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance counting adjacent swaps as one edit; limit + 1 once over limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def usage_boost(stats, today=None):
+    """Ranking bonus for a (times logged, last date) pair from usage_stats()"""
+    if not stats:
+        return 0.0
+    count, last = stats
+    try:
+        days = ((today or date.today()) - date.fromisoformat(last)).days
+    except ValueError:
+        days = 365
+    return math.log1p(count) + 2.0 / (1 + max(days, 0) / 7)
+
+class SearchIndex:
+    """Case-insensitive name lookup for the ingredient and recipe pickers.
+
+    Queries of three or more characters match anywhere in a name through
+    trigram postings; shorter ones match the start of any word through a
+    sorted word list, which serves as the prefix trie. ranked() adds typo
+    tolerance through a deletion neighbourhood: every word is filed under
+    itself and each one-character deletion of it (each deletion of up to two
+    characters for words long enough to allow two typos), and a query word
+    looks up its own deletions, so words within an edit or two meet under a
+    shared key. The index is kept in step with the db by sync(), which only
+    touches names that changed.
+    """
+    def __init__(self, names=()):
+        self.lock = threading.Lock()
+        self._clear()
+        self.sync(names)
+
+    def _clear(self):
+        self.folded = {}
+        self.order = []
+        self.words = []
+        self.word_names = {}
+        self.postings = {}
+        self.neighbours = {}
+
+    def __len__(self):
+        return len(self.folded)
+
+    def __contains__(self, name):
+        return name in self.folded
+
+    def names(self):
+        """Every name, sorted case-insensitively"""
+        with self.lock:
+            return [name for key, name in self.order]
+
+    def sync(self, names):
+        """Make the index hold exactly names; returns (added, removed) counts"""
+        names = set(names)
+        with self.lock:
+            removed = [name for name in self.folded if name not in names]
+            added = [name for name in names if name not in self.folded]
+            counts = len(added), len(removed)
+            if len(removed) > len(self.folded) // 4:
+                # Starting over is cheaper than many list deletions
+                self._clear()
+                removed, added = [], names
+            for name in removed:
+                self._remove(name)
+            for name in added:
+                self._add(name, keep_sorted=False)
+            if added:
+                # One sort of a mostly sorted list beats an insort per name
+                self.order.sort()
+                self.words.sort()
+        return counts
+
+    def add(self, name):
+        with self.lock:
+            if name not in self.folded:
+                self._add(name)
+
+    def remove(self, name):
+        with self.lock:
+            if name in self.folded:
+                self._remove(name)
+
+    def _add(self, name, keep_sorted=True):
+        key = fold(name)
+        self.folded[name] = key
+        if keep_sorted:
+            insort(self.order, (key, name))
+        else:
+            self.order.append((key, name))
+        for word in set(split_words(key)):
+            holders = self.word_names.get(word)
+            if holders is None:
+                holders = self.word_names[word] = set()
+                if keep_sorted:
+                    insort(self.words, word)
+                else:
+                    self.words.append(word)
+                if len(word) >= FUZZY_MIN_LENGTH - 1:
+                    for variant in deletions(word, max_typos(word) or 1):
+                        self.neighbours.setdefault(variant, set()).add(word)
+            holders.add(name)
+        for gram in trigrams(key):
+            self.postings.setdefault(gram, set()).add(name)
+
+    def _remove(self, name):
+        key = self.folded.pop(name)
+        i = bisect_left(self.order, (key, name))
+        del self.order[i]
+        for word in set(split_words(key)):
+            holders = self.word_names[word]
+            holders.discard(name)
+            if not holders:
+                del self.word_names[word]
+                del self.words[bisect_left(self.words, word)]
+                if len(word) >= FUZZY_MIN_LENGTH - 1:
+                    for variant in deletions(word, max_typos(word) or 1):
+                        words = self.neighbours[variant]
+                        words.discard(word)
+                        if not words:
+                            del self.neighbours[variant]
+        for gram in trigrams(key):
+            holders = self.postings[gram]
+            holders.discard(name)
+            if not holders:
+                del self.postings[gram]
+
+    def search(self, query):
+        """Set of names matching query, or None when query is blank (everything matches)"""
+        query = fold(query).strip()
+        if not query:
+            return None
+        with self.lock:
+            if len(query) < 3:
+                return self._word_prefix(query)
+            return self._substring(query)
+
+    def ranked(self, query, usage=None, today=None):
+        """Names matching query, best first, or None when query is blank.
+
+        Whole-name prefix matches come first, then names where every query
+        word starts a word, then other substring matches, then names whose
+        words are within one edit (two for words of eight letters or more)
+        of the query words. Within a tier, foods logged often and recently
+        (usage maps names to usage_stats() values) come first.
+        """
+        query = fold(query).strip()
+        if not query:
+            return None
+        tokens = split_words(query)
+        with self.lock:
+            matches = self._substring(query) if len(query) >= 3 else self._word_prefix(query)
+            fuzzy = None
+            for token in tokens:
+                found = self._word_prefix(token) | self._near(token)
+                fuzzy = found if fuzzy is None else fuzzy & found
+                if not fuzzy:
+                    break
+            # A query of punctuation alone has no words to match fuzzily
+            if fuzzy:
+                matches |= fuzzy
+            keys = {name: self.folded[name] for name in matches}
+
+        def tier(key):
+            if key.startswith(query):
+                return EXACT_PREFIX
+            name_words = split_words(key)
+            if all(any(word.startswith(token) for word in name_words) for token in tokens):
+                return WORD_PREFIX
+            if query in key:
+                return SUBSTRING
+            return FUZZY
+
+        usage = usage or {}
+        return sorted(matches, key=lambda name: (tier(keys[name]),
+                                                 -usage_boost(usage.get(name), today),
+                                                 keys[name]))
+
+    def _word_prefix(self, query):
+        found = set()
+        i = bisect_left(self.words, query)
+        while i < len(self.words) and self.words[i].startswith(query):
+            found.update(self.word_names[self.words[i]])
+            i += 1
+        return found
+
+    def _near(self, token):
+        """Names with a word within max_typos(token) edits of token"""
+        limit = max_typos(token)
+        if not limit:
+            return set()
+        words = set()
+        for variant in deletions(token, limit):
+            words |= self.neighbours.get(variant, set())
+        found = set()
+        for word in words:
+            if edit_distance(token, word, limit) <= limit:
+                found |= self.word_names[word]
+        return found
+
+    def _substring(self, query):
+        lists = sorted((self.postings.get(gram, ()) for gram in trigrams(query)), key=len)
+        if not lists[0]:
+            return set()
+        candidates = set(lists[0])
+        for holders in lists[1:]:
+            candidates &= holders
+            if not candidates:
+                return candidates
+        # Trigrams only prove the pieces are there; check they are in order
+        return {name for name in candidates if query in self.folded[name]}
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_index(kind):
+    """The process-wide index for kind ('ingredients' or 'recipes')"""
+    with _shared_lock:
+        index = _shared.get(kind)
+        if index is None:
+            index = _shared[kind] = SearchIndex()
+        return index
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import threading
+from .profiler import phase
+from .versions import VersionTable
+
+_cache = {}
+_resolvers = {}
+# (mtime_ns, size, entry count) of each journal.json as last written here
+_journals = {}
+_lock = threading.Lock()
+
+def _copy(value):
+    # JSON data is only dicts, lists and scalars, so this is a full deep
+    # copy without copy.deepcopy's memo bookkeeping
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+def _parsed(path):
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _cache.get(path)
+    if cached is None or cached[0] != key:
+        with phase(f"json parse {os.path.basename(path)}"):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        with _lock:
+            _cache[path] = (key, data)
+    else:
+        data = cached[1]
+    return data
+
+def load_json(path):
+    """Parsed contents of a db JSON file, reused while the file is unchanged.
+
+    Every caller gets its own copy, so tabs are free to edit what they load.
+    Raises the same errors as open() and json.load().
+    """
+    with phase(f"json load {os.path.basename(path)}"):
+        return _copy(_parsed(path))
+
+def save_json(path, data):
+    """Write a db JSON file the way every tab does and drop its cache entry"""
+    with phase(f"json save {os.path.basename(path)}"):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    forget(path)
+
+def forget(path):
+    """Drop a file after writing it, in case its mtime didn't move"""
+    with _lock:
+        _cache.pop(path, None)
+
+def preload(db_dir, names):
+    """Parse db files ahead of time; meant to run on a worker thread"""
+    for name in names:
+        path = os.path.join(db_dir, name)
+        try:
+            if os.path.exists(path):
+                _parsed(path)
+        except Exception as e:
+            print(f"Error preloading {name}: {e}")
+
+def db_path():
+    """Folder holding the db/*.json files; BITEWISE_DB_DIR points scripts elsewhere"""
+    if os.environ.get('BITEWISE_DB_DIR'):
+        return os.path.abspath(os.environ['BITEWISE_DB_DIR'])
+    if 'APPIMAGE' in os.environ:
+        base_dir = os.path.dirname(os.environ['APPIMAGE'])
+    elif getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_dir, 'db')
+
+def get_db_dir():
+    db_dir = db_path()
+    os.makedirs(db_dir, exist_ok=True)
+    return db_dir
+
+def _load_list(db_dir, filename, key):
+    path = os.path.join(db_dir, filename)
+    if not os.path.exists(path):
+        return []
+    try:
+        data = load_json(path)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return []
+    # Very old files hold the bare list instead of {key: [...]}
+    if isinstance(data, list):
+        return data
+    return data.get(key, []) if isinstance(data, dict) else []
+
+def _resolver(db_dir):
+    """VersionTable shared by journal loads while versions.json is unchanged; not to be modified.
+
+    Resolving references then costs a dict lookup per entry instead of
+    parsing and copying the version history on every load.
+    """
+    path = os.path.join(db_dir, 'versions.json')
+    if not os.path.exists(path):
+        return VersionTable()
+    try:
+        data = _parsed(path)
+    except Exception as e:
+        print(f"Error loading versions.json: {e}")
+        return VersionTable()
+    with _lock:
+        cached = _resolvers.get(path)
+    if cached is None or cached.source is not data:
+        cached = VersionTable(data)
+        cached.source = data
+        with _lock:
+            _resolvers[path] = cached
+    return cached
+
+def load_journal(db_dir):
+    """Journal entries with the values of entries that reference an ingredient version filled in"""
+    entries = _load_list(db_dir, 'journal.json', 'entries')
+    if any('ref' in entry for entry in entries):
+        unresolved = _resolver(db_dir).materialize(entries)
+        if unresolved:
+            print(f"Error loading journal.json: {unresolved} entries reference ingredient versions "
+                  f"versions.json doesn't have; they only show their stored name and kcal")
+    return entries
+
+def load_ingredients(db_dir):
+    return _load_list(db_dir, 'ingredients.json', 'ingredients')
+
+def load_recipes(db_dir):
+    return _load_list(db_dir, 'recipes.json', 'recipes')
+
+def _load_dict(db_dir, filename):
+    path = os.path.join(db_dir, filename)
+    if not os.path.exists(path):
+        return {}
+    try:
+        data = load_json(path)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def load_diet(db_dir):
+    return _load_dict(db_dir, 'diet.json')
+
+def load_versions(db_dir):
+    """VersionTable of versions.json, for changing and saving.
+
+    Unlike the other loaders this raises when the file exists but can't be
+    read, so a damaged versions.json is never replaced by a fresh table
+    whose ids clash with the refs in journal.json.
+    """
+    path = os.path.join(db_dir, 'versions.json')
+    if not os.path.exists(path):
+        return VersionTable()
+    data = load_json(path)
+    if not isinstance(data, dict):
+        raise ValueError("versions.json doesn't hold a version table")
+    return VersionTable(data)
+
+def load_settings(db_dir):
+    """App preferences that aren't diet rules, such as where the barcode dump lives"""
+    return _load_dict(db_dir, 'settings.json')
+
+def save_journal(db_dir, entries):
+    path = os.path.join(db_dir, 'journal.json')
+    stored = _resolver(db_dir).compact(entries)
+    save_json(path, {'entries': stored})
+    _remember_journal(path, len(stored))
+
+# How save_json's indent=2 layout ends a non-empty journal
+_JOURNAL_END = b'\n  ]\n}'
+
+def _remember_journal(path, count):
+    stat = os.stat(path)
+    with _lock:
+        _journals[path] = (stat.st_mtime_ns, stat.st_size, count)
+
+def _journal_count(path, stat):
+    """Entries in journal.json if storage knows them for the file as it is on disk, else None"""
+    with _lock:
+        known = _journals.get(path)
+        cached = _cache.get(path)
+    if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+        return known[2]
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size) and isinstance(cached[1], dict):
+        return len(cached[1].get('entries', []))
+    return None
+
+def append_journal(db_dir, entries):
+    """Save entries whose only change since the journal was last loaded or saved is a new last entry.
+
+    Only that entry is written, over the closing brackets of journal.json,
+    so adding to a long journal doesn't rewrite all of it; the file comes
+    out as save_journal would write it. Falls back to save_journal when
+    the file changed behind storage's back or has another layout.
+    """
+    path = os.path.join(db_dir, 'journal.json')
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return save_journal(db_dir, entries)
+    if (not entries or stat.st_size < len(_JOURNAL_END)
+            or _journal_count(path, stat) != len(entries) - 1):
+        return save_journal(db_dir, entries)
+    stored = _resolver(db_dir).compact(entries[-1:])[0]
+    text = json.dumps({'entries': [stored]}, indent=2, ensure_ascii=False)
+    # Drop the '{"entries": [' opening, keeping the entry and the closing brackets
+    piece = (',\n' + text[text.index('[') + 2:]).encode('utf-8')
+    with phase("json append journal.json"):
+        with open(path, 'r+b') as f:
+            f.seek(-len(_JOURNAL_END), os.SEEK_END)
+            appendable = f.read() == _JOURNAL_END
+            if appendable:
+                f.seek(-len(_JOURNAL_END), os.SEEK_END)
+                f.write(piece)
+    if not appendable:
+        return save_journal(db_dir, entries)
+    new_stat = os.stat(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            # The parsed copy only lacks the new entry, so spare the next load a full parse
+            cached[1]['entries'].append(_copy(stored))
+            _cache[path] = ((new_stat.st_mtime_ns, new_stat.st_size), cached[1])
+        _journals[path] = (new_stat.st_mtime_ns, new_stat.st_size, len(entries))
+
+def save_ingredients(db_dir, ingredients):
+    """Write ingredients.json, first recording new values as versions; sets each record's id and version"""
+    versions = load_versions(db_dir)
+    if versions.sync(ingredients):
+        save_versions(db_dir, versions)
+    save_json(os.path.join(db_dir, 'ingredients.json'), {'ingredients': ingredients})
+
+def save_recipes(db_dir, recipes):
+    save_json(os.path.join(db_dir, 'recipes.json'), {'recipes': recipes})
+
+def save_diet(db_dir, settings):
+    save_json(os.path.join(db_dir, 'diet.json'), settings)
+
+def save_versions(db_dir, versions):
+    save_json(os.path.join(db_dir, 'versions.json'), versions.data())
+
+def save_settings(db_dir, settings):
+    save_json(os.path.join(db_dir, 'settings.json'), settings)
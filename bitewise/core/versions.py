@@ -0,0 +1,157 @@
+from .models import NUTRIENTS
+
+# Keys a journal entry that references a version gets from it on load
+# and doesn't store; the name and kcal stay so journal.json still reads
+# on its own without versions.json
+DERIVED = ['micro'] + [key for key in NUTRIENTS if key != 'kcal']
+
+def _values(ingredient):
+    values = {'name': ingredient['name']}
+    for key in NUTRIENTS:
+        values[key] = float(ingredient.get(key, 0) or 0)
+    if ingredient.get('micro'):
+        values['micro'] = {key: float(value) for key, value in ingredient['micro'].items()}
+    return values
+
+def _same(a, b):
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a), abs(b))
+
+class VersionTable:
+    """Every set of values each ingredient has had, as stored in versions.json.
+
+    An ingredient keeps an id for life and gets a new version whenever its
+    name or values change; versions are never edited, so a journal entry
+    can reference one as ref [id, version] together with its grams instead
+    of copying the values. A correction is a pin: entries of an older
+    version dated on or after the pin's date resolve to the pinned version
+    instead, so fixing history never rewrites journal.json.
+    """
+    def __init__(self, data=None):
+        data = data or {}
+        self.items = {int(k): v for k, v in data.get('ingredients', {}).items()}
+        self.next_id = data.get('next_id', max(self.items, default=0) + 1)
+        self.ids_by_name = {}
+        for item_id, item in self.items.items():
+            self.ids_by_name[item['versions'][-1]['name'].lower()] = item_id
+
+    def data(self):
+        return {'next_id': self.next_id,
+                'ingredients': {str(k): v for k, v in sorted(self.items.items())}}
+
+    def register(self, ingredient):
+        """Set the id and version of an ingredient record, adding a version for new values.
+
+        Records without an id are matched by name. Returns whether the
+        table changed.
+        """
+        values = _values(ingredient)
+        item_id = ingredient.get('id')
+        if item_id not in self.items:
+            item_id = self.ids_by_name.get(values['name'].lower())
+        changed = False
+        if item_id is None:
+            item_id = self.next_id
+            self.next_id += 1
+            self.items[item_id] = {'versions': [], 'pins': []}
+            changed = True
+        versions = self.items[item_id]['versions']
+        version = ingredient.get('version')
+        if not (isinstance(version, int) and 0 <= version < len(versions) and versions[version] == values):
+            if not versions or versions[-1] != values:
+                versions.append(values)
+                changed = True
+            version = len(versions) - 1
+        ingredient['id'] = item_id
+        ingredient['version'] = version
+        self.ids_by_name[values['name'].lower()] = item_id
+        return changed
+
+    def sync(self, ingredients):
+        """register() every record; returns whether the table changed"""
+        changed = False
+        for ingredient in ingredients:
+            changed = self.register(ingredient) or changed
+        return changed
+
+    def pin(self, item_id, version, from_date=None):
+        """Resolve older versions of an ingredient to version from from_date on, or always for None"""
+        item = self.items[item_id]
+        pins = [p for p in item['pins'] if from_date and p[0] < from_date]
+        pins.append([from_date or '', version])
+        item['pins'] = pins
+
+    def resolve(self, item_id, version, date):
+        """Version a reference dated date stands for, after pins"""
+        for from_date, pinned in reversed(self.items[item_id]['pins']):
+            if (date or '') >= from_date:
+                return pinned if pinned > version else version
+        return version
+
+    def values(self, item_id, version):
+        """{'name', *NUTRIENTS, 'micro'} of a version, per 100 g"""
+        return self.items[item_id]['versions'][version]
+
+    def knows(self, ref):
+        try:
+            item_id, version = ref
+            return 0 <= version < len(self.items[item_id]['versions'])
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def materialize(self, entries):
+        """Fill in name and values of every entry carrying a ref, in place.
+
+        Entries whose ref isn't in the table keep their stored values.
+        Returns how many of those there were.
+        """
+        unresolved = 0
+        for entry in entries:
+            ref = entry.get('ref')
+            if ref is None:
+                continue
+            if not self.knows(ref):
+                unresolved += 1
+                continue
+            item_id, version = ref
+            values = self.values(item_id, self.resolve(item_id, version, entry.get('date')))
+            factor = entry.get('gram', 0) / 100
+            entry['ate'] = values['name']
+            for key in NUTRIENTS:
+                entry[key] = values[key] * factor
+            if 'micro' in values:
+                entry['micro'] = {key: value * factor for key, value in values['micro'].items()}
+        return unresolved
+
+    def _match(self, entry):
+        """ref of the version an unlinked ingredient entry was logged with, or None"""
+        item_id = self.ids_by_name.get(entry['ate'].lower())
+        if item_id is None:
+            return None
+        factor = entry.get('gram', 0) / 100
+        versions = self.items[item_id]['versions']
+        for version in range(len(versions) - 1, -1, -1):
+            values = versions[version]
+            if values['name'] == entry['ate'] and all(
+                    _same(entry.get(key, 0), values[key] * factor) for key in NUTRIENTS):
+                return [item_id, version]
+        return None
+
+    def compact(self, entries):
+        """Entries as they are written to journal.json.
+
+        Entries referencing a known version drop the values they can
+        resolve, all but the name and kcal. Ingredient entries logged before versions existed get a
+        ref when their values match a version of the ingredient, which is
+        also recorded on the entry passed in.
+        """
+        stored = []
+        for entry in entries:
+            ref = entry.get('ref')
+            if ref is None and 'ate' in entry and 'gram' in entry and 'pts' not in entry:
+                ref = self._match(entry)
+                if ref is not None:
+                    entry['ref'] = ref
+            if ref is not None and self.knows(ref):
+                entry = {k: v for k, v in entry.items() if k not in DERIVED}
+            stored.append(entry)
+        return stored
@@ -2,18 +2,32 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GObject
 import cairo
-import json
-import os
-import sys
-from datetime import datetime
-from collections import OrderedDict
+from datetime import date
 import statistics
 from math import pi
+from .core.aggregation import process_cost_data
+from .core.profiler import timed
+from .core.storage import get_db_dir, load_journal
+from .downsample import lttb, minmax_buckets
+from .hit_test import bar_at, nearest_point
+from .jobs import jobs
+from .label_cache import LabelCache
+from .viewport import DateViewport, ViewportControls, mean_over
 
-class CostsGraph(Gtk.DrawingArea):
+class CostsGraph(ViewportControls, Gtk.DrawingArea):
     def __init__(self, costs_data, journal_data):
         super().__init__()
         self.costs_data = costs_data
+        self.dates = sorted(costs_data.keys())
+        self.daily_costs = [costs_data[d] for d in self.dates]
+        window_size = 7
+        self.moving_avg = [
+            sum(self.daily_costs[max(0,i-window_size//2):min(len(self.daily_costs),i+window_size//2+1)])/ 
+            len(self.daily_costs[max(0,i-window_size//2):min(len(self.daily_costs),i+window_size//2+1)])
+            for i in range(len(self.daily_costs))
+        ]
+        self.viewport = DateViewport([date.fromisoformat(d).toordinal() for d in self.dates])
+        self.label_cache = LabelCache()
         self.set_hexpand(True)
         self.set_vexpand(True)
         self.connect("draw", self.on_draw)
@@ -23,13 +37,17 @@ class CostsGraph(Gtk.DrawingArea):
         self.connect("motion-notify-event", self.on_motion_notify)
         self.connect("leave-notify-event", self.on_leave_notify)
         self.hover_point = None
+        self._sample_key = None
+        self.connect_viewport_controls()
 
+    @timed()
     def on_draw(self, widget, cr):
-        width, height = widget.get_allocated_width(), widget.get_allocated_height()
         style_context = widget.get_style_context()
-        bg_color = style_context.get_background_color(Gtk.StateFlags.NORMAL)
-        text_color = style_context.get_color(Gtk.StateFlags.NORMAL)
-        
+        self.render(cr, widget.get_allocated_width(), widget.get_allocated_height(),
+                    style_context.get_background_color(Gtk.StateFlags.NORMAL),
+                    style_context.get_color(Gtk.StateFlags.NORMAL))
+
+    def render(self, cr, width, height, bg_color, text_color):
         cr.set_source_rgba(bg_color.red, bg_color.green, bg_color.blue, bg_color.alpha)
         cr.rectangle(0, 0, width, height)
         cr.fill()
@@ -38,20 +56,23 @@ class CostsGraph(Gtk.DrawingArea):
             self._draw_no_data(cr, width, height, text_color)
             return
         
-        dates = sorted(self.costs_data.keys())
-        daily_costs = [self.costs_data[d] for d in dates]
-        window_size = 7
-        moving_avg = [
-            sum(daily_costs[max(0,i-window_size//2):min(len(daily_costs),i+window_size//2+1)])/ 
-            len(daily_costs[max(0,i-window_size//2):min(len(daily_costs),i+window_size//2+1)])
-            for i in range(len(daily_costs))
-        ]
+        groups = self.viewport.groups()
+        if not groups:
+            self.graph_groups, self.bar_rects, self.avg_points = [], [], []
+            self.bar_lefts, self.bar_widths, self.avg_xs, self.avg_ys = [], [], [], []
+            self._draw_no_data(cr, width, height, text_color, "No cost data in this range")
+            return
+        
+        # Zoomed out past single days a bar is the average cost of its days
+        daily_costs = mean_over(self.daily_costs, groups)
+        moving_avg = mean_over(self.moving_avg, groups)
         
         left_margin, right_margin = 60, 60
         top_margin, bottom_margin = 80, 60
         graph_width = max(width - left_margin - right_margin, 1)
         graph_height = max(height - top_margin - bottom_margin, 1)
-        max_cost = max(daily_costs) * 1.1
+        max_cost = max(max(daily_costs), max(moving_avg)) * 1.1 or 1
+        self.graph_left, self.graph_width = left_margin, graph_width
         
         cr.set_source_rgba(*self._get_rgba(text_color))
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
@@ -62,21 +83,21 @@ class CostsGraph(Gtk.DrawingArea):
                                top_margin, bottom_margin, graph_height, max_cost, text_color)
         
         self._draw_x_labels(cr, width, height, left_margin, bottom_margin, 
-                          graph_width, dates, text_color)
+                          graph_width, groups, text_color)
         
         self._draw_bars_and_average(cr, width, height, left_margin, bottom_margin,
-                                  graph_width, graph_height, max_cost, dates, 
+                                  graph_width, graph_height, max_cost, groups, 
                                   daily_costs, moving_avg)
         
         self._draw_horizontal_legend(cr, width, text_color)
         
-        self.graph_dates, self.graph_costs, self.graph_avg = dates, daily_costs, moving_avg
+        self.graph_groups, self.graph_costs, self.graph_avg = groups, daily_costs, moving_avg
 
-    def _draw_no_data(self, cr, width, height, text_color):
+    def _draw_no_data(self, cr, width, height, text_color, text="No cost data available"):
         cr.set_source_rgba(*self._get_rgba(text_color))
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
         cr.set_font_size(14)
-        self._draw_centered_text(cr, "No cost data available", width/2, height/2)
+        self._draw_centered_text(cr, text, width/2, height/2)
 
     def _draw_axes_and_grid(self, cr, width, height, left_margin, right_margin,
                           top_margin, bottom_margin, graph_height, max_value, text_color):
@@ -108,41 +129,58 @@ class CostsGraph(Gtk.DrawingArea):
             cr.set_source_rgba(*self._get_rgba(text_color))
 
     def _draw_x_labels(self, cr, width, height, left_margin, bottom_margin, 
-                     graph_width, dates, text_color):
+                     graph_width, groups, text_color):
         cr.set_font_size(10)
-        num_dates = len(dates)
+        num_dates = len(groups)
         step = max(1, num_dates // 10)
         
         for i in range(0, num_dates, step):
-            date_str = dates[i]
-            try:
-                label = datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %d")
-            except:
-                label = date_str
-            
+            label = self.viewport.label(groups[i])
             x_pos = left_margin + (i * graph_width / max(num_dates - 1, 1))
-            extents = cr.text_extents(label)
+            extents = self.label_cache.text_extents(cr, label)
             cr.move_to(x_pos - extents.width/2, height - bottom_margin + extents.height + 5)
             cr.show_text(label)
 
     def _draw_bars_and_average(self, cr, width, height, left_margin, bottom_margin,
-                             graph_width, graph_height, max_value, dates, 
+                             graph_width, graph_height, max_value, groups, 
                              daily_costs, moving_avg):
-        num_dates = len(dates)
-        bar_width = min(30, graph_width / num_dates) if num_dates > 1 else 40
-        bar_spacing = (graph_width - (num_dates * bar_width)) / max(num_dates - 1, 1)
+        num_dates = len(groups)
+        buckets, avg_indices = self._sampled(daily_costs, moving_avg, graph_width)
+        
+        if len(buckets) < num_dates:
+            # More days than room for bars: one bucket per slot, drawn as its
+            # max day with the min day as a solid core
+            bucketed = True
+            bar_specs = [(start, end, min_idx, max_idx, left_margin + start * graph_width / num_dates,
+                          (end - start) * graph_width / num_dates) for start, end, min_idx, max_idx in buckets]
+        else:
+            bucketed = False
+            bar_width = min(30, graph_width / num_dates) if num_dates > 1 else 40
+            bar_spacing = (graph_width - (num_dates * bar_width)) / max(num_dates - 1, 1)
+            bar_specs = []
+            for i in range(num_dates):
+                x_pos = left_margin + (i * (bar_width + bar_spacing)) + (bar_width / 2) if num_dates > 1 else left_margin + graph_width / 2
+                bar_specs.append((i, i + 1, i, i, x_pos - bar_width/2, bar_width))
         
         self.bar_rects = []
-        for i, cost in enumerate(daily_costs):
-            x_pos = left_margin + (i * (bar_width + bar_spacing)) + (bar_width / 2) if num_dates > 1 else left_margin + graph_width / 2
-            bar_height = (cost / max_value) * graph_height
-            rect = (x_pos - bar_width/2, height - bottom_margin - bar_height, bar_width, bar_height)
-            self.bar_rects.append(rect)
+        for start, end, min_idx, max_idx, x0, w in bar_specs:
+            bar_height = (daily_costs[max_idx] / max_value) * graph_height
+            rect = (x0, height - bottom_margin - bar_height, w, bar_height)
+            self.bar_rects.append((rect, max_idx))
             
-            is_hovered = (hasattr(self, 'hover_point') and self.hover_point is not None and self.hover_point == i)
-            cr.set_source_rgba(0.2, 0.8, 0.4, 1.0 if not is_hovered else 0.8)
-            cr.rectangle(*rect)
-            cr.fill()
+            is_hovered = self.hover_point is not None and start <= self.hover_point < end
+            if bucketed:
+                cr.set_source_rgba(0.2, 0.8, 0.4, 0.5)
+                cr.rectangle(*rect)
+                cr.fill()
+                min_height = (daily_costs[min_idx] / max_value) * graph_height
+                cr.set_source_rgba(0.2, 0.8, 0.4, 1.0)
+                cr.rectangle(x0, height - bottom_margin - min_height, w, min_height)
+                cr.fill()
+            else:
+                cr.set_source_rgba(0.2, 0.8, 0.4, 1.0 if not is_hovered else 0.8)
+                cr.rectangle(*rect)
+                cr.fill()
             
             if is_hovered:
                 cr.set_source_rgba(1, 1, 1, 0.8)
@@ -154,27 +192,48 @@ class CostsGraph(Gtk.DrawingArea):
         cr.set_source_rgba(1.0, 0.5, 0.0, 1.0)
         cr.set_line_width(2)
         
-        for i, avg in enumerate(moving_avg):
+        for n, i in enumerate(avg_indices):
             x_pos = left_margin + (i * graph_width / max(num_dates - 1, 1))
-            y_pos = height - bottom_margin - ((avg / max_value) * graph_height)
-            self.avg_points.append((x_pos, y_pos))
-            cr.line_to(x_pos, y_pos) if i else cr.move_to(x_pos, y_pos)
+            y_pos = height - bottom_margin - ((moving_avg[i] / max_value) * graph_height)
+            self.avg_points.append((x_pos, y_pos, i))
+            cr.line_to(x_pos, y_pos) if n else cr.move_to(x_pos, y_pos)
         
         cr.stroke()
         
+        # Bars and average points are laid out left to right, so hovers
+        # can bisect on x
+        self.bar_lefts = [rect[0] for rect, i in self.bar_rects]
+        self.bar_widths = [rect[2] for rect, i in self.bar_rects]
+        self.avg_xs = [x for x, y, i in self.avg_points]
+        self.avg_ys = [y for x, y, i in self.avg_points]
+        
         point_radius = 3
-        for i, (x_pos, y_pos) in enumerate(self.avg_points):
-            is_hovered = (hasattr(self, 'hover_point') and self.hover_point is not None and self.hover_point == i)
-            
+        if not bucketed:
+            for x_pos, y_pos, i in self.avg_points:
+                cr.set_source_rgba(1.0, 0.5, 0.0, 1.0)
+                cr.arc(x_pos, y_pos, point_radius, 0, 2 * pi)
+                cr.fill()
+        
+        if self.hover_point is not None and self.hover_point < num_dates:
+            x_pos = left_margin + (self.hover_point * graph_width / max(num_dates - 1, 1))
+            y_pos = height - bottom_margin - ((moving_avg[self.hover_point] / max_value) * graph_height)
             cr.set_source_rgba(1.0, 0.5, 0.0, 1.0)
-            cr.arc(x_pos, y_pos, point_radius + (2 if is_hovered else 0), 0, 2 * pi)
+            cr.arc(x_pos, y_pos, point_radius + 2, 0, 2 * pi)
             cr.fill()
-            
-            if is_hovered:
-                cr.set_source_rgba(1, 1, 1, 0.8)
-                cr.set_line_width(1.5)
-                cr.arc(x_pos, y_pos, point_radius + 2, 0, 2 * pi)
-                cr.stroke()
+            cr.set_source_rgba(1, 1, 1, 0.8)
+            cr.set_line_width(1.5)
+            cr.arc(x_pos, y_pos, point_radius + 2, 0, 2 * pi)
+            cr.stroke()
+
+    def _sampled(self, daily_costs, moving_avg, graph_width):
+        # Bars are bucketed to 2px slots, the average line to about one
+        # vertex per pixel; only redone on resize or zoom
+        key = (int(graph_width), self.viewport.start, self.viewport.end)
+        if self._sample_key != key:
+            self._sample_key = key
+            self._sample_buckets = minmax_buckets(daily_costs, max(1, int(graph_width) // 2))
+            self._sample_avg_indices = lttb(moving_avg, int(graph_width))
+        return self._sample_buckets, self._sample_avg_indices
 
     def _draw_horizontal_legend(self, cr, width, text_color):
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
@@ -237,23 +296,27 @@ class CostsGraph(Gtk.DrawingArea):
         cr.show_text(text)
 
     def on_motion_notify(self, widget, event):
-        if not hasattr(self, 'bar_rects') or not hasattr(self, 'avg_points'):
+        if self.drag_motion(event):
+            return True
+        if not hasattr(self, 'bar_lefts'):
             return False
         
-        for i, (x, y, w, h) in enumerate(self.bar_rects):
-            if (x <= event.x <= x + w and y <= event.y <= y + h):
+        bar = bar_at(self.bar_lefts, self.bar_widths, event.x)
+        if bar is not None:
+            (x, y, w, h), i = self.bar_rects[bar]
+            if y <= event.y <= y + h:
                 if i != self.hover_point:
                     self.hover_point = i
                     self.queue_draw()
                 return True
         
-        min_dist = 10
-        for i, (x_pos, y_pos) in enumerate(self.avg_points):
-            if ((x_pos - event.x) ** 2 + (y_pos - event.y) ** 2) ** 0.5 < min_dist:
-                if i != self.hover_point:
-                    self.hover_point = i
-                    self.queue_draw()
-                return True
+        nearest = nearest_point(self.avg_xs, self.avg_ys, event.x, event.y, 10)
+        if nearest is not None:
+            i = self.avg_points[nearest][2]
+            if i != self.hover_point:
+                self.hover_point = i
+                self.queue_draw()
+            return True
         
         if self.hover_point is not None:
             self.hover_point = None
@@ -266,60 +329,35 @@ class CostsGraph(Gtk.DrawingArea):
             self.queue_draw()
     
     def on_query_tooltip(self, widget, x, y, keyboard_mode, tooltip):
-        if not hasattr(self, 'graph_dates') or not hasattr(self, 'hover_point') or self.hover_point is None:
+        if not hasattr(self, 'graph_groups') or not hasattr(self, 'hover_point') or self.hover_point is None:
             return False
         
-        date = self.graph_dates[self.hover_point]
+        group = self.graph_groups[self.hover_point]
         cost = self.graph_costs[self.hover_point]
         avg = self.graph_avg[self.hover_point]
+        days = group[1] - group[0]
         
-        try:
-            date_str = datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
-        except:
-            date_str = date
+        date_str = self.viewport.label(group, long=True)
+        if days > 1:
+            date_str += f" (avg of {days} days)"
         
         tooltip.set_markup(f"<b>{date_str}</b>\nDaily Cost: {cost:.2f}\n7-day Avg: {avg:.2f}")
         return True
 
+def prepare_cost_data(db_dir):
+    """Worker-thread job: load a private journal copy and aggregate it"""
+    journal_data = load_journal(db_dir)
+    return journal_data, process_cost_data(journal_data)
+
 class CostsTab(Gtk.Box):
     def __init__(self, window_width, window_height):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         self.set_border_width(10)
-        self.db_dir = self._get_db_dir()
-        self.journal_data = self._load_journal_data()
-        self.daily_costs = self._process_cost_data()
+        self.db_dir = get_db_dir()
+        self.journal_data = []
+        self.daily_costs = None
         self.create_cost_plots()
-
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
-    def _load_journal_data(self):
-        try:
-            journal_path = os.path.join(self.db_dir, 'journal.json')
-            if os.path.exists(journal_path):
-                with open(journal_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('entries', []) if isinstance(data, dict) else data
-        except Exception as e:
-            print(f"Error loading journal data: {e}")
-        return []
-
-    def _process_cost_data(self):
-        daily_costs = OrderedDict()
-        for entry in self.journal_data:
-            if isinstance(entry, dict) and 'date' in entry and 'cost' in entry:
-                date = entry['date']
-                daily_costs[date] = daily_costs.get(date, 0.0) + entry.get('cost', 0)
-        return daily_costs
+        self.update_cost_plots()
 
     def create_cost_plots(self):
         scrolled = Gtk.ScrolledWindow()
@@ -327,7 +365,11 @@ class CostsTab(Gtk.Box):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         scrolled.add(box)
         
-        if not self.daily_costs:
+        if self.daily_costs is None:
+            spinner = Gtk.Spinner()
+            spinner.start()
+            box.pack_start(spinner, True, True, 0)
+        elif not self.daily_costs:
             box.pack_start(Gtk.Label(label="No cost data available"), True, True, 0)
         else:
             box.pack_start(CostsGraph(self.daily_costs, self.journal_data), True, True, 0)
@@ -335,6 +377,16 @@ class CostsTab(Gtk.Box):
         
         self.pack_start(scrolled, True, True, 0)
 
+    def update_cost_plots(self):
+        jobs.submit('costs', prepare_cost_data, self.db_dir, on_done=self._on_cost_data)
+
+    def _on_cost_data(self, result):
+        self.journal_data, self.daily_costs = result
+        for child in self.get_children():
+            self.remove(child)
+        self.create_cost_plots()
+        self.show_all()
+
     def _create_summary_stats(self):
         stats_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=20)
         stats_box.set_homogeneous(True)
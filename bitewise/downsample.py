@@ -0,0 +1,65 @@
+def lttb(values, threshold):
+    """Largest-Triangle-Three-Buckets: indices of the points worth plotting.
+
+    The series is treated as evenly spaced on x, which is how every graph
+    lays out its days. The first and last index are always kept.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    indices = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(values[next_start:next_end]) / span if span > 0 else values[-1]
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = a, values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (values[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best_area, best = area, j
+        indices.append(best)
+        a = best
+
+    indices.append(n - 1)
+    return indices
+
+def lttb_union(series, threshold):
+    """Sorted union of the LTTB picks of several series sharing one x axis."""
+    keep = set()
+    for values in series:
+        keep.update(lttb(values, threshold))
+    return sorted(keep)
+
+def minmax_buckets(values, max_buckets):
+    """Split values into at most max_buckets contiguous buckets.
+
+    Returns (start, end, min_index, max_index) tuples, end exclusive. With
+    fewer values than buckets every value gets a bucket of its own.
+    """
+    n = len(values)
+    if n == 0:
+        return []
+    count = max(1, min(n, int(max_buckets)))
+    buckets = []
+    for b in range(count):
+        start = b * n // count
+        end = (b + 1) * n // count
+        min_idx = max_idx = start
+        for j in range(start + 1, end):
+            if values[j] < values[min_idx]:
+                min_idx = j
+            if values[j] > values[max_idx]:
+                max_idx = j
+        buckets.append((start, end, min_idx, max_idx))
+    return buckets
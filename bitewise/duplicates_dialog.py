@@ -0,0 +1,144 @@
+import gi
+import threading
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+from .core.duplicates import find_duplicates, reference_counts
+from .core.storage import load_journal, load_recipes
+
+# Store columns
+MERGE, KEEP, NAME, VALUES, USES, IS_MEMBER = range(6)
+
+class DuplicatesDialog(Gtk.Dialog):
+    """Review of the near-duplicate ingredient groups find_duplicates() reports.
+
+    The search runs on a worker thread. Each group lists its names with
+    the one to keep selected and the others ticked for merging; after an
+    OK response, merges() returns what was chosen.
+    """
+    def __init__(self, parent, db_dir, ingredients):
+        super().__init__(title="Duplicate Ingredients", transient_for=parent, modal=True)
+        self.set_default_size(700, 500)
+        self.db_dir = db_dir
+        self.closed = False
+
+        content_area = self.get_content_area()
+        content_area.set_spacing(10)
+        content_area.set_border_width(10)
+
+        self.status_label = Gtk.Label(label="Looking for duplicates...")
+        self.status_label.set_xalign(0)
+        content_area.pack_start(self.status_label, False, False, 0)
+
+        self.store = Gtk.TreeStore(bool, bool, str, str, str, bool)
+        self.tree = Gtk.TreeView(model=self.store)
+
+        renderer = Gtk.CellRendererToggle()
+        renderer.connect("toggled", self.on_merge_toggled)
+        column = Gtk.TreeViewColumn("Merge", renderer, active=MERGE, visible=IS_MEMBER)
+        self.tree.append_column(column)
+
+        renderer = Gtk.CellRendererToggle()
+        renderer.set_radio(True)
+        renderer.connect("toggled", self.on_keep_toggled)
+        column = Gtk.TreeViewColumn("Keep", renderer, active=KEEP, visible=IS_MEMBER)
+        self.tree.append_column(column)
+
+        for title, index in [("Ingredient", NAME), ("Kcal / carbs / fat / protein", VALUES), ("Uses", USES)]:
+            renderer = Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, renderer, text=index)
+            column.set_resizable(True)
+            column.set_expand(index == NAME)
+            self.tree.append_column(column)
+
+        scrolled_window = Gtk.ScrolledWindow()
+        scrolled_window.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scrolled_window.add(self.tree)
+        frame = Gtk.Frame()
+        frame.add(scrolled_window)
+        content_area.pack_start(frame, True, True, 0)
+
+        self.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        self.add_button("Merge", Gtk.ResponseType.OK)
+        self.set_response_sensitive(Gtk.ResponseType.OK, False)
+        self.connect("response", self.on_response)
+        self.show_all()
+
+        threading.Thread(target=self._search, args=(ingredients,), daemon=True).start()
+
+    def on_response(self, dialog, response):
+        self.closed = True
+
+    def _search(self, ingredients):
+        groups = usage = error = None
+        try:
+            usage = reference_counts(load_recipes(self.db_dir), load_journal(self.db_dir))
+            groups = find_duplicates(ingredients, usage)
+        except Exception as e:
+            error = e
+        GLib.idle_add(self._show_groups, ingredients, groups, usage, error)
+
+    def _show_groups(self, ingredients, groups, usage, error):
+        if self.closed:
+            return False
+        if error is not None:
+            self.status_label.set_text(f"Error looking for duplicates: {error}")
+            return False
+        if not groups:
+            self.status_label.set_text("No duplicate ingredients found")
+            return False
+
+        by_name = {i['name']: i for i in ingredients}
+        self.tree.set_model(None)
+        for group in groups:
+            parent = self.store.append(None, [False, False, f"{group[0]} ({len(group)} names)", "", "", False])
+            for position, name in enumerate(group):
+                i = by_name[name]
+                values = f"{i.get('kcal', 0):.0f} / {i.get('carbs', 0):.1f} / {i.get('fat', 0):.1f} / {i.get('protein', 0):.1f}"
+                keep = position == 0
+                self.store.append(parent, [not keep, keep, name, values, str(usage.get(name.lower(), 0)), True])
+        self.tree.set_model(self.store)
+        self.tree.expand_all()
+
+        merged = sum(len(group) - 1 for group in groups)
+        self.status_label.set_text(
+            f"{len(groups)} groups of similar ingredients; ticked names are merged into the kept one, "
+            f"{merged} in all")
+        self.set_response_sensitive(Gtk.ResponseType.OK, True)
+        return False
+
+    def on_merge_toggled(self, renderer, path):
+        row = self.store[path]
+        if not row[KEEP]:
+            row[MERGE] = not row[MERGE]
+
+    def on_keep_toggled(self, renderer, path):
+        treeiter = self.store.get_iter(path)
+        child = self.store.iter_children(self.store.iter_parent(treeiter))
+        while child is not None:
+            keep = self.store.get_path(child) == self.store.get_path(treeiter)
+            was_kept = self.store[child][KEEP]
+            self.store[child][KEEP] = keep
+            if keep:
+                self.store[child][MERGE] = False
+            elif was_kept:
+                self.store[child][MERGE] = True
+            child = self.store.iter_next(child)
+
+    def merges(self):
+        """{name to keep: [names merged into it]} for the ticked rows"""
+        merges = {}
+        group = self.store.get_iter_first()
+        while group is not None:
+            keep, merged = None, []
+            child = self.store.iter_children(group)
+            while child is not None:
+                row = self.store[child]
+                if row[KEEP]:
+                    keep = row[NAME]
+                elif row[MERGE]:
+                    merged.append(row[NAME])
+                child = self.store.iter_next(child)
+            if keep and merged:
+                merges[keep] = merged
+            group = self.store.iter_next(group)
+        return merges
@@ -0,0 +1,67 @@
+from bisect import bisect_left, bisect_right
+
+def nearest_point(xs, ys, x, y, radius):
+    """Position of the point closest to (x, y) within radius, or None.
+
+    xs must be sorted; only points whose x falls inside [x - radius,
+    x + radius] are looked at, found by bisection.
+    """
+    best, best_dist = None, radius * radius
+    for i in range(bisect_left(xs, x - radius), bisect_right(xs, x + radius)):
+        dist = (xs[i] - x) ** 2 + (ys[i] - y) ** 2
+        if dist < best_dist:
+            best, best_dist = i, dist
+    return best
+
+def nearest_in_series(xs, series, x, y, radius):
+    """Like nearest_point for several y series sharing the sorted xs.
+
+    Returns (series_position, point_position) or None.
+    """
+    best, best_dist = None, radius * radius
+    lo, hi = bisect_left(xs, x - radius), bisect_right(xs, x + radius)
+    for s, ys in enumerate(series):
+        for i in range(lo, hi):
+            dist = (xs[i] - x) ** 2 + (ys[i] - y) ** 2
+            if dist < best_dist:
+                best, best_dist = (s, i), dist
+    return best
+
+def bar_at(lefts, widths, x):
+    """Position of the bar whose [left, left + width] span holds x, or None.
+
+    lefts must be sorted and the bars must not overlap.
+    """
+    i = bisect_right(lefts, x) - 1
+    if i >= 0 and x <= lefts[i] + widths[i]:
+        return i
+    return None
+
+class CircleGrid:
+    """Uniform grid over circles for point hit-testing.
+
+    Each circle is filed under the cell holding its centre. With the cell
+    size at least as large as the biggest hit radius, a pointer can only
+    hit circles filed in its own cell or the eight around it.
+    """
+    def __init__(self, circles, slack=0):
+        self.slack = slack
+        self.cell = max([c['radius'] for c in circles] + [1]) + slack
+        self.cells = {}
+        for order, circle in enumerate(circles):
+            key = (int(circle['x'] // self.cell), int(circle['y'] // self.cell))
+            self.cells.setdefault(key, []).append((order, circle))
+
+    def hit(self, x, y):
+        """Smallest circle within radius + slack of (x, y); later circles win ties"""
+        cx, cy = int(x // self.cell), int(y // self.cell)
+        best, best_key = None, None
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for order, circle in self.cells.get((gx, gy), ()):
+                    reach = circle['radius'] + self.slack
+                    if (circle['x'] - x) ** 2 + (circle['y'] - y) ** 2 < reach * reach:
+                        key = (circle['radius'], -order)
+                        if best_key is None or key < best_key:
+                            best, best_key = circle, key
+        return best
@@ -0,0 +1,182 @@
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import GObject, Gtk
+from .core import nutrients
+from .core.ingredient_table import IngredientTable
+from .core.models import NUTRIENTS
+from .core.rankings import METRICS
+
+class IngredientTableModel(GObject.GObject, Gtk.TreeModel):
+    """Flat tree model over an IngredientTable that formats cells on demand.
+
+    GTK asks for values only for rows it draws, so nothing is copied into
+    the model up front. Sorting and filtering build a list of table rows
+    (self.visible) from the table's cached orders and a set of matching
+    names. When the same rows stay visible, a new order is one
+    rows-reordered signal and edits are row-changed for the rows on
+    screen, so the view keeps its scroll position and selection; when the
+    set of rows changes, the model is detached from its view while the
+    list changes, which is cheaper than signalling every inserted or
+    deleted row.
+    Columns are 'name' followed by the nutrient or ranking keys shown;
+    rankings an ingredient has no figure for are left blank.
+    """
+    def __init__(self, table=None, keys=None):
+        super().__init__()
+        self.table = table if table is not None else IngredientTable()
+        self._set_keys(keys or NUTRIENTS)
+        self.sort_column = 0
+        self.descending = False
+        self.matches = None
+        self.stamp = 0
+        self.view = None
+        self.visible = self._visible_rows()
+
+    def attach(self, view):
+        self.view = view
+        view.set_model(self)
+
+    def row_id(self, path):
+        """Table row shown at path"""
+        return self.visible[path.get_indices()[0]]
+
+    def set_table(self, table):
+        self.table = table
+        self._reattach()
+
+    def _set_keys(self, keys):
+        self.columns = ['name'] + list(keys)
+        self.formats = ["{}"] + [METRICS[key].format if key in METRICS else nutrients.get(key).format
+                                 for key in keys]
+
+    def set_columns(self, keys):
+        """Show these nutrient keys after the name; sorting falls back to the name if its column went"""
+        sorted_by = self.columns[self.sort_column]
+        self._set_keys(keys)
+        if sorted_by in self.columns:
+            self.sort_column = self.columns.index(sorted_by)
+        else:
+            self.sort_column = 0
+            self.descending = False
+        # A view only picks up a new column count from a newly set model
+        self._reattach()
+
+    def set_sort(self, column, descending):
+        self.sort_column = column
+        self.descending = descending
+        self.refresh()
+
+    def set_filter(self, names):
+        """Show only rows whose name is in names; None shows every row"""
+        if names is None and self.matches is None:
+            return
+        self.matches = names
+        self.refresh()
+
+    def refresh(self):
+        """Update the view after the table's values, the sort or the filter changed"""
+        visible = self._visible_rows()
+        old = self.visible
+        if self.view is None or len(visible) != len(old) or set(visible) != set(old):
+            self._reattach(visible)
+            return
+        if visible != old:
+            positions = {row: position for position, row in enumerate(old)}
+            self.visible = visible
+            self._new_stamp()
+            # new_order[new position] = old position
+            self.rows_reordered(Gtk.TreePath(), None, [positions[row] for row in visible])
+        # Rows off screen are formatted afresh when GTK next draws them
+        visible_range = self.view.get_visible_range()
+        if visible_range:
+            start, end = visible_range[-2:]
+            for position in range(start.get_indices()[0], end.get_indices()[0] + 1):
+                self.row_changed(Gtk.TreePath([position]), self._iter(position))
+
+    def _reattach(self, visible=None):
+        """Rebuild the visible rows with the model detached from its view"""
+        if self.view:
+            self.view.set_model(None)
+        self.visible = self._visible_rows() if visible is None else visible
+        self._new_stamp()
+        if self.view:
+            self.view.set_model(self)
+
+    def _visible_rows(self):
+        order = self.table.order(self.columns[self.sort_column], self.descending)
+        if self.matches is None:
+            return order
+        names = self.table.names
+        return [row for row in order if names[row] in self.matches]
+
+    def _new_stamp(self):
+        # Iterators handed out before this point no longer refer to the same rows
+        self.stamp = (self.stamp + 1) & 0x7fffffff
+
+    def _iter(self, position):
+        treeiter = Gtk.TreeIter()
+        treeiter.stamp = self.stamp
+        # Stored one-based: a zero user_data reads back as None
+        treeiter.user_data = position + 1
+        return treeiter
+
+    def _position(self, treeiter):
+        return treeiter.user_data - 1
+
+    def do_get_flags(self):
+        return Gtk.TreeModelFlags.LIST_ONLY | Gtk.TreeModelFlags.ITERS_PERSIST
+
+    def do_get_n_columns(self):
+        return len(self.columns)
+
+    def do_get_column_type(self, index):
+        return str
+
+    def do_get_iter(self, path):
+        indices = path.get_indices()
+        if len(indices) == 1 and 0 <= indices[0] < len(self.visible):
+            return True, self._iter(indices[0])
+        return False, None
+
+    def do_get_path(self, treeiter):
+        return Gtk.TreePath([self._position(treeiter)])
+
+    def do_get_value(self, treeiter, column):
+        row = self.visible[self._position(treeiter)]
+        if column == 0:
+            return self.table.names[row]
+        value = self.table.value(row, self.columns[column])
+        return self.formats[column].format(value) if value == value else ""
+
+    def do_iter_next(self, treeiter):
+        position = self._position(treeiter) + 1
+        if position < len(self.visible):
+            treeiter.user_data = position + 1
+            return True, treeiter
+        return False, None
+
+    def do_iter_previous(self, treeiter):
+        position = self._position(treeiter) - 1
+        if position >= 0:
+            treeiter.user_data = position + 1
+            return True, treeiter
+        return False, None
+
+    def do_iter_children(self, parent):
+        if parent is None and self.visible:
+            return True, self._iter(0)
+        return False, None
+
+    def do_iter_has_child(self, treeiter):
+        return False
+
+    def do_iter_n_children(self, treeiter):
+        return len(self.visible) if treeiter is None else 0
+
+    def do_iter_nth_child(self, parent, n):
+        if parent is None and 0 <= n < len(self.visible):
+            return True, self._iter(n)
+        return False, None
+
+    def do_iter_parent(self, child):
+        return False, None
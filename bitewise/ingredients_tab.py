@@ -0,0 +1,791 @@
+import gi
+import os
+import threading
+from datetime import datetime
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, Gdk, GLib
+from .barcode_dialog import BarcodeDialog
+from .bulk_edit_dialog import BulkEditDialog
+from .columns_dialog import ColumnsDialog
+from .duplicates_dialog import DuplicatesDialog
+from .core import nutrients
+from .core.bulk_edit import apply_corrections, read_corrections, scale_field, set_field
+from .core.duplicates import merge_duplicates
+from .core.fdc_import import ImportCancelled, import_fdc
+from .core.ingredient_table import IngredientTable
+from .core.models import NUTRIENTS, apply_ingredient_updates
+from .core.rankings import METRICS
+from .core.search_index import shared_index
+from .core.storage import (get_db_dir, load_ingredients, load_journal, load_recipes, load_settings,
+                           load_versions, save_ingredients, save_journal, save_recipes, save_versions)
+from .ingredient_model import IngredientTableModel
+from .name_filter import FilterDebounce
+from .rankings_dialog import RankingsDialog
+
+class FdcImportDialog(Gtk.Dialog):
+    """Progress of a FoodData Central import running on a worker thread.
+
+    The worker parses the CSV files, saves ingredients.json and builds the
+    new IngredientTable; on_done(table, stats) then runs on the main loop.
+    """
+    def __init__(self, parent, fdc_dir, db_dir, on_done):
+        super().__init__(title="Import FoodData Central", transient_for=parent, modal=True)
+        self.set_default_size(420, -1)
+        self.fdc_dir = fdc_dir
+        self.db_dir = db_dir
+        self.on_done = on_done
+        self.cancelled = False
+
+        content_area = self.get_content_area()
+        content_area.set_spacing(10)
+        content_area.set_border_width(10)
+        self.status_label = Gtk.Label(label="Starting import...")
+        self.status_label.set_xalign(0)
+        content_area.pack_start(self.status_label, False, False, 0)
+        self.progress_bar = Gtk.ProgressBar()
+        self.progress_bar.set_show_text(True)
+        content_area.pack_start(self.progress_bar, False, False, 0)
+
+        self.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        self.connect("response", self.on_response)
+        self.show_all()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def on_response(self, dialog, response):
+        # The dialog stays up until the worker has stopped
+        self.cancelled = True
+        self.status_label.set_text("Cancelling...")
+        self.set_response_sensitive(Gtk.ResponseType.CANCEL, False)
+
+    def _run(self):
+        table = stats = error = None
+        try:
+            ingredients = load_ingredients(self.db_dir)
+            records, stats = import_fdc(self.fdc_dir, [i['name'] for i in ingredients],
+                                        progress=self._report, cancelled=lambda: self.cancelled)
+            if records:
+                GLib.idle_add(self._show_progress, 1.0, f"Saving {len(records)} new ingredients...")
+                ingredients.extend(records)
+                save_ingredients(self.db_dir, ingredients)
+                table = IngredientTable(ingredients)
+        except ImportCancelled:
+            stats = None
+        except Exception as e:
+            error = e
+        GLib.idle_add(self._finish, table, stats, error)
+
+    def _report(self, fraction, text):
+        GLib.idle_add(self._show_progress, fraction, text)
+
+    def _show_progress(self, fraction, text):
+        if not self.cancelled:
+            self.status_label.set_text(text)
+        self.progress_bar.set_fraction(fraction)
+        return False
+
+    def _finish(self, table, stats, error):
+        self.destroy()
+        self.on_done(table, stats, error)
+        return False
+
+class IngredientsTab(Gtk.Box):
+    def __init__(self, window_width, window_height, recipes_tab=None, journal_tab=None):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        self.set_border_width(10)
+        self.recipes_tab = recipes_tab
+        self.journal_tab = journal_tab
+        
+        self.db_dir = get_db_dir()
+        self.table = IngredientTable(self._load_ingredients())
+        keys = nutrients.visible_columns(load_settings(self.db_dir), 'ingredients', METRICS)
+        self.ingredients_model = IngredientTableModel(self.table, keys)
+
+        self.filter_entry = Gtk.SearchEntry(placeholder_text="Filter ingredients...")
+        self.filter_debounce = FilterDebounce(self.filter_entry, self.on_filter_changed)
+        self.pack_start(self.filter_entry, False, False, 0)
+
+        # Fixed height mode lets the view size rows without asking the model
+        # for all of them, so only rows scrolled into view are formatted
+        self.ingredients_tree = Gtk.TreeView()
+        self.column_proportions = []
+        self.ingredients_tree.connect("size-allocate", self._update_column_widths)
+        self._create_columns(keys)
+        self.ingredients_tree.set_fixed_height_mode(True)
+        self.ingredients_model.attach(self.ingredients_tree)
+
+        self.ingredients_tree.get_selection().set_mode(Gtk.SelectionMode.MULTIPLE)
+
+        scrolled_window = Gtk.ScrolledWindow()
+        scrolled_window.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scrolled_window.add(self.ingredients_tree)
+
+        frame = Gtk.Frame()
+        frame.add(scrolled_window)
+        self.pack_start(frame, True, True, 0)
+
+        button_box = Gtk.Box(spacing=0)
+        button_box.set_margin_top(0)
+        self.pack_start(button_box, False, False, 0)
+
+        self.remove_button = Gtk.Button(label="Remove ingredient")
+        self.remove_button.set_margin_end(5)
+        self.remove_button.connect("clicked", self.on_remove_clicked)
+        button_box.pack_start(self.remove_button, False, False, 0)
+
+        # Add spacer to push right buttons to the right
+        button_box.pack_start(Gtk.Box(), True, True, 0)
+
+        self.import_button = Gtk.Button(label="Import USDA foods")
+        self.import_button.set_margin_start(5)
+        self.import_button.set_tooltip_text("Add foods from a FoodData Central CSV download (food.csv and food_nutrient.csv)")
+        self.import_button.connect("clicked", self.on_import_clicked)
+        button_box.pack_start(self.import_button, False, False, 0)
+
+        self.barcode_button = Gtk.Button(label="Add by barcode")
+        self.barcode_button.set_margin_start(5)
+        self.barcode_button.set_tooltip_text("Look a product up in a local Open Food Facts dump")
+        self.barcode_button.connect("clicked", self.on_barcode_clicked)
+        button_box.pack_start(self.barcode_button, False, False, 0)
+
+        self.duplicates_button = Gtk.Button(label="Find duplicates")
+        self.duplicates_button.set_margin_start(5)
+        self.duplicates_button.set_tooltip_text("Review and merge ingredients that were entered more than once")
+        self.duplicates_button.connect("clicked", self.on_duplicates_clicked)
+        button_box.pack_start(self.duplicates_button, False, False, 0)
+
+        self.columns_button = Gtk.Button(label="Columns...")
+        self.columns_button.set_margin_start(5)
+        self.columns_button.set_tooltip_text("Choose the nutrients shown")
+        self.columns_button.connect("clicked", self.on_columns_clicked)
+        button_box.pack_start(self.columns_button, False, False, 0)
+
+        self.rankings_button = Gtk.Button(label="Rankings")
+        self.rankings_button.set_margin_start(5)
+        self.rankings_button.set_tooltip_text("Top ingredients by protein per kcal, cost per protein and more")
+        self.rankings_button.connect("clicked", self.on_rankings_clicked)
+        button_box.pack_start(self.rankings_button, False, False, 0)
+
+        self.add_button = Gtk.Button(label="Add ingredient")
+        self.add_button.set_margin_start(5)
+        self.add_button.connect("clicked", self.on_add_clicked)
+        button_box.pack_end(self.add_button, False, False, 0)
+
+        self.update_button = Gtk.Button(label="Update")
+        self.update_button.set_margin_end(5)
+        self.update_button.set_sensitive(False)
+        self.update_button.connect("clicked", self.on_update_clicked)
+        button_box.pack_end(self.update_button, False, False, 0)
+
+        self.bulk_button = Gtk.Button(label="Bulk edit")
+        self.bulk_button.set_margin_end(5)
+        self.bulk_button.set_tooltip_text("Scale or set a value for the selected ingredients, or apply a CSV of corrections")
+        self.bulk_button.connect("clicked", self.on_bulk_clicked)
+        button_box.pack_end(self.bulk_button, False, False, 0)
+
+        self.copy_button = Gtk.Button(label="Copy ingredients")
+        self.copy_button.set_margin_start(5)
+        self.copy_button.set_margin_end(10)
+        self.copy_button.set_sensitive(False)
+        self.copy_button.connect("clicked", self.on_copy_clicked)
+        button_box.pack_end(self.copy_button, False, False, 0)
+
+        self.ingredients_tree.get_selection().connect("changed", self.on_selection_changed)
+        self.ingredients_tree.connect("row-activated", self.on_row_activated)
+        self.ingredients_tree.connect("key-press-event", self.on_key_press)
+
+    def on_key_press(self, widget, event):
+        if event.keyval == Gdk.KEY_Delete:
+            self.on_remove_clicked(None)
+            return True
+        return False
+
+    def _load_ingredients(self):
+        return load_ingredients(self.db_dir)
+
+    def reload_ingredients(self):
+        self.table = IngredientTable(self._load_ingredients())
+        self.ingredients_model.set_table(self.table)
+
+    def on_filter_changed(self):
+        self.ingredients_model.set_filter(shared_index('ingredients').search(self.filter_entry.get_text()))
+
+    def on_row_activated(self, treeview, path, column):
+        self.on_update_clicked(None)
+
+    def on_selection_changed(self, selection):
+        model, paths = selection.get_selected_rows()
+        has_selection = len(paths) > 0
+        self.update_button.set_sensitive(has_selection)
+        self.copy_button.set_sensitive(has_selection)
+
+    def on_remove_clicked(self, widget):
+        selection = self.ingredients_tree.get_selection()
+        model, paths = selection.get_selected_rows()
+        
+        if not paths:
+            return
+            
+        rows = [model.row_id(path) for path in paths]
+        ingredient_names = [self.table.names[row] for row in rows]
+        
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_toplevel(),
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.YES_NO,
+            text=f"Remove {len(ingredient_names)} selected ingredients?",
+        )
+        dialog.format_secondary_text("\n".join(ingredient_names))
+        response = dialog.run()
+        dialog.destroy()
+        
+        if response == Gtk.ResponseType.YES:
+            self.table.remove(rows)
+            self.ingredients_model.refresh()
+            
+            self._save_ingredients()
+            if self.recipes_tab:
+                self.recipes_tab.reload_ingredients()
+            if self.journal_tab:
+                self.journal_tab.reload_ingredients()
+
+    def on_update_clicked(self, widget):
+        selection = self.ingredients_tree.get_selection()
+        model, paths = selection.get_selected_rows()
+        if paths and len(paths) == 1:
+            self._show_ingredient_dialog(
+                title="Update Ingredient",
+                values=self.table.row(model.row_id(paths[0])),
+                is_update=True
+            )
+
+    def on_add_clicked(self, widget):
+        self._show_ingredient_dialog(
+            title="Add New Ingredient",
+            values=[""] + [0.0] * 8,
+            is_update=False
+        )
+
+    def on_bulk_clicked(self, widget):
+        model, paths = self.ingredients_tree.get_selection().get_selected_rows()
+        rows = [model.row_id(path) for path in paths]
+        dialog = BulkEditDialog(self.get_toplevel(), len(rows))
+        response = dialog.run()
+        try:
+            if response != Gtk.ResponseType.OK:
+                return
+            kind, key, value = dialog.edit()
+            update_recipes = dialog.update_recipes_check.get_active()
+            update_journal = dialog.update_journal_check.get_active()
+            from_date = self._parse_date(dialog.journal_from_entry.get_text()) if update_journal else None
+            
+            changes = {}
+            not_found = 0
+            if kind == 'csv':
+                for name, values in read_corrections(key).items():
+                    row = self.table.find(name)
+                    if row is None:
+                        not_found += 1
+                    else:
+                        changes[row] = apply_corrections(self.table.record(row), values)
+            elif not rows:
+                # The button stays usable for CSV corrections, which need no selection
+                raise ValueError("Select the ingredients to change, or apply a CSV of corrections")
+            elif kind == 'scale':
+                changes = {row: scale_field(self.table.record(row), key, value) for row in rows}
+            else:
+                changes = {row: set_field(self.table.record(row), key, value) for row in rows}
+        except Exception as e:
+            self._show_error_dialog(dialog, "Error in bulk edit", str(e))
+            return
+        finally:
+            dialog.destroy()
+        
+        recipes_changed, entries_changed = self._apply_bulk(changes, update_recipes, update_journal, from_date)
+        
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_toplevel(),
+            flags=0,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK,
+            text=f"Updated {len(changes)} ingredients"
+        )
+        secondary = f"Updated {recipes_changed} recipes and {entries_changed} journal entries."
+        if not_found:
+            secondary += f" {not_found} names in the CSV were not found."
+        dialog.format_secondary_text(secondary)
+        dialog.run()
+        dialog.destroy()
+
+    def _apply_bulk(self, changes, update_recipes, update_journal, from_date):
+        """Store new records for many rows ({row: record}), then save each file once"""
+        if not changes:
+            return 0, 0
+        old_names = {row: self.table.names[row] for row in changes}
+        for row, record in changes.items():
+            self.table.update(row, record)
+        recipes_changed, entries_changed = self._update_references(
+            old_names, update_recipes, update_journal, from_date)
+        
+        self.ingredients_model.refresh()
+        self._save_ingredients()
+        if self.recipes_tab:
+            self.recipes_tab.reload_ingredients()
+        if self.journal_tab:
+            self.journal_tab.reload_ingredients()
+        return recipes_changed, entries_changed
+
+    def on_barcode_clicked(self, widget):
+        dialog = BarcodeDialog(self.get_toplevel(), self.db_dir)
+        response = dialog.run()
+        record = dialog.record
+        dialog.destroy()
+        
+        if response == Gtk.ResponseType.OK and record:
+            self._show_ingredient_dialog(
+                title="Add Ingredient from Barcode",
+                values=[record['name']] + [record[key] for key in NUTRIENTS],
+                is_update=False,
+                micro=record.get('micro')
+            )
+
+    def on_duplicates_clicked(self, widget):
+        dialog = DuplicatesDialog(self.get_toplevel(), self.db_dir, self.table.records())
+        response = dialog.run()
+        merges = dialog.merges()
+        dialog.destroy()
+        
+        if response == Gtk.ResponseType.OK and merges:
+            self._merge_duplicates(merges)
+
+    def on_columns_clicked(self, widget):
+        dialog = ColumnsDialog(self.get_toplevel(), self.db_dir, 'ingredients',
+                               {key: metric.label for key, metric in METRICS.items()})
+        dialog.run()
+        keys = dialog.keys
+        dialog.destroy()
+        
+        if keys is not None:
+            for column in self.ingredients_tree.get_columns():
+                self.ingredients_tree.remove_column(column)
+            self.ingredients_model.set_columns(keys)
+            self._create_columns(keys)
+            self.ingredients_tree.queue_resize()
+
+    def on_rankings_clicked(self, widget):
+        model = self.ingredients_model
+        rows = list(model.visible) if model.matches is not None else None
+        dialog = RankingsDialog(self.get_toplevel(), self.table, rows, self._select_row)
+        dialog.run()
+        dialog.destroy()
+
+    def _select_row(self, row):
+        """Select and scroll to a table row if the list shows it"""
+        try:
+            position = self.ingredients_model.visible.index(row)
+        except ValueError:
+            return
+        path = Gtk.TreePath([position])
+        self.ingredients_tree.set_cursor(path, None, False)
+        self.ingredients_tree.scroll_to_cell(path, None, True, 0.5, 0.0)
+
+    def _merge_duplicates(self, merges):
+        try:
+            recipes = load_recipes(self.db_dir)
+            entries = load_journal(self.db_dir)
+            ingredients, recipes_changed, entries_changed = merge_duplicates(
+                self.table.records(), recipes, entries, merges)
+            if recipes_changed:
+                save_recipes(self.db_dir, recipes)
+            if entries_changed:
+                save_journal(self.db_dir, entries)
+        except Exception as e:
+            self._show_error_dialog(self.get_toplevel(), "Error merging ingredients", str(e))
+            return
+
+        merged = len(self.table) - len(ingredients)
+        self.table = IngredientTable(ingredients)
+        self.ingredients_model.set_table(self.table)
+        self._save_ingredients()
+        if self.recipes_tab:
+            self.recipes_tab.reload_ingredients()
+            if recipes_changed:
+                self.recipes_tab.reload_recipes()
+        if self.journal_tab:
+            self.journal_tab.reload_ingredients()
+            if entries_changed:
+                self.journal_tab.reload_journal()
+                self.journal_tab._refresh_journal_view()
+        
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_toplevel(),
+            flags=0,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK,
+            text=f"Merged {merged} duplicate ingredients"
+        )
+        dialog.format_secondary_text(
+            f"Updated {recipes_changed} recipes and {entries_changed} journal entries."
+        )
+        dialog.run()
+        dialog.destroy()
+
+    def on_copy_clicked(self, widget):
+        selection = self.ingredients_tree.get_selection()
+        model, paths = selection.get_selected_rows()
+        
+        if not paths:
+            return
+            
+        clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+        ingredient_names = [self.table.names[model.row_id(path)] for path in paths]
+        
+        clipboard.set_text("\n".join(ingredient_names), -1)
+
+    def on_import_clicked(self, widget):
+        chooser = Gtk.FileChooserDialog(
+            title="Select the FoodData Central CSV folder",
+            transient_for=self.get_toplevel(),
+            action=Gtk.FileChooserAction.SELECT_FOLDER
+        )
+        chooser.add_buttons("Cancel", Gtk.ResponseType.CANCEL, "Import", Gtk.ResponseType.OK)
+        response = chooser.run()
+        fdc_dir = chooser.get_filename()
+        chooser.destroy()
+        
+        if response == Gtk.ResponseType.OK and fdc_dir:
+            FdcImportDialog(self.get_toplevel(), fdc_dir, self.db_dir, self._on_import_done)
+
+    def _on_import_done(self, table, stats, error):
+        if error is not None:
+            self._show_error_dialog(self.get_toplevel(), "Error importing foods", str(error))
+            return
+        if stats is None:
+            return
+        if table is not None:
+            self.table = table
+            self.ingredients_model.set_table(table)
+            shared_index('ingredients').sync(self.table.names)
+            if self.recipes_tab:
+                self.recipes_tab.reload_ingredients()
+            if self.journal_tab:
+                self.journal_tab.reload_ingredients()
+        
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_toplevel(),
+            flags=0,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK,
+            text=f"Imported {stats['imported']} foods"
+        )
+        dialog.format_secondary_text(
+            f"Skipped {stats['duplicates']} already known names and "
+            f"{stats['without energy']} foods without an energy value."
+        )
+        dialog.run()
+        dialog.destroy()
+
+    def _show_ingredient_dialog(self, title, values, is_update, micro=None):
+        # Micronutrients have no fields here; ones that came with the values are added as they are
+        self.dialog_micro = micro
+        dialog = Gtk.Dialog(
+            title=title,
+            transient_for=self.get_toplevel(),
+            modal=True,
+            border_width=10
+        )
+        dialog.set_default_size(400, 150)
+
+        content_area = dialog.get_content_area()
+        content_area.set_spacing(5)
+        
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        main_box.set_margin_top(5)
+        main_box.set_margin_bottom(5)
+        content_area.add(main_box)
+
+        input_frame = Gtk.Frame(label=" Ingredient details ")
+        input_frame.set_label_align(0.5, 0.5)
+        input_frame.set_margin_top(5)
+        input_frame.set_margin_bottom(5)
+        main_box.pack_start(input_frame, True, True, 0)
+
+        input_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        input_box.set_margin_top(10)
+        input_box.set_margin_bottom(10)
+        input_box.set_margin_start(10)
+        input_box.set_margin_end(10)
+        input_frame.add(input_box)
+
+        input_grid = Gtk.Grid()
+        input_grid.set_column_spacing(5)
+        input_grid.set_row_spacing(5)
+        input_box.pack_start(input_grid, True, True, 0)
+
+        self.entry_name = Gtk.Entry(placeholder_text="Ingredient name")
+        self.entry_name.set_text(values[0])
+        self.entry_name.set_hexpand(True)
+        input_grid.attach(self.entry_name, 0, 0, 1, 1)
+
+        fields = [
+            ("Kcal", "kcal", 1), ("Carbs", "carbs", 2), ("Sugar", "sugar", 3),
+            ("Fat", "fat", 4), ("Protein", "protein", 5), ("Fiber", "fiber", 6),
+            ("Salt", "salt", 7), ("Cost", "cost", 8)
+        ]
+
+        for i, (placeholder, prop_name, idx) in enumerate(fields, start=1):
+            entry = Gtk.Entry(placeholder_text=placeholder)
+            entry.set_input_purpose(Gtk.InputPurpose.NUMBER)
+            entry.set_width_chars(6)
+            entry.set_max_width_chars(8)
+            entry.set_text(str(values[idx]) if values[idx] != 0.0 else "")
+            setattr(self, f"entry_{prop_name}", entry)
+            input_grid.attach(entry, i, 0, 1, 1)
+
+        self.update_recipes_check = Gtk.CheckButton(label="Also update recipes")
+        main_box.pack_start(self.update_recipes_check, False, False, 0)
+
+        journal_box = Gtk.Box(spacing=10)
+        main_box.pack_start(journal_box, False, False, 0)
+        self.update_journal_check = Gtk.CheckButton(label="Also update journal")
+        journal_box.pack_start(self.update_journal_check, False, False, 0)
+        self.journal_from_entry = Gtk.Entry(placeholder_text="From YYYY-MM-DD (all dates if empty)")
+        self.journal_from_entry.set_width_chars(30)
+        self.journal_from_entry.set_sensitive(False)
+        self.update_journal_check.connect(
+            "toggled", lambda check: self.journal_from_entry.set_sensitive(check.get_active()))
+        journal_box.pack_start(self.journal_from_entry, False, False, 0)
+
+        button_box = Gtk.Box(spacing=10)
+        button_box.set_halign(Gtk.Align.FILL)
+        button_box.set_margin_top(10)
+        main_box.pack_end(button_box, False, False, 0)
+        
+        cancel_button = Gtk.Button(label="Cancel")
+        cancel_button.connect("clicked", lambda w: dialog.destroy())
+        button_box.pack_start(cancel_button, False, False, 0)
+        
+        action_button = Gtk.Button(label="Update" if is_update else "Add")
+        action_button.connect("clicked", lambda w: self._save_ingredient(dialog, is_update))
+        button_box.pack_end(action_button, False, False, 0)
+        
+        dialog.show_all()
+
+    def _parse_float(self, text):
+        text = text.strip()
+        if not text:
+            return 0.0
+        try:
+            return float(text.replace(',', '.'))
+        except ValueError:
+            raise ValueError(f"Invalid number: {text}")
+
+    def _save_ingredient(self, dialog, is_update):
+        try:
+            new_name = self.entry_name.get_text().strip()
+            if not new_name:
+                raise ValueError("Ingredient name is required")
+
+            new_values = {
+                'name': new_name,
+                'kcal': self._parse_float(self.entry_kcal.get_text()),
+                'carbs': self._parse_float(self.entry_carbs.get_text()),
+                'sugar': self._parse_float(self.entry_sugar.get_text()),
+                'fat': self._parse_float(self.entry_fat.get_text()),
+                'protein': self._parse_float(self.entry_protein.get_text()),
+                'fiber': self._parse_float(self.entry_fiber.get_text()),
+                'salt': self._parse_float(self.entry_salt.get_text()),
+                'cost': self._parse_float(self.entry_cost.get_text())
+            }
+
+            if is_update:
+                selection = self.ingredients_tree.get_selection()
+                model, paths = selection.get_selected_rows()
+                if paths and len(paths) == 1:
+                    from_date = self._parse_date(self.journal_from_entry.get_text())
+                    row = model.row_id(paths[0])
+                    old_name = self.table.names[row]
+                    self.table.update(row, new_values)
+                    self._update_references({row: old_name}, self.update_recipes_check.get_active(),
+                                            self.update_journal_check.get_active(), from_date)
+            else:
+                if self.dialog_micro:
+                    new_values['micro'] = self.dialog_micro
+                existing = self.table.find(new_name)
+                if existing is not None:
+                    if not self._confirm_overwrite(new_name):
+                        return
+                    self.table.update(existing, new_values)
+                else:
+                    self.table.append(new_values)
+
+            self.ingredients_model.refresh()
+            self._save_ingredients()
+            if self.recipes_tab:
+                self.recipes_tab.reload_ingredients()
+            if self.journal_tab:
+                self.journal_tab.reload_ingredients()
+            dialog.destroy()
+
+        except Exception as e:
+            self._show_error_dialog(dialog, "Error saving ingredient", str(e))
+
+    def _update_references(self, old_names, update_recipes, update_journal, from_date=None):
+        """Bring recipes and journal in line with rows already updated in the table.
+
+        old_names maps each updated row to its name before the update.
+        Every file is read and written at most once however many rows
+        changed. Returns (recipes changed, journal entries changed).
+        """
+        recipes_changed = entries_changed = 0
+        if update_recipes:
+            recipes_changed = self._update_recipes(
+                {old_name.lower(): self.table.record(row) for row, old_name in old_names.items()})
+            if recipes_changed and self.recipes_tab:
+                self.recipes_tab.reload_recipes()
+        if update_journal:
+            entries_changed = self._update_journal(old_names, from_date)
+            if entries_changed and self.journal_tab:
+                self.journal_tab.reload_journal()
+                self.journal_tab._refresh_journal_view()
+        return recipes_changed, entries_changed
+
+    def _update_recipes(self, updates):
+        """Rescale recipe rows of the ingredients in updates ({lowercased old name: record}); returns recipes changed"""
+        try:
+            recipes = load_recipes(self.db_dir)
+            updated = 0
+            for recipe in recipes:
+                if apply_ingredient_updates(recipe['ingredients'], 'name', updates):
+                    updated += 1
+            
+            if updated:
+                save_recipes(self.db_dir, recipes)
+            return updated
+        except Exception as e:
+            print(f"Error updating recipes: {e}")
+            return 0
+
+    def _parse_date(self, text):
+        text = text.strip()
+        if not text:
+            return None
+        try:
+            datetime.strptime(text, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Invalid date: {text} (use YYYY-MM-DD)")
+        return text
+
+    def _update_journal(self, old_names, from_date):
+        """Correct journal entries of the rows in old_names ({row: old name}) from from_date on, or all for None.
+
+        Entries that reference a version of an ingredient are re-pointed to
+        its new version in versions.json; only entries logged before
+        versions existed are rewritten in journal.json. Returns the number
+        of entries affected.
+        """
+        try:
+            versions = load_versions(self.db_dir)
+            entries = load_journal(self.db_dir)
+            referencing = [e for e in entries if 'ref' in e and versions.knows(e['ref'])]
+            before = [versions.resolve(e['ref'][0], e['ref'][1], e.get('date')) for e in referencing]
+            updates = {}
+            for row, old_name in old_names.items():
+                record = self.table.record(row)
+                versions.register(record)
+                versions.pin(record['id'], record['version'], from_date)
+                self.table.update(row, record)
+                updates[old_name.lower()] = record
+            save_versions(self.db_dir, versions)
+
+            # Only count entries whose pins now resolve them to another version
+            repointed = sum(1 for e, version in zip(referencing, before)
+                            if versions.resolve(e['ref'][0], e['ref'][1], e.get('date')) != version)
+            dated = [e for e in entries if from_date is None or e.get('date', '') >= from_date]
+            changed = apply_ingredient_updates([e for e in dated if 'ref' not in e], 'ate', updates)
+            if changed:
+                save_journal(self.db_dir, entries)
+            return repointed + changed
+        except Exception as e:
+            print(f"Error updating journal: {e}")
+            return 0
+
+    def _confirm_overwrite(self, name):
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_toplevel(),
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.YES_NO,
+            text=f"Ingredient '{name}' already exists",
+        )
+        dialog.format_secondary_text("Do you want to overwrite it with these new values?")
+        response = dialog.run() == Gtk.ResponseType.YES
+        dialog.destroy()
+        return response
+
+    def _show_error_dialog(self, parent, text, secondary_text):
+        dialog = Gtk.MessageDialog(
+            transient_for=parent,
+            flags=0,
+            message_type=Gtk.MessageType.ERROR,
+            buttons=Gtk.ButtonsType.OK,
+            text=text,
+        )
+        dialog.format_secondary_text(secondary_text)
+        dialog.run()
+        dialog.destroy()
+
+    def _save_ingredients(self):
+        try:
+            os.makedirs(self.db_dir, exist_ok=True)
+            records = self.table.records()
+            save_ingredients(self.db_dir, records)
+            self.table.keep_extras(records)
+            shared_index('ingredients').sync(self.table.names)
+        except Exception as e:
+            self._show_error_dialog(self.get_toplevel(), "Error saving ingredients", str(e))
+
+    def _create_columns(self, keys):
+        columns = [("Ingredient", 0.5)]
+        for key in keys:
+            if key == 'cost':
+                columns.append(("Cost/hg", 0.04))
+            elif key in METRICS:
+                columns.append((METRICS[key].label, 0.07))
+            else:
+                columns.append((nutrients.get(key).title, 0.07))
+        for idx, (col_name, proportion) in enumerate(columns):
+            renderer = Gtk.CellRendererText()
+            if idx != 0:
+                renderer.set_property("xalign", 1.0)
+            col = Gtk.TreeViewColumn(col_name, renderer, text=idx)
+            if idx != 0:
+                col.set_alignment(1.0)
+            col.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+            col.set_resizable(True)
+            col.set_clickable(True)
+            col.connect("clicked", self._on_column_clicked, idx)
+            self.ingredients_tree.append_column(col)
+        
+        self._show_sort_indicator()
+        self.column_proportions = [p for _, p in columns]
+
+    def _on_column_clicked(self, column, idx):
+        model = self.ingredients_model
+        descending = not model.descending if model.sort_column == idx else False
+        model.set_sort(idx, descending)
+        self._show_sort_indicator()
+
+    def _show_sort_indicator(self):
+        model = self.ingredients_model
+        for idx, column in enumerate(self.ingredients_tree.get_columns()):
+            column.set_sort_indicator(idx == model.sort_column)
+            column.set_sort_order(Gtk.SortType.DESCENDING if model.descending else Gtk.SortType.ASCENDING)
+
+    def _update_column_widths(self, widget, allocation):
+        proportions = self.column_proportions
+        if allocation.width > 1:
+            total_width = allocation.width - 30
+            sum_prop = sum(proportions)
+            for column, proportion in zip(widget.get_columns(), proportions):
+                column.set_fixed_width(int(total_width * (proportion / sum_prop)))
@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from gi.repository import GLib
+from .core.profiler import phase
+
+class JobRunner:
+    """Runs chart data preparation off the GTK main thread.
+
+    Jobs are submitted under a key such as "weight". Submitting again under
+    the same key supersedes the earlier job: its result is dropped instead
+    of being delivered. Results are handed back on the main loop with
+    GLib.idle_add, so callbacks may touch widgets.
+    """
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bitewise-job")
+        self.generations = {}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def submit(self, key, func, *args, on_done=None):
+        """Run func(*args) on a worker; on_done(result) runs on the main loop.
+
+        func must only work on its arguments and what it loads itself, never
+        on widget state, since the main thread keeps running meanwhile.
+        """
+        with self.lock:
+            generation = self.generations.get(key, 0) + 1
+            self.generations[key] = generation
+            self.in_flight += 1
+
+        def run():
+            if not self._is_current(key, generation):
+                self._finished()
+                return
+            try:
+                with phase(f"job {key}"):
+                    result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            GLib.idle_add(self._deliver, key, generation, result, error, on_done)
+
+        self.executor.submit(run)
+        return generation
+
+    def cancel(self, key):
+        with self.lock:
+            self.generations[key] = self.generations.get(key, 0) + 1
+
+    def pending(self):
+        """Number of submitted jobs not yet delivered or dropped"""
+        with self.lock:
+            return self.in_flight
+
+    def _finished(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _is_current(self, key, generation):
+        with self.lock:
+            return self.generations.get(key) == generation
+
+    def _deliver(self, key, generation, result, error, on_done):
+        self._finished()
+        if not self._is_current(key, generation):
+            return False
+        if error is not None:
+            print(f"Error preparing {key} data: {error}")
+        elif on_done:
+            with phase(f"apply {key}"):
+                on_done(result)
+        return False
+
+jobs = JobRunner()
@@ -1,39 +1,25 @@
 import gi
-import json
-import os
 import re
-import sys
 from datetime import datetime
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, Gdk
+from .barcode_dialog import BarcodeDialog
+from .core.aggregation import usage_stats
+from .core.models import walk_entry
+from .core.search_index import shared_index
+from .core.storage import get_db_dir, load_diet, load_ingredients, save_diet, save_ingredients
+from .name_filter import FilterDebounce, NameFilter
 
 class DietSettingsDialog(Gtk.Dialog):
     def __init__(self, parent):
         super().__init__(title="Diet Settings", transient_for=parent, modal=True)
         self.set_default_size(250, 150)
-        self.db_dir = self._get_db_dir()
+        self.db_dir = get_db_dir()
         self.existing_settings = self._load_settings()
         self._setup_ui()
 
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
     def _load_settings(self):
-        try:
-            with open(os.path.join(self.db_dir, 'diet.json'), 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading diet settings: {e}")
-            return {}
+        return load_diet(self.db_dir)
 
     def _setup_ui(self):
         content_area = self.get_content_area()
@@ -129,8 +115,7 @@ class DietSettingsDialog(Gtk.Dialog):
         }
         
         try:
-            with open(os.path.join(self.db_dir, 'diet.json'), 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            save_diet(self.db_dir, data)
             
             parent = self.get_transient_for()
             if hasattr(parent, '_refresh_journal_view'):
@@ -237,8 +222,6 @@ class AddWorkoutDialog(Gtk.Dialog):
             self._show_error("Invalid values - must be numbers (e.g. 5 or 5.5)")
             return False
 
-        kcal = 0.5 * weight * distance
-
         if add_to_selected and self.selected_date:
             date = self.selected_date
             timestamp = f"{date} 23:59:59"
@@ -246,15 +229,7 @@ class AddWorkoutDialog(Gtk.Dialog):
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             date = datetime.now().strftime("%Y-%m-%d")
 
-        entry = {
-            'timestamp': timestamp,
-            'date': date,
-            'ate': f"Walk: {distance:.2f}km",
-            'kcal': -kcal,
-            'weight': weight
-        }
-
-        self.journal_tab.journal_data.append(entry)
+        self.journal_tab.journal_data.append(walk_entry(distance, weight, date, timestamp))
         self.journal_tab._save_journal()
         self.journal_tab._refresh_journal_view()
         self.destroy()
@@ -275,10 +250,6 @@ class AddEntryDialog(Gtk.Dialog):
         super().__init__(title="Add Journal Entry", transient_for=journal_tab.get_toplevel(), modal=True)
         self.set_default_size(400, 600)
         self.journal_tab = journal_tab
-        self.all_ingredients = []
-        self.all_recipes = []
-        self.filtered_ingredients = []
-        self.filtered_recipes = []
 
         selection = journal_tab.journal_tree.get_selection()
         model, paths = selection.get_selected_rows()
@@ -288,16 +259,17 @@ class AddEntryDialog(Gtk.Dialog):
         else:
             self.selected_date = None
 
-        self.all_ingredients = sorted(journal_tab.ingredients_data, key=lambda x: x['name'].lower())
-        self.all_recipes = sorted(journal_tab.recipes_data, key=lambda x: x['name'].lower())
-        self.filtered_ingredients = self.all_ingredients.copy()
-        self.filtered_recipes = self.all_recipes.copy()
+        # The shared indexes already hold the names sorted, so opening the
+        # dialog doesn't sort the lists again
+        usage = usage_stats(journal_tab.journal_data)
+        self.ingredient_names = NameFilter(shared_index('ingredients'), usage)
+        self.recipe_names = NameFilter(shared_index('recipes'), usage)
 
         self.filter_entry = Gtk.Entry(placeholder_text="Filter ingredients/recipes...")
-        self.filter_entry.connect("changed", self.on_filter_changed)
+        self.filter_debounce = FilterDebounce(self.filter_entry, self.on_filter_changed)
 
-        self.ingredients_list = Gtk.ListStore(str)
-        self.ingredients_view = Gtk.TreeView(model=self.ingredients_list)
+        self.ingredients_view = Gtk.TreeView()
+        self.ingredient_names.attach(self.ingredients_view)
         self.ingredients_view.set_headers_visible(False)
         self.ingredients_view.set_size_request(-1, 150)
         renderer = Gtk.CellRendererText()
@@ -306,8 +278,8 @@ class AddEntryDialog(Gtk.Dialog):
         self.ingredients_selection = self.ingredients_view.get_selection()
         self.ingredients_selection.connect("changed", self.on_ingredient_selected)
 
-        self.recipes_list = Gtk.ListStore(str)
-        self.recipes_view = Gtk.TreeView(model=self.recipes_list)
+        self.recipes_view = Gtk.TreeView()
+        self.recipe_names.attach(self.recipes_view)
         self.recipes_view.set_headers_visible(False)
         self.recipes_view.set_size_request(-1, 150)
         renderer = Gtk.CellRendererText()
@@ -385,41 +357,54 @@ class AddEntryDialog(Gtk.Dialog):
         cancel_button.connect("clicked", lambda b: self.destroy())
         button_box.pack_start(cancel_button, False, False, 0)
 
+        barcode_button = Gtk.Button(label="Add by barcode")
+        barcode_button.connect("clicked", self.on_barcode_clicked)
+        button_box.pack_start(barcode_button, False, False, 0)
+
         button_box.pack_start(Gtk.Box(), True, True, 0)
 
         add_button = Gtk.Button(label="Add")
         add_button.connect("clicked", self.on_add_clicked)
         button_box.pack_start(add_button, False, False, 0)
 
-        self.update_lists()
         self.show_all()
 
-    def update_lists(self):
-        self.ingredients_list.clear()
-        for item in self.filtered_ingredients:
-            self.ingredients_list.append([item['name']])
+    def on_barcode_clicked(self, widget):
+        dialog = BarcodeDialog(self, self.journal_tab.db_dir)
+        response = dialog.run()
+        record = dialog.record
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or not record:
+            return
 
-        self.recipes_list.clear()
-        for item in self.filtered_recipes:
-            self.recipes_list.append([item['name']])
+        name = record['name']
+        try:
+            ingredients = load_ingredients(self.journal_tab.db_dir)
+            known = {i['name'].lower(): i['name'] for i in ingredients}
+            if name.lower() in known:
+                name = known[name.lower()]
+            else:
+                ingredients.append(record)
+                save_ingredients(self.journal_tab.db_dir, ingredients)
+                self.journal_tab.reload_ingredients()
+                window = self.journal_tab.get_toplevel()
+                if hasattr(window, 'on_ingredients_changed'):
+                    window.on_ingredients_changed()
+        except Exception as e:
+            self._show_error(f"Error saving ingredient: {e}")
+            return
 
-    def on_filter_changed(self, entry):
-        filter_text = entry.get_text().lower()
-        
-        if not filter_text:
-            self.filtered_ingredients = self.all_ingredients.copy()
-            self.filtered_recipes = self.all_recipes.copy()
-        else:
-            self.filtered_ingredients = [
-                item for item in self.all_ingredients 
-                if filter_text in item['name'].lower()
-            ]
-            self.filtered_recipes = [
-                item for item in self.all_recipes 
-                if filter_text in item['name'].lower()
-            ]
-        
-        self.update_lists()
+        # Select the product so only the grams are left to enter
+        self.ingredient_names.add_name(name)
+        self.filter_entry.set_text(name)
+        self.filter_debounce.flush()
+        self.ingredients_selection.select_path(Gtk.TreePath.new_first())
+        self.gram_entry.grab_focus()
+
+    def on_filter_changed(self):
+        filter_text = self.filter_entry.get_text()
+        self.ingredient_names.set_query(filter_text)
+        self.recipe_names.set_query(filter_text)
         self.ingredients_selection.unselect_all()
         self.recipes_selection.unselect_all()
 
@@ -482,7 +467,7 @@ class AddEntryDialog(Gtk.Dialog):
             self.gram_entry.set_text('')
             self.pts_check.set_active(False)
             self.filter_entry.set_text('')
-            self.on_filter_changed(self.filter_entry)
+            self.filter_debounce.flush()
             self.ingredients_selection.unselect_all()
             self.recipes_selection.unselect_all()
             self.filter_entry.grab_focus()
@@ -1,11 +1,15 @@
 import gi
-import json
-import os
-import sys
-from datetime import datetime
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, Gdk
-from .diet_guidelines import get_diet_colors, calculate_bmr, calculate_remaining
+from .columns_dialog import ColumnsDialog
+from .core import nutrients
+from .core.aggregation import daily_sums, day_entries, day_values, day_weight, remove_dates
+from .core.diet import bmr_from_settings, calculate_remaining, get_diet_colors, has_bmr_settings
+from .core.models import NUTRIENTS, fill_timestamps, ingredient_entry, recipe_entry
+from .core.profiler import timed
+from .core.search_index import shared_index
+from .core.storage import (append_journal, get_db_dir, load_diet, load_ingredients, load_journal, load_recipes,
+                           load_settings, save_journal)
 from .journal_dialog import DietSettingsDialog, AddEntryDialog, AddWorkoutDialog
 
 class JournalTab(Gtk.Box):
@@ -13,68 +17,25 @@ class JournalTab(Gtk.Box):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         self.set_border_width(10)
         
-        self.db_dir = self._get_db_dir()
+        self.db_dir = get_db_dir()
         self._load_data()
         self.last_entered_weight = self.last_weight
         self._setup_ui()
 
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
     def _load_data(self):
-        self.ingredients_data = []
-        self.recipes_data = []
-        self.journal_data = []
-        self.diet_settings = {}
         self.weight_tab = self.bmr_tab = self.macro_tab = None
-
-        files = {
-            'ingredients': ('ingredients.json', 'ingredients'),
-            'recipes': ('recipes.json', 'recipes'),
-            'journal': ('journal.json', 'entries'),
-            'diet': ('diet.json', None)
-        }
-
-        for key, (filename, data_key) in files.items():
-            try:
-                path = os.path.join(self.db_dir, filename)
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if data_key:
-                        setattr(self, f"{key}_data", data.get(data_key, []))
-                    else:
-                        self.diet_settings = data
-            except Exception as e:
-                print(f"Error loading {filename}: {e}")
-
-        if self.journal_data:
-            for entry in self.journal_data:
-                if 'timestamp' not in entry and 'date' in entry:
-                    entry['timestamp'] = f"{entry['date']} 00:00:00"
-            self.last_weight = str(self.journal_data[-1].get('weight', '')) if self.journal_data else ''
-        else:
-            self.last_weight = ''
+        self.ingredients_data = load_ingredients(self.db_dir)
+        self.recipes_data = load_recipes(self.db_dir)
+        self._sync_search_indexes()
+        self.journal_data = fill_timestamps(load_journal(self.db_dir))
+        self.diet_settings = load_diet(self.db_dir)
+        self.last_weight = str(self.journal_data[-1].get('weight', '')) if self.journal_data else ''
 
     def _setup_ui(self):
-        columns = [
-            ("Date", 0.12), ("Grams", 0.08), ("Calories", 0.10), ("Carbs", 0.10),
-            ("Sugar", 0.10), ("Fat", 0.10), ("Protein", 0.10), ("Fiber", 0.10),
-            ("Salt", 0.10), ("Cost", 0.10)
-        ]
-        self.journal_store = Gtk.ListStore(*([str] + [float]*9))
-        self.journal_tree = Gtk.TreeView(model=self.journal_store)
+        self.journal_tree = Gtk.TreeView()
         self.journal_tree.get_selection().set_mode(Gtk.SelectionMode.MULTIPLE)
-        self.create_columns(self.journal_tree, columns, sortable=True)
-        self.journal_store.set_sort_column_id(0, Gtk.SortType.DESCENDING)
+        self.journal_tree.connect("size-allocate", self._update_column_widths)
+        self._set_journal_columns(nutrients.visible_columns(load_settings(self.db_dir), 'journal'))
 
         self.journal_tree.set_has_tooltip(True)
         self.journal_tree.connect("query-tooltip", self.on_query_tooltip)
@@ -96,6 +57,11 @@ class JournalTab(Gtk.Box):
         self.diet_settings_button.connect("clicked", self.on_diet_settings_clicked)
         button_box.pack_start(self.diet_settings_button, False, False, 0)
 
+        self.columns_button = Gtk.Button(label="Columns...")
+        self.columns_button.set_tooltip_text("Choose the nutrients shown")
+        self.columns_button.connect("clicked", self.on_columns_clicked)
+        button_box.pack_start(self.columns_button, False, False, 0)
+
         button_box.pack_start(Gtk.Box(), True, True, 0)
 
         self.add_workout_button = Gtk.Button(label="Add workout")
@@ -108,6 +74,43 @@ class JournalTab(Gtk.Box):
 
         self._populate_journal_store()
 
+    def _set_journal_columns(self, keys):
+        """Show grams and these nutrient keys per day; the store is rebuilt to hold them"""
+        self.journal_keys = ['gram'] + list(keys)
+        self.journal_store = Gtk.ListStore(*([str] + [float] * len(self.journal_keys)))
+        for column in self.journal_tree.get_columns():
+            self.journal_tree.remove_column(column)
+        self.journal_tree.set_model(self.journal_store)
+        columns = [("Date", 0.12)] + [(self._column_title(key), 0.08 if key == 'gram' else 0.10)
+                                      for key in self.journal_keys]
+        self.create_columns(self.journal_tree, columns, sortable=True)
+        self.journal_store.set_sort_column_id(0, Gtk.SortType.DESCENDING)
+
+    def _column_title(self, key):
+        if key == 'gram':
+            return "Grams"
+        if key == 'kcal':
+            return "Calories"
+        return nutrients.get(key).title
+
+    def _column_format(self, key):
+        if key == 'cost':
+            return "{:.2f}"
+        if key == 'gram' or key in NUTRIENTS:
+            return "{:.1f}"
+        return nutrients.get(key).format
+
+    def on_columns_clicked(self, widget):
+        dialog = ColumnsDialog(self.get_toplevel(), self.db_dir, 'journal')
+        dialog.run()
+        keys = dialog.keys
+        dialog.destroy()
+        
+        if keys is not None:
+            self._set_journal_columns(keys)
+            self._populate_journal_store()
+            self.journal_tree.queue_resize()
+
     def on_add_workout_clicked(self, widget):
         dialog = AddWorkoutDialog(self)
         dialog.run()
@@ -153,70 +156,20 @@ class JournalTab(Gtk.Box):
             if not item:
                 self._show_error("Selected ingredient not found")
                 return False
-            factor = gram / 100
-            entry.update({
-                'ate': ingredient_name,
-                'kcal': item['kcal'] * factor,
-                'carbs': item['carbs'] * factor,
-                'sugar': item['sugar'] * factor,
-                'fat': item['fat'] * factor,
-                'protein': item['protein'] * factor,
-                'fiber': item['fiber'] * factor,
-                'salt': item['salt'] * factor,
-                'cost': item['cost'] * factor
-            })
+            entry.update(ingredient_entry(item, gram))
         elif recipe_name:
             recipe = next((r for r in self.recipes_data if r['name'] == recipe_name), None)
             if not recipe:
                 self._show_error("Selected recipe not found")
                 return False
-            
-            if pts_active:
-                portions = recipe.get('portions', 1)
-                if portions <= 0:
-                    portions = 1
-                
-                total_kcal = sum(ing['kcal'] for ing in recipe['ingredients'])
-                total_gram = sum(ing['gram'] for ing in recipe['ingredients'])
-                
-                kcal_per_portion = total_kcal / portions
-                gram_per_portion = total_gram / portions
-                
-                factor = gram / portions
-                entry.update({
-                    'ate': recipe_name,
-                    'kcal': kcal_per_portion * gram,
-                    'carbs': sum(ing['carbs'] for ing in recipe['ingredients']) * factor,
-                    'sugar': sum(ing['sugar'] for ing in recipe['ingredients']) * factor,
-                    'fat': sum(ing['fat'] for ing in recipe['ingredients']) * factor,
-                    'protein': sum(ing['protein'] for ing in recipe['ingredients']) * factor,
-                    'fiber': sum(ing['fiber'] for ing in recipe['ingredients']) * factor,
-                    'salt': sum(ing['salt'] for ing in recipe['ingredients']) * factor,
-                    'cost': sum(ing['cost'] for ing in recipe['ingredients']) * factor,
-                    'pts': True,
-                    'gram': gram_per_portion * gram
-                })
-            else:
-                total_gram = sum(ing['gram'] for ing in recipe['ingredients'])
-                if total_gram == 0:
-                    self._show_error("Recipe has no ingredients")
-                    return False
-                factor = gram / total_gram
-                entry.update({
-                    'ate': recipe_name,
-                    'kcal': sum(ing['kcal'] for ing in recipe['ingredients']) * factor,
-                    'carbs': sum(ing['carbs'] for ing in recipe['ingredients']) * factor,
-                    'sugar': sum(ing['sugar'] for ing in recipe['ingredients']) * factor,
-                    'fat': sum(ing['fat'] for ing in recipe['ingredients']) * factor,
-                    'protein': sum(ing['protein'] for ing in recipe['ingredients']) * factor,
-                    'fiber': sum(ing['fiber'] for ing in recipe['ingredients']) * factor,
-                    'salt': sum(ing['salt'] for ing in recipe['ingredients']) * factor,
-                    'cost': sum(ing['cost'] for ing in recipe['ingredients']) * factor,
-                    'pts': False
-                })
+            try:
+                entry.update(recipe_entry(recipe, gram, pts_active))
+            except ValueError as e:
+                self._show_error(str(e))
+                return False
 
         self.journal_data.append(entry)
-        self._save_journal()
+        self._save_journal(append_journal)
         self._refresh_journal_view()
         
         if self.weight_tab and hasattr(self.weight_tab, 'update_plot'):
@@ -258,10 +211,8 @@ class JournalTab(Gtk.Box):
             paths.sort(reverse=True)
             
             for path in paths:
-                treeiter = model.get_iter(path)
-                date = model[treeiter][0]
-                dates_to_update.add(date)
-                self.journal_data[:] = [e for e in self.journal_data if e['date'] != date]
+                dates_to_update.add(model[model.get_iter(path)][0])
+            remove_dates(self.journal_data, dates_to_update)
             
             self._save_journal()
             self._refresh_journal_view()
@@ -278,11 +229,6 @@ class JournalTab(Gtk.Box):
 
     def create_columns(self, treeview, columns, sortable=False):
         treeview.proportions = []
-        format_map = {
-            1: "{:.1f}", 2: "{:.1f}", 3: "{:.1f}", 4: "{:.1f}",
-            5: "{:.1f}", 6: "{:.1f}", 7: "{:.1f}", 8: "{:.1f}", 9: "{:.2f}"
-        }
-
         for idx, (col_name, proportion) in enumerate(columns):
             renderer = Gtk.CellRendererText(xalign=1.0 if idx else 0.0)
             col = Gtk.TreeViewColumn(col_name, renderer)
@@ -298,8 +244,6 @@ class JournalTab(Gtk.Box):
             
             treeview.append_column(col)
             treeview.proportions.append(proportion)
-        
-        treeview.connect("size-allocate", self._update_column_widths)
 
     def set_weight_tab(self, weight_tab):
         self.weight_tab = weight_tab
@@ -311,27 +255,21 @@ class JournalTab(Gtk.Box):
         self.macro_tab = macro_tab
 
     def reload_ingredients(self):
-        try:
-            with open(os.path.join(self.db_dir, 'ingredients.json'), 'r', encoding='utf-8') as f:
-                self.ingredients_data = json.load(f).get('ingredients', [])
-        except Exception as e:
-            print(f"Error reloading ingredients: {e}")
+        self.ingredients_data = load_ingredients(self.db_dir)
+        self._sync_search_indexes()
 
     def reload_recipes(self):
-        try:
-            with open(os.path.join(self.db_dir, 'recipes.json'), 'r', encoding='utf-8') as f:
-                self.recipes_data = json.load(f).get('recipes', [])
-        except Exception as e:
-            print(f"Error reloading recipes: {e}")
+        self.recipes_data = load_recipes(self.db_dir)
+        self._sync_search_indexes()
+
+    def _sync_search_indexes(self):
+        shared_index('ingredients').sync(i['name'] for i in self.ingredients_data)
+        shared_index('recipes').sync(r['name'] for r in self.recipes_data)
 
     def reload_journal(self):
         try:
-            with open(os.path.join(self.db_dir, 'journal.json'), 'r', encoding='utf-8') as f:
-                self.journal_data = json.load(f).get('entries', [])
-                for entry in self.journal_data:
-                    if 'timestamp' not in entry and 'date' in entry:
-                        entry['timestamp'] = f"{entry['date']} 00:00:00"
-                self.last_weight = str(self.journal_data[-1].get('weight', '')) if self.journal_data else ''
+            self.journal_data = fill_timestamps(load_journal(self.db_dir))
+            self.last_weight = str(self.journal_data[-1].get('weight', '')) if self.journal_data else ''
             
             self._populate_journal_store()
             if self.weight_tab and hasattr(self.weight_tab, 'update_plot'):
@@ -348,13 +286,9 @@ class JournalTab(Gtk.Box):
         response = dialog.run()
         dialog.destroy()
         
-        try:
-            with open(os.path.join(self.db_dir, 'diet.json'), 'r', encoding='utf-8') as f:
-                self.diet_settings = json.load(f)
-            self._refresh_journal_view()
-            self.journal_tree.queue_draw()
-        except Exception as e:
-            print(f"Error reloading diet settings: {e}")
+        self.diet_settings = load_diet(self.db_dir)
+        self._refresh_journal_view()
+        self.journal_tree.queue_draw()
 
     def on_row_activated(self, treeview, path, column):
         selected_date = self.journal_store[path][0]
@@ -373,52 +307,30 @@ class JournalTab(Gtk.Box):
         frame = Gtk.Frame(margin_top=0, margin_bottom=0)
         content_box.pack_start(frame, True, True, 0)
         
-        self.detail_store = Gtk.ListStore(str, float, float, float, float, float, float, float, float, float)
-        self.selected_date_entries = sorted(
-            [e for e in self.journal_data if e['date'] == selected_date],
-            key=lambda x: x['timestamp'], reverse=True
-        )
+        self.detail_store = Gtk.ListStore(*([str] + [float] * len(self.journal_keys)))
+        self.selected_date_entries = day_entries(self.journal_data, selected_date)
         
         total_kcal = sum(e.get('kcal', 0) for e in self.selected_date_entries)
         bmr = None
         
-        if all(k in self.diet_settings for k in ['date_of_birth', 'height_cm', 'gender']):
+        if has_bmr_settings(self.diet_settings):
             try:
-                dob = self.diet_settings['date_of_birth']
-                height = self.diet_settings['height_cm']
-                gender = self.diet_settings['gender']
                 weight = self.selected_date_entries[-1].get('weight', 0) if self.selected_date_entries else 0
                 if weight > 0:
-                    birth_year = int(dob[:4])
-                    age = datetime.now().year - birth_year
-                    bmr = calculate_bmr(gender, weight, height, age)
+                    bmr = bmr_from_settings(self.diet_settings, weight)
             except Exception as e:
                 print(f"BMR calculation error: {e}")
         
-        for entry in self.selected_date_entries:
-            self.detail_store.append([
-                entry.get('ate', 'N/A'),
-                entry.get('gram', 0),
-                entry.get('kcal', 0),
-                entry.get('carbs', 0),
-                entry.get('sugar', 0),
-                entry.get('fat', 0),
-                entry.get('protein', 0),
-                entry.get('fiber', 0),
-                entry.get('salt', 0),
-                entry.get('cost', 0)
-            ])
+        self._fill_detail_store()
         
         self.detail_tree = Gtk.TreeView(model=self.detail_store)
         self.detail_tree.get_selection().set_mode(Gtk.SelectionMode.MULTIPLE)
         self.detail_tree.set_margin_top(0)
         self.detail_tree.set_margin_bottom(0)
         
-        columns = [
-            ("Item", 0.4), ("Grams", 0.07), ("Calories", 0.08), ("Carbs", 0.08),
-            ("Sugar", 0.08), ("Fat", 0.06), ("Protein", 0.08), ("Fiber", 0.07),
-            ("Salt", 0.06), ("Cost", 0.02)
-        ]
+        proportions = {'gram': 0.07, 'fat': 0.06, 'fiber': 0.07, 'salt': 0.06, 'cost': 0.02}
+        columns = [("Item", 0.4)] + [(self._column_title(key), proportions.get(key, 0.08))
+                                     for key in self.journal_keys]
         
         self.detail_tree.proportions = []
         for idx, (col_name, proportion) in enumerate(columns):
@@ -474,36 +386,26 @@ class JournalTab(Gtk.Box):
         iter = model.get_iter(path)
         date = model.get_value(iter, 0)
         
-        has_bmr_settings = all(k in self.diet_settings for k in ['date_of_birth', 'height_cm', 'gender'])
-        if not has_bmr_settings:
+        if not has_bmr_settings(self.diet_settings):
             tooltip.set_text("Complete diet settings (birth date, height, gender) and enter weight to show nutrition analysis.")
             widget.set_tooltip_cell(tooltip, path, column, None)
             return True
             
-        weight = next((e.get('weight', 0) for e in self.journal_data if e['date'] == date), 0)
+        weight = day_weight(self.journal_data, date)
         if weight <= 0:
             tooltip.set_text("Enter your weight for this date to show nutrition analysis.")
             widget.set_tooltip_cell(tooltip, path, column, None)
             return True
             
         try:
-            dob = self.diet_settings['date_of_birth']
-            height = self.diet_settings['height_cm']
-            gender = self.diet_settings['gender']
-            birth_year = int(dob[:4])
-            age = datetime.now().year - birth_year
-            bmr = calculate_bmr(gender, weight, height, age)
+            bmr = bmr_from_settings(self.diet_settings, weight)
         except Exception as e:
             print(f"BMR calculation error: {e}")
             tooltip.set_text("Error calculating nutrition analysis.")
             widget.set_tooltip_cell(tooltip, path, column, None)
             return True
             
-        daily_values = {}
-        for entry in self.journal_data:
-            if entry['date'] == date:
-                for nutrient in ['kcal', 'carbs', 'fat', 'protein', 'fiber', 'salt']:
-                    daily_values[nutrient] = daily_values.get(nutrient, 0) + entry.get(nutrient, 0)
+        daily_values = day_values(self.journal_data, date, ['kcal', 'carbs', 'fat', 'protein', 'fiber', 'salt'])
         
         daily_kcal = daily_values.get('kcal', 0)
         tooltip_lines = [
@@ -593,51 +495,29 @@ class JournalTab(Gtk.Box):
             
             self._save_journal()
             
-            self.selected_date_entries = [e for e in self.journal_data if e['date'] == selected_date]
-            self.selected_date_entries.sort(key=lambda x: x['timestamp'], reverse=True)
+            self.selected_date_entries = day_entries(self.journal_data, selected_date)
             self.detail_store.clear()
-            for entry in self.selected_date_entries:
-                self.detail_store.append([
-                    entry.get('ate', 'N/A'),
-                    entry.get('gram', 0),
-                    entry.get('kcal', 0),
-                    entry.get('carbs', 0),
-                    entry.get('sugar', 0),
-                    entry.get('fat', 0),
-                    entry.get('protein', 0),
-                    entry.get('fiber', 0),
-                    entry.get('salt', 0),
-                    entry.get('cost', 0)
-                ])
+            self._fill_detail_store()
             
             self._refresh_journal_view()
         
         selection.unselect_all()
         self.remove_button.set_sensitive(False)
 
+    def _fill_detail_store(self):
+        for entry in self.selected_date_entries:
+            micro = entry.get('micro', {})
+            self.detail_store.append([entry.get('ate', 'N/A')] + [
+                entry.get(key, 0) if key == 'gram' or key in NUTRIENTS else micro.get(key, 0)
+                for key in self.journal_keys])
+
+    @timed()
     def _populate_journal_store(self):
         self.journal_store.clear()
-        daily_data = {}
-        
-        for entry in self.journal_data:
-            date = entry['date']
-            if date not in daily_data:
-                daily_data[date] = {k: 0.0 for k in [
-                    'gram', 'kcal', 'carbs', 'sugar', 'fat', 
-                    'protein', 'fiber', 'salt', 'cost'
-                ]}
-                daily_data[date]['weight'] = entry.get('weight', 0)
-            
-            for nutrient in daily_data[date]:
-                if nutrient in entry:
-                    daily_data[date][nutrient] += entry[nutrient]
-            daily_data[date]['weight'] = entry.get('weight', daily_data[date]['weight'])
-
-        for date, values in sorted(daily_data.items(), key=lambda x: x[0], reverse=True):
-            self.journal_store.append([date] + [values[k] for k in [
-                'gram', 'kcal', 'carbs', 'sugar', 'fat', 
-                'protein', 'fiber', 'salt', 'cost'
-            ]])
+        keys = self.journal_keys
+        dates, totals = daily_sums(self.journal_data, keys)
+        for row, date in sorted(enumerate(dates), key=lambda x: x[1], reverse=True):
+            self.journal_store.append([date] + [totals[key][row] for key in keys])
 
     def _refresh_journal_view(self):
         self._populate_journal_store()
@@ -650,19 +530,19 @@ class JournalTab(Gtk.Box):
                 tab.update_charts()
         self.journal_tree.queue_draw()
 
-    def _save_journal(self):
+    def _save_journal(self, save=save_journal):
         try:
-            with open(os.path.join(self.db_dir, 'journal.json'), 'w', encoding='utf-8') as f:
-                json.dump({'entries': self.journal_data}, f, indent=2, ensure_ascii=False)
+            save(self.db_dir, self.journal_data)
         except Exception as e:
             self._show_error(f"Error saving journal: {e}")
 
     def detail_cell_data_func(self, column, cell, model, iter, data):
         col_index, total_kcal, bmr = data
         value = model.get_value(iter, col_index)
+        key = self.journal_keys[col_index - 1] if col_index else None
         
         if col_index > 0:
-            cell.set_property("text", f"{float(value):.1f}")
+            cell.set_property("text", self._column_format(key).format(float(value)))
         else:
             cell.set_property("text", str(value))
         
@@ -670,7 +550,7 @@ class JournalTab(Gtk.Box):
         cell.set_property("foreground-set", False)
 
         if bmr is not None:
-            colors = get_diet_colors(self.diet_settings.get('diet', ''), col_index, value, bmr, bmr)
+            colors = get_diet_colors(self.diet_settings.get('diet', ''), key, value, bmr, bmr)
             if colors:
                 if 'background' in colors:
                     cell.set_property("background", colors['background'])
@@ -680,29 +560,21 @@ class JournalTab(Gtk.Box):
                     cell.set_property("foreground-set", True)
 
     def cell_data_func(self, column, cell, model, iter, col_index):
-        format_map = {
-            1: "{:.1f}", 2: "{:.1f}", 3: "{:.1f}", 4: "{:.1f}",
-            5: "{:.1f}", 6: "{:.1f}", 7: "{:.1f}", 8: "{:.1f}", 9: "{:.2f}"
-        }
         value = model.get_value(iter, col_index)
-        cell.set_property("text", format_map.get(col_index, "{:.1f}").format(float(value)) if col_index else str(value))
+        key = self.journal_keys[col_index - 1] if col_index else None
+        cell.set_property("text", self._column_format(key).format(float(value)) if col_index else str(value))
         
         cell.set_property("background-set", False)
         cell.set_property("foreground-set", False)
 
         date = model.get_value(iter, 0)
-        weight = next((e.get('weight', 0) for e in self.journal_data if e['date'] == date), 0)
+        weight = day_weight(self.journal_data, date)
         
-        if (weight > 0 and all(k in self.diet_settings for k in ['date_of_birth', 'height_cm', 'gender'])):
+        if weight > 0 and has_bmr_settings(self.diet_settings):
             try:
-                dob = self.diet_settings['date_of_birth']
-                height = self.diet_settings['height_cm']
-                gender = self.diet_settings['gender']
-                birth_year = int(dob[:4])
-                age = datetime.now().year - birth_year
-                bmr = calculate_bmr(gender, weight, height, age)
+                bmr = bmr_from_settings(self.diet_settings, weight)
                 
-                colors = get_diet_colors(self.diet_settings.get('diet', ''), col_index, value, bmr, bmr)
+                colors = get_diet_colors(self.diet_settings.get('diet', ''), key, value, bmr, bmr)
                 if colors:
                     if 'background' in colors:
                         cell.set_property("background", colors['background'])
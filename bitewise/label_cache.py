@@ -0,0 +1,24 @@
+class LabelCache:
+    """Formatted axis labels and their cairo text extents.
+
+    Graphs are rebuilt whenever their data changes, so one cache per graph
+    instance is one cache per data version.
+    """
+    def __init__(self):
+        self.labels = {}
+        self.extents = {}
+
+    def label(self, key, make):
+        """Label stored under key, formatted with make(key) the first time"""
+        text = self.labels.get(key)
+        if text is None:
+            text = self.labels[key] = make(key)
+        return text
+
+    def text_extents(self, cr, text):
+        # Extents only depend on the text and font size for a given face
+        key = (text, cr.get_font_matrix().xx)
+        extents = self.extents.get(key)
+        if extents is None:
+            extents = self.extents[key] = cr.text_extents(text)
+        return extents
@@ -2,12 +2,11 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk
 import cairo
-import json
-import os
 import math
-import sys
-from collections import defaultdict
-import operator
+from .core.aggregation import process_macro_data
+from .core.profiler import timed
+from .core.storage import get_db_dir, load_journal
+from .jobs import jobs
 
 class PieChart(Gtk.DrawingArea):
     def __init__(self, title, data):
@@ -23,12 +22,14 @@ class PieChart(Gtk.DrawingArea):
         self.connect("motion-notify-event", self.on_motion_notify)
         self.connect("leave-notify-event", self.on_leave_notify)
         
+    @timed()
     def on_draw(self, widget, cr):
-        width, height = widget.get_allocated_width(), widget.get_allocated_height()
         style_context = widget.get_style_context()
-        bg_color = style_context.get_background_color(Gtk.StateFlags.NORMAL)
-        text_color = style_context.get_color(Gtk.StateFlags.NORMAL)
-        
+        self.render(cr, widget.get_allocated_width(), widget.get_allocated_height(),
+                    style_context.get_background_color(Gtk.StateFlags.NORMAL),
+                    style_context.get_color(Gtk.StateFlags.NORMAL))
+
+    def render(self, cr, width, height, bg_color, text_color):
         cr.set_source_rgba(*bg_color)
         cr.rectangle(0, 0, width, height)
         cr.fill()
@@ -215,40 +216,27 @@ class PieChart(Gtk.DrawingArea):
         tooltip.set_markup(f"<b>{escaped_category}</b>\nAmount: {slice_info['value']:.1f}\nPercentage: {slice_info['percentage']:.1f}%")
         return True
 
+METRICS = [
+    ('gram', 'Top Foods by Weight (g)'),
+    ('kcal', 'Top Foods by Calories'),
+    ('carbs', 'Top Foods by Carbohydrates (g)'),
+    ('fat', 'Top Foods by Fat (g)'),
+    ('protein', 'Top Foods by Protein (g)'),
+    ('fiber', 'Top Foods by Fiber (g)')
+]
+
+def prepare_macro_data(db_dir):
+    """Worker-thread job: load a private journal copy and aggregate it"""
+    return process_macro_data(load_journal(db_dir), [metric for metric, title in METRICS])
+
 class MacroBreakdownTab(Gtk.Box):
     def __init__(self, window_width, window_height):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         self.set_border_width(10)
-        self.db_dir = self._get_db_dir()
-        self.journal_data = self._load_journal_data()
+        self.db_dir = get_db_dir()
+        self.macro_data = None
         self._create_ui()
-
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
-    def _load_journal_data(self):
-        try:
-            journal_path = os.path.join(self.db_dir, 'journal.json')
-            with open(journal_path, 'r', encoding='utf-8') as f:
-                return json.load(f).get('entries', [])
-        except Exception as e:
-            print(f"Error loading journal data: {e}")
-            return []
-
-    def _process_data(self, key):
-        totals = defaultdict(float)
-        for entry in self.journal_data:
-            totals[entry.get('ate', 'Unknown')] += entry.get(key, 0)
-        return dict(sorted(totals.items(), key=operator.itemgetter(1), reverse=True)[:10])
+        self.update_charts()
 
     def _create_ui(self):
         scrolled = Gtk.ScrolledWindow()
@@ -256,26 +244,25 @@ class MacroBreakdownTab(Gtk.Box):
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
         scrolled.add(main_box)
         
-        metrics = [
-            ('gram', 'Top Foods by Weight (g)'),
-            ('kcal', 'Top Foods by Calories'),
-            ('carbs', 'Top Foods by Carbohydrates (g)'),
-            ('fat', 'Top Foods by Fat (g)'),
-            ('protein', 'Top Foods by Protein (g)'),
-            ('fiber', 'Top Foods by Fiber (g)')
-        ]
-        
-        for i in range(0, len(metrics), 3):
-            row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-            row.set_homogeneous(True)
-            for metric, title in metrics[i:i+3]:
-                row.pack_start(PieChart(title, self._process_data(metric)), True, True, 0)
-            main_box.pack_start(row, False, False, 0)
+        if self.macro_data is None:
+            spinner = Gtk.Spinner()
+            spinner.start()
+            main_box.pack_start(spinner, True, True, 0)
+        else:
+            for i in range(0, len(METRICS), 3):
+                row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+                row.set_homogeneous(True)
+                for metric, title in METRICS[i:i+3]:
+                    row.pack_start(PieChart(title, self.macro_data[metric]), True, True, 0)
+                main_box.pack_start(row, False, False, 0)
         
         self.pack_start(scrolled, True, True, 0)
 
     def update_charts(self):
-        self.journal_data = self._load_journal_data()
+        jobs.submit('macro', prepare_macro_data, self.db_dir, on_done=self._on_macro_data)
+
+    def _on_macro_data(self, macro_data):
+        self.macro_data = macro_data
         
         for child in self.get_children():
             self.remove(child)
@@ -0,0 +1,178 @@
+import gc
+import os
+import sys
+import tracemalloc
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GdkPixbuf
+from .core.ingredient_table import IngredientTable
+from .jobs import jobs
+
+# Methods that rebuild a stats tab's chart from the db; each one removes the
+# old graph widget and packs a new one when its data arrives
+REFRESHERS = ['update_plot', 'update_bmr_plot', 'update_charts',
+              'update_nutrient_plot', 'update_cost_plots', 'update_timeline']
+
+CONTAINERS = (dict, list, tuple, set, frozenset)
+
+def deep_sizeof(obj, seen=None):
+    """Bytes held by obj and everything reachable through plain containers.
+
+    Objects already in seen are not counted again, so passing one set to
+    several calls gives the size those objects share only once. Pixbufs
+    count their pixel buffer and ingredient tables their columns; other
+    objects only count themselves.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, CONTAINERS):
+            stack.extend(item)
+        elif isinstance(item, GdkPixbuf.Pixbuf):
+            total += item.get_byte_length()
+        elif isinstance(item, IngredientTable):
+            total += item.nbytes()
+    return total
+
+def format_bytes(size):
+    if abs(size) < 1024:
+        return f"{size} B"
+    for unit in ['KiB', 'MiB']:
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GiB"
+
+def data_attributes(tabs):
+    """(label, value) for every container or ingredient table held directly by a tab"""
+    for name, tab in tabs.items():
+        for attr, value in sorted(vars(tab).items()):
+            if isinstance(value, CONTAINERS + (IngredientTable,)) and value:
+                yield f"{name}.{attr}", value
+
+def list_stores(tabs):
+    for name, tab in tabs.items():
+        for attr, value in sorted(vars(tab).items()):
+            if isinstance(value, Gtk.ListStore):
+                yield f"{name}.{attr}", value
+
+def store_values_size(store):
+    """Python-side size of a store's values; GTK's own copies aren't visible to Python"""
+    seen = set()
+    return sum(deep_sizeof(value, seen) for row in store for value in row)
+
+def live_graphs():
+    """{class name: [widgets]} for every chart widget still alive"""
+    graphs = {}
+    for obj in gc.get_objects():
+        if isinstance(obj, Gtk.DrawingArea) and type(obj).__module__.startswith('bitewise.'):
+            graphs.setdefault(type(obj).__name__, []).append(obj)
+    return graphs
+
+def graph_rows(graphs):
+    rows = []
+    for name, widgets in sorted(graphs.items()):
+        detached = sum(1 for widget in widgets if widget.get_parent() is None)
+        seen = set()
+        size = sum(deep_sizeof(vars(widget), seen) for widget in widgets)
+        rows.append((name, len(widgets), detached, size))
+    return rows
+
+def snapshot():
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+
+def wait_for_jobs():
+    """Run the main loop until every submitted job has been delivered"""
+    while jobs.pending():
+        Gtk.main_iteration_do(True)
+    while Gtk.events_pending():
+        Gtk.main_iteration()
+
+def refresh_cycles(tabs, cycles):
+    for _ in range(cycles):
+        for tab in tabs.values():
+            for name in REFRESHERS:
+                if hasattr(tab, name):
+                    getattr(tab, name)()
+        wait_for_jobs()
+
+def growth_rows(before, after, limit):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    rows = []
+    for stat in after.compare_to(before, 'lineno')[:limit]:
+        if stat.size_diff == 0:
+            continue
+        frame = stat.traceback[0]
+        filename = os.path.relpath(frame.filename, root) if frame.filename.startswith(root) else frame.filename
+        rows.append(f"  {format_bytes(stat.size_diff):>12}  {stat.count_diff:+8d} blocks  {filename}:{frame.lineno}")
+    return rows
+
+def build_report(tabs, cycles=5, limit=15):
+    """Text report of the memory held by tabs ({name: tab widget}).
+
+    Tracing starts here unless the app was launched with PYTHONTRACEMALLOC
+    set, in which case the totals cover everything since startup. Tracing
+    started here is stopped again once the report is built.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        return _report(tabs, cycles, limit)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+def _report(tabs, cycles, limit):
+    lines = ["Data held by each tab (deep size)"]
+    seen = set()
+    total = unique = 0
+    for label, value in data_attributes(tabs):
+        size = deep_sizeof(value)
+        total += size
+        unique += deep_sizeof(value, seen)
+        lines.append(f"  {label:<34} {len(value):>8} items  {format_bytes(size):>12}")
+    lines.append(f"  {'total':<34} {'':>14}  {format_bytes(total):>12}"
+                 f"  ({format_bytes(unique)} without objects shared between tabs)")
+
+    lines.append("\nList stores")
+    for label, store in list_stores(tabs):
+        lines.append(f"  {label:<34} {len(store):>8} rows x {store.get_n_columns():<2}"
+                     f"  {format_bytes(store_values_size(store)):>12}")
+
+    before_graphs = graph_rows(live_graphs())
+    lines.append("\nChart widgets alive (count, detached, Python-side size)")
+    for name, count, detached, size in before_graphs:
+        lines.append(f"  {name:<34} {count:>8}  {detached:>8}  {format_bytes(size):>12}")
+
+    before = snapshot()
+    refresh_cycles(tabs, cycles)
+    after = snapshot()
+    after_graphs = {name: (count, detached) for name, count, detached, size in graph_rows(live_graphs())}
+
+    lines.append(f"\nAfter {cycles} refresh cycles")
+    for name, count, detached, size in before_graphs:
+        now_count, now_detached = after_graphs.pop(name, (0, 0))
+        lines.append(f"  {name:<34} {count:>4} -> {now_count:<4} alive, {detached} -> {now_detached} detached")
+    for name, (now_count, now_detached) in sorted(after_graphs.items()):
+        lines.append(f"  {name:<34} {0:>4} -> {now_count:<4} alive, 0 -> {now_detached} detached")
+
+    current, peak = tracemalloc.get_traced_memory()
+    lines.append(f"\nTraced memory: {format_bytes(current)} now, {format_bytes(peak)} peak")
+    lines.append("Largest growth by line over the refresh cycles")
+    lines.extend(growth_rows(before, after, limit) or ["  none"])
+    return "\n".join(lines)
@@ -0,0 +1,85 @@
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+
+# Typing pauses shorter than this are treated as one edit
+FILTER_DELAY_MS = 120
+
+class NameFilter:
+    """A picker list of every name in a SearchIndex, filtered and ranked without rebuilding.
+
+    The names are appended to a ListStore once, in alphabetical order. A
+    query marks the matching rows visible and stores their rank, so GTK
+    does the filtering and ordering of the results; only rows that
+    matched the previous or the current query are touched. attach() a
+    TreeView so it can be pointed at the full list or the results.
+    """
+    def __init__(self, index, usage=None):
+        self.index = index
+        self.usage = usage
+        self.store = Gtk.ListStore(str, bool, int)
+        self.iters = {}
+        for name in index.names():
+            self.iters[name] = self.store.append([name, False, 0])
+        self.shown = None
+        self.visible = self.store.filter_new()
+        self.visible.set_visible_column(1)
+        self.results = Gtk.TreeModelSort(model=self.visible)
+        self.results.set_sort_column_id(2, Gtk.SortType.ASCENDING)
+        self.view = None
+
+    @property
+    def model(self):
+        return self.store if self.shown is None else self.results
+
+    def attach(self, view):
+        self.view = view
+        view.set_model(self.model)
+
+    def add_name(self, name):
+        """Give a name added to the index since the list was filled a row"""
+        if name not in self.iters:
+            self.iters[name] = self.store.append([name, False, 0])
+
+    def set_query(self, text):
+        ranked = self.index.ranked(text, self.usage)
+        if ranked is None and self.shown is None:
+            return
+        if self.view:
+            # Detach while rows change so the view doesn't follow every edit
+            self.view.set_model(None)
+        for name in self.shown or []:
+            self.store.set(self.iters[name], 1, False)
+        # Names added to the index after this list was filled have no row
+        self.shown = None if ranked is None else [name for name in ranked if name in self.iters]
+        for rank, name in enumerate(self.shown or []):
+            self.store.set(self.iters[name], 1, True, 2, rank)
+        if self.view:
+            self.view.set_model(self.model)
+
+class FilterDebounce:
+    """Calls apply() once typing in entry has paused for FILTER_DELAY_MS"""
+    def __init__(self, entry, apply):
+        self.apply = apply
+        self.source = None
+        entry.connect("changed", self.on_changed)
+        entry.connect("destroy", lambda widget: self.cancel())
+
+    def on_changed(self, entry):
+        self.cancel()
+        self.source = GLib.timeout_add(FILTER_DELAY_MS, self._fire)
+
+    def cancel(self):
+        if self.source is not None:
+            GLib.source_remove(self.source)
+            self.source = None
+
+    def flush(self):
+        """Apply a pending change right away"""
+        self.cancel()
+        self.apply()
+
+    def _fire(self):
+        self.source = None
+        self.apply()
+        return False
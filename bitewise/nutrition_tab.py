@@ -2,17 +2,27 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GObject, Pango
 import cairo
-import json
-import os
-import sys
-from datetime import datetime
-from collections import OrderedDict
+from datetime import date
+from .core.aggregation import process_nutrient_data
+from .core.profiler import timed
+from .core.storage import get_db_dir, load_journal
+from .downsample import minmax_buckets
+from .hit_test import bar_at
+from .jobs import jobs
+from .label_cache import LabelCache
+from .viewport import DateViewport, ViewportControls, mean_over
 
-class NutrientGraph(Gtk.DrawingArea):
+class NutrientGraph(ViewportControls, Gtk.DrawingArea):
     def __init__(self, nutrient_data):
         super().__init__()
         self.nutrient_data = nutrient_data
+        self.graph_dates = sorted(nutrient_data.keys())
+        self.nutrients = ['protein', 'carbs', 'sugar', 'fat', 'fiber', 'salt']
+        self.series = {n: [nutrient_data[d][n] for d in self.graph_dates] for n in self.nutrients}
+        self.viewport = DateViewport([date.fromisoformat(d).toordinal() for d in self.graph_dates])
+        self.label_cache = LabelCache()
         self.hover_point = None
+        self._sample_key = None
         self.set_hexpand(True)
         self.set_vexpand(True)
         
@@ -23,13 +33,16 @@ class NutrientGraph(Gtk.DrawingArea):
         self.connect("query-tooltip", self.on_query_tooltip)
         self.connect("motion-notify-event", self.on_motion_notify)
         self.connect("leave-notify-event", self.on_leave_notify)
+        self.connect_viewport_controls()
 
+    @timed()
     def on_draw(self, widget, cr):
-        width, height = widget.get_allocated_width(), widget.get_allocated_height()
         style_context = widget.get_style_context()
-        bg_color = style_context.get_background_color(Gtk.StateFlags.NORMAL)
-        text_color = style_context.get_color(Gtk.StateFlags.NORMAL)
-        
+        self.render(cr, widget.get_allocated_width(), widget.get_allocated_height(),
+                    style_context.get_background_color(Gtk.StateFlags.NORMAL),
+                    style_context.get_color(Gtk.StateFlags.NORMAL))
+
+    def render(self, cr, width, height, bg_color, text_color):
         # Draw background
         cr.set_source_rgba(bg_color.red, bg_color.green, bg_color.blue, bg_color.alpha)
         cr.rectangle(0, 0, width, height)
@@ -39,8 +52,19 @@ class NutrientGraph(Gtk.DrawingArea):
             self._draw_no_data_message(cr, width, height, text_color)
             return
         
+        groups = self.viewport.groups()
+        if not groups:
+            self.bar_rects, self.bar_lefts, self.bar_widths = [], [], []
+            self._draw_no_data_message(cr, width, height, text_color, "No nutrient data in this range")
+            return
+        
+        # Zoomed out past single days a bar shows the daily average of its days
+        self.graph_groups = groups
+        self.graph_values = {n: mean_over(self.series[n], groups) for n in self.nutrients}
+        self.graph_totals = [sum(self.graph_values[n][i] for n in self.nutrients) for i in range(len(groups))]
+        
         # Graph configuration - nutrients now in desired stacking order
-        nutrients = ['protein', 'carbs', 'sugar', 'fat', 'fiber', 'salt']
+        nutrients = self.nutrients
         colors = [
             (1.0, 0.8, 0.6, 1.0),  # protein
             (0.4, 0.7, 1.0, 1.0),  # carbs
@@ -51,12 +75,13 @@ class NutrientGraph(Gtk.DrawingArea):
         ]
         
         # Calculate max value with 10% headroom
-        max_value = max(sum(values.values()) for values in self.nutrient_data.values()) * 1.1
+        max_value = max(self.graph_totals) * 1.1 or 1
         
         # Graph dimensions
         left_margin, right_margin, top_margin, bottom_margin = 60, 60, 80, 60
         graph_width = max(width - left_margin - right_margin, 1)
         graph_height = max(height - top_margin - bottom_margin, 1)
+        self.graph_left, self.graph_width = left_margin, graph_width
         
         # Draw axes and labels
         self._draw_axes(cr, width, height, left_margin, right_margin, top_margin, bottom_margin, text_color)
@@ -69,16 +94,17 @@ class NutrientGraph(Gtk.DrawingArea):
             left_margin, bottom_margin, graph_width, graph_height, 
             max_value, text_color
         )
+        self.bar_lefts = [b['x_pos'] for b in self.bar_rects]
+        self.bar_widths = [b['width'] for b in self.bar_rects]
         
         # Draw title and legend
         self._draw_title(cr, width, text_color)
         self._draw_legend(cr, width, nutrients, colors, text_color)
 
-    def _draw_no_data_message(self, cr, width, height, text_color):
+    def _draw_no_data_message(self, cr, width, height, text_color, text="No nutrient data available"):
         cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
         cr.set_font_size(14)
-        text = "No nutrient data available"
         extents = cr.text_extents(text)
         cr.move_to(width/2 - extents[2]/2, height/2 - extents[3]/2)
         cr.show_text(text)
@@ -114,48 +140,52 @@ class NutrientGraph(Gtk.DrawingArea):
             cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
 
     def _draw_x_labels(self, cr, width, height, left_margin, bottom_margin, graph_width, text_color):
-        dates = sorted(self.nutrient_data.keys())
+        groups = self.graph_groups
         cr.set_font_size(10)
-        step = max(1, len(dates) // 10)
+        step = max(1, len(groups) // 10)
         
-        for i in range(0, len(dates), step):
-            if i >= len(dates):
-                continue
-            date_str = dates[i]
-            try:
-                label = datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %d")
-            except:
-                label = date_str
-            x_pos = left_margin + (i * graph_width / max(len(dates) - 1, 1))
-            extents = cr.text_extents(label)
+        for i in range(0, len(groups), step):
+            label = self.viewport.label(groups[i])
+            x_pos = left_margin + (i * graph_width / max(len(groups) - 1, 1))
+            extents = self.label_cache.text_extents(cr, label)
             cr.move_to(x_pos - extents[2]/2, height - bottom_margin + extents[3] + 5)
             cr.show_text(label)
 
     def _draw_bars(self, cr, nutrients, colors, width, height, left_margin, bottom_margin, 
                   graph_width, graph_height, max_value, text_color):
-        dates = sorted(self.nutrient_data.keys())
-        num_dates = len(dates)
-        bar_width = 40 if num_dates <= 1 else min(30, graph_width / num_dates)
-        bar_spacing = 0 if num_dates <= 1 else (graph_width - (num_dates * bar_width)) / (num_dates - 1)
+        num_dates = len(self.graph_groups)
+        buckets = self._sampled_buckets(graph_width)
+        
+        if len(buckets) < num_dates:
+            # More days than room for bars: each slot shows its highest day,
+            # with a tick at the lowest day's total
+            bar_specs = [(start, end, min_idx, max_idx, left_margin + start * graph_width / num_dates,
+                          (end - start) * graph_width / num_dates) for start, end, min_idx, max_idx in buckets]
+        else:
+            bar_width = 40 if num_dates <= 1 else min(30, graph_width / num_dates)
+            bar_spacing = 0 if num_dates <= 1 else (graph_width - (num_dates * bar_width)) / (num_dates - 1)
+            bar_specs = []
+            for i in range(num_dates):
+                x_pos = left_margin + (graph_width / 2 if num_dates == 1 else 
+                                    (i * (bar_width + bar_spacing)) + (bar_width / 2))
+                bar_specs.append((i, i + 1, i, i, x_pos - bar_width/2, bar_width))
         
         bar_rects = []
-        for i, date in enumerate(dates):
-            x_pos = left_margin + (graph_width / 2 if num_dates == 1 else 
-                                (i * (bar_width + bar_spacing)) + (bar_width / 2))
+        for start, end, min_idx, max_idx, x0, bar_width in bar_specs:
             bottom_y = height - bottom_margin
             current_bottom = bottom_y
             bar_rects_for_date = []
             
             # Draw nutrients in reverse order so first in list is on top
             for j, nutrient in enumerate(reversed(nutrients)):
-                value = self.nutrient_data[date][nutrient]
+                value = self.graph_values[nutrient][max_idx]
                 if value <= 0:
                     continue
                     
                 bar_height = (value / max_value) * graph_height
                 y_pos = current_bottom - bar_height
                 is_hovered = (self.hover_point is not None and 
-                             self.hover_point[0] == i and 
+                             self.hover_point[0] == max_idx and 
                              self.hover_point[1] == nutrient)
                 
                 # Draw bar
@@ -165,31 +195,47 @@ class NutrientGraph(Gtk.DrawingArea):
                     cr.set_source_rgba(min(1.0, r + 0.2), min(1.0, g + 0.2), min(1.0, b + 0.2), a)
                 else:
                     cr.set_source_rgba(r, g, b, a)
-                cr.rectangle(x_pos - bar_width/2, y_pos, bar_width, bar_height)
+                cr.rectangle(x0, y_pos, bar_width, bar_height)
                 cr.fill()
                 
                 # Add border for hovered segment
                 if is_hovered:
                     cr.set_source_rgba(1, 1, 1, 0.8)
                     cr.set_line_width(1.5)
-                    cr.rectangle(x_pos - bar_width/2, y_pos, bar_width, bar_height)
+                    cr.rectangle(x0, y_pos, bar_width, bar_height)
                     cr.stroke()
                 
                 bar_rects_for_date.append({
                     'nutrient': nutrient,
-                    'rect': (x_pos - bar_width/2, y_pos, bar_width, bar_height),
+                    'rect': (x0, y_pos, bar_width, bar_height),
                     'value': value
                 })
                 current_bottom = y_pos
             
+            if min_idx != max_idx:
+                min_y = bottom_y - (self.graph_totals[min_idx] / max_value) * graph_height
+                cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, 0.6)
+                cr.set_line_width(1)
+                cr.move_to(x0, min_y)
+                cr.line_to(x0 + bar_width, min_y)
+                cr.stroke()
+            
             bar_rects.append({
-                'date': date,
+                'index': max_idx,
                 'rects': bar_rects_for_date,
-                'x_pos': x_pos - bar_width/2,
+                'x_pos': x0,
                 'width': bar_width
             })
         return bar_rects
 
+    def _sampled_buckets(self, graph_width):
+        # Bucket days into 2px slots; only redone on resize or zoom
+        key = (int(graph_width), self.viewport.start, self.viewport.end)
+        if self._sample_key != key:
+            self._sample_key = key
+            self._sample_buckets = minmax_buckets(self.graph_totals, max(1, int(graph_width) // 2))
+        return self._sample_buckets
+
     def _draw_title(self, cr, width, text_color):
         cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
@@ -238,19 +284,23 @@ class NutrientGraph(Gtk.DrawingArea):
             current_x += swatch_size + text_spacing + nutrient_widths[i] + item_spacing
 
     def on_motion_notify(self, widget, event):
-        if not hasattr(self, 'bar_rects'):
+        if self.drag_motion(event):
+            return True
+        if not hasattr(self, 'bar_lefts'):
             return False
         
-        for date_idx, date_data in enumerate(self.bar_rects):
-            x_pos, width = date_data['x_pos'], date_data['width']
-            if x_pos <= event.x <= x_pos + width:
-                for rect_data in date_data['rects']:
-                    rx, ry, rw, rh = rect_data['rect']
-                    if ry <= event.y <= ry + rh:
-                        if self.hover_point != (date_idx, rect_data['nutrient']):
-                            self.hover_point = (date_idx, rect_data['nutrient'])
-                            self.queue_draw()
-                        return True
+        # Bars are laid out left to right, so the column is found by bisection
+        bar = bar_at(self.bar_lefts, self.bar_widths, event.x)
+        if bar is not None:
+            date_data = self.bar_rects[bar]
+            date_idx = date_data['index']
+            for rect_data in date_data['rects']:
+                rx, ry, rw, rh = rect_data['rect']
+                if ry <= event.y <= ry + rh:
+                    if self.hover_point != (date_idx, rect_data['nutrient']):
+                        self.hover_point = (date_idx, rect_data['nutrient'])
+                        self.queue_draw()
+                    return True
         if self.hover_point is not None:
             self.hover_point = None
             self.queue_draw()
@@ -266,55 +316,29 @@ class NutrientGraph(Gtk.DrawingArea):
             return False
         
         date_idx, nutrient = self.hover_point
-        date = self.bar_rects[date_idx]['date']
-        value = next(r['value'] for r in self.bar_rects[date_idx]['rects'] if r['nutrient'] == nutrient)
+        group = self.graph_groups[date_idx]
+        value = self.graph_values[nutrient][date_idx]
+        days = group[1] - group[0]
         
-        try:
-            date_str = datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
-        except:
-            date_str = date
+        date_str = self.viewport.label(group, long=True)
+        if days > 1:
+            date_str += f" (avg of {days} days)"
         
         tooltip.set_markup(f"<b>{date_str}</b>\n{nutrient.capitalize()}: {value:.1f}g")
         return True
 
+def prepare_nutrient_data(db_dir):
+    """Worker-thread job: load a private journal copy and aggregate it"""
+    return process_nutrient_data(load_journal(db_dir))
+
 class NutritionTab(Gtk.Box):
     def __init__(self, window_width, window_height):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         self.set_border_width(10)
-        self.db_dir = self._get_db_dir()
-        self._load_and_process_data()
+        self.db_dir = get_db_dir()
+        self.nutrient_data = None
         self.create_nutrient_plot()
-
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
-    def _load_and_process_data(self):
-        try:
-            journal_path = os.path.join(self.db_dir, 'journal.json')
-            with open(journal_path, 'r', encoding='utf-8') as f:
-                entries = json.load(f).get('entries', [])
-        except Exception as e:
-            print(f"Error loading journal data: {e}")
-            entries = []
-        
-        self.nutrient_data = OrderedDict()
-        for entry in entries:
-            if not entry.get('date'):
-                continue
-            date = entry['date']
-            if date not in self.nutrient_data:
-                self.nutrient_data[date] = {n: 0.0 for n in ['protein', 'carbs', 'sugar', 'fat', 'fiber', 'salt']}
-            for nutrient in self.nutrient_data[date]:
-                self.nutrient_data[date][nutrient] += entry.get(nutrient, 0)
+        self.update_nutrient_plot()
 
     def create_nutrient_plot(self):
         scrolled = Gtk.ScrolledWindow()
@@ -322,7 +346,11 @@ class NutritionTab(Gtk.Box):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         scrolled.add(box)
         
-        if not self.nutrient_data:
+        if self.nutrient_data is None:
+            spinner = Gtk.Spinner()
+            spinner.start()
+            box.pack_start(spinner, True, True, 0)
+        elif not self.nutrient_data:
             box.pack_start(Gtk.Label(label="No nutrient data available"), True, True, 0)
         else:
             box.pack_start(NutrientGraph(self.nutrient_data), True, True, 0)
@@ -330,7 +358,10 @@ class NutritionTab(Gtk.Box):
         self.pack_start(scrolled, True, True, 0)
 
     def update_nutrient_plot(self):
-        self._load_and_process_data()
+        jobs.submit('nutrition', prepare_nutrient_data, self.db_dir, on_done=self._on_nutrient_data)
+
+    def _on_nutrient_data(self, nutrient_data):
+        self.nutrient_data = nutrient_data
         for child in self.get_children():
             self.remove(child)
         self.create_nutrient_plot()
@@ -0,0 +1,112 @@
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+from .core.rankings import METRICS
+
+# Store columns
+RANK, NAME, VALUE, KCAL, PROTEIN, COST, ROW = range(7)
+
+class RankingsDialog(Gtk.Dialog):
+    """Top ingredients by a ranking in METRICS, such as protein per kcal or cost per protein.
+
+    Rankings come from the table's derived columns, so switching metric or
+    count is a top-k pick over values computed once per table change.
+    rows, when given, limits the ranking to those table rows (the ones the
+    filter matches); on_activate(row) runs for a double-clicked ingredient.
+    """
+    def __init__(self, parent, table, rows=None, on_activate=None):
+        super().__init__(title="Ingredient Rankings", transient_for=parent, modal=True)
+        self.set_default_size(640, 520)
+        self.table = table
+        self.rows = rows
+        self.on_activate = on_activate
+
+        content_area = self.get_content_area()
+        content_area.set_spacing(10)
+        content_area.set_border_width(10)
+
+        controls = Gtk.Box(spacing=10)
+        content_area.pack_start(controls, False, False, 0)
+
+        self.metric_combo = Gtk.ComboBoxText()
+        for key, metric in METRICS.items():
+            self.metric_combo.append(key, metric.label)
+        self.metric_combo.set_active(0)
+        self.metric_combo.connect("changed", self.on_changed)
+        controls.pack_start(self.metric_combo, True, True, 0)
+
+        controls.pack_start(Gtk.Label(label="Show"), False, False, 0)
+        self.count_spin = Gtk.SpinButton.new_with_range(5, 1000, 5)
+        self.count_spin.set_value(25)
+        self.count_spin.connect("value-changed", self.on_changed)
+        controls.pack_start(self.count_spin, False, False, 0)
+
+        self.filter_check = Gtk.CheckButton(label="Only filtered ingredients")
+        self.filter_check.set_active(rows is not None)
+        self.filter_check.set_sensitive(rows is not None)
+        self.filter_check.connect("toggled", self.on_changed)
+        controls.pack_start(self.filter_check, False, False, 0)
+
+        self.status_label = Gtk.Label()
+        self.status_label.set_xalign(0)
+        content_area.pack_start(self.status_label, False, False, 0)
+
+        self.store = Gtk.ListStore(int, str, str, str, str, str, int)
+        self.tree = Gtk.TreeView(model=self.store)
+        self.value_column = None
+        for title, index in [("#", RANK), ("Ingredient", NAME), ("", VALUE),
+                             ("Kcal", KCAL), ("Protein", PROTEIN), ("Cost/hg", COST)]:
+            renderer = Gtk.CellRendererText()
+            if index != NAME:
+                renderer.set_property("xalign", 1.0)
+            column = Gtk.TreeViewColumn(title, renderer, text=index)
+            column.set_resizable(True)
+            column.set_expand(index == NAME)
+            if index != NAME:
+                column.set_alignment(1.0)
+            if index == VALUE:
+                self.value_column = column
+            self.tree.append_column(column)
+        self.tree.connect("row-activated", self.on_row_activated)
+
+        scrolled_window = Gtk.ScrolledWindow()
+        scrolled_window.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scrolled_window.add(self.tree)
+        frame = Gtk.Frame()
+        frame.add(scrolled_window)
+        content_area.pack_start(frame, True, True, 0)
+
+        self.add_button("Close", Gtk.ResponseType.CLOSE)
+        self._show_ranking()
+        self.show_all()
+
+    def on_changed(self, widget):
+        self._show_ranking()
+
+    def _show_ranking(self):
+        key = self.metric_combo.get_active_id()
+        metric = METRICS[key]
+        rows = self.rows if self.filter_check.get_active() else None
+        best = self.table.top(key, self.count_spin.get_value_as_int(), rows)
+        values = self.table.ranking(key)
+
+        self.value_column.set_title(metric.label)
+        self.tree.set_model(None)
+        self.store.clear()
+        for rank, row in enumerate(best, start=1):
+            self.store.append([
+                rank,
+                self.table.names[row],
+                metric.format.format(values[row]),
+                f"{self.table.value(row, 'kcal'):.0f}",
+                f"{self.table.value(row, 'protein'):.1f}",
+                f"{self.table.value(row, 'cost'):.2f}",
+                row
+            ])
+        self.tree.set_model(self.store)
+        order = "highest" if metric.higher_is_better else "lowest"
+        self.status_label.set_text(f"{len(best)} ingredients with the {order} {metric.label.lower()}")
+
+    def on_row_activated(self, treeview, path, column):
+        if self.on_activate:
+            self.on_activate(self.store[path][ROW])
@@ -1,24 +1,35 @@
 import gi
 import json
-import os
-import sys
 import base64
 import zlib
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk, GdkPixbuf
+from gi.repository import GObject, Gtk, Gdk, GdkPixbuf
+from .columns_dialog import ColumnsDialog
+from .core import nutrients
+from .core.aggregation import usage_stats
+from .core.models import NUTRIENTS, ingredient_amount, recipe_totals
+from .core.search_index import shared_index
+from .core.storage import get_db_dir, load_ingredients, load_recipes, load_settings, save_recipes
+from .name_filter import FilterDebounce, NameFilter
+
+# Cell formats of the recipe ingredient columns and per-portion header: gram, kcal..protein, fiber and salt, cost
+FORMATS = {1: "{:.1f}", 2: "{:.1f}", 3: "{:.1f}", 4: "{:.1f}", 5: "{:.1f}",
+           6: "{:.2f}", 7: "{:.2f}", 8: "{:.2f}", 9: "{:.3f}"}
+
+# Hidden ingredient store column holding a row's micronutrient dict, or None
+MICRO = 10
 
 class AddIngredientDialog(Gtk.Dialog):
-    def __init__(self, parent, ingredients_data):
+    def __init__(self, parent, ingredient_index, usage=None):
         super().__init__(title="Add Ingredient", transient_for=parent, modal=True)
         self.set_default_size(400, 400)
-        self.ingredients_data = ingredients_data
-        self.filtered_ingredients = ingredients_data.copy()
+        self.ingredient_names = NameFilter(ingredient_index, usage)
         
         self.filter_entry = Gtk.Entry(placeholder_text="Filter ingredients...")
-        self.filter_entry.connect("changed", self.on_filter_changed)
+        self.filter_debounce = FilterDebounce(self.filter_entry, self.on_filter_changed)
 
-        self.ingredients_list = Gtk.ListStore(str)
-        self.ingredients_view = Gtk.TreeView(model=self.ingredients_list)
+        self.ingredients_view = Gtk.TreeView()
+        self.ingredient_names.attach(self.ingredients_view)
         self.ingredients_view.set_headers_visible(False)
         renderer = Gtk.CellRendererText()
         column = Gtk.TreeViewColumn("Ingredients", renderer, text=0)
@@ -64,24 +75,10 @@ class AddIngredientDialog(Gtk.Dialog):
         add_button.connect("clicked", self.on_add_clicked)
         button_box.pack_start(add_button, False, False, 0)
 
-        self.update_lists()
         self.show_all()
 
-    def update_lists(self):
-        self.ingredients_list.clear()
-        for item in self.filtered_ingredients:
-            self.ingredients_list.append([item['name']])
-
-    def on_filter_changed(self, entry):
-        filter_text = entry.get_text().lower()
-        if not filter_text:
-            self.filtered_ingredients = self.ingredients_data.copy()
-        else:
-            self.filtered_ingredients = [
-                item for item in self.ingredients_data 
-                if filter_text in item['name'].lower()
-            ]
-        self.update_lists()
+    def on_filter_changed(self):
+        self.ingredient_names.set_query(self.filter_entry.get_text())
 
     def on_add_clicked(self, widget):
         selection = self.ingredients_view.get_selection()
@@ -355,7 +352,7 @@ class RecipesTab(Gtk.Box):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         self.set_border_width(10)
         self.parent = parent
-        self.db_dir = self._get_db_dir()
+        self.db_dir = get_db_dir()
         self.ingredients_data = []
         self.recipes_data = []
         self.current_recipe = None
@@ -367,71 +364,69 @@ class RecipesTab(Gtk.Box):
         self.connect("map", self._on_map)
         self._update_button_states()
 
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
     def _load_ingredients(self):
-        try:
-            ingredients_path = os.path.join(self.db_dir, 'ingredients.json')
-            with open(ingredients_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.ingredients_data = data['ingredients']
-        except Exception as e:
-            print(f"Error loading ingredients from {ingredients_path}: {e}")
+        self.ingredients_data = load_ingredients(self.db_dir)
+        shared_index('ingredients').sync(i['name'] for i in self.ingredients_data)
 
     def reload_ingredients(self):
         self._load_ingredients()
         if self.current_recipe:
             self._load_recipe_details(self.current_recipe)
 
+    def reload_recipes(self):
+        self._load_recipes()
+        if self.current_recipe:
+            self._load_recipe_details(self.current_recipe)
+
     def _load_recipes(self):
-        try:
-            recipes_path = os.path.join(self.db_dir, 'recipes.json')
-            with open(recipes_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.recipes_data = data['recipes']
-                self._update_recipe_store()
-        except Exception as e:
-            print(f"Error loading recipes from {recipes_path}: {e}")
+        self.recipes_data = load_recipes(self.db_dir)
+        self._update_recipe_store()
 
     def _update_recipe_store(self):
         self.recipe_store.clear()
         for recipe in sorted(self.recipes_data, key=lambda x: x['name'].lower()):
-            ingredients = recipe['ingredients']
-            self.recipe_store.append([
-                recipe['name'],
-                sum(ing['gram'] for ing in ingredients),
-                sum(ing['kcal'] for ing in ingredients),
-                sum(ing['carbs'] for ing in ingredients),
-                sum(ing['sugar'] for ing in ingredients),
-                sum(ing['fat'] for ing in ingredients),
-                sum(ing['protein'] for ing in ingredients),
-                sum(ing['fiber'] for ing in ingredients),
-                sum(ing['salt'] for ing in ingredients),
-                sum(ing['cost'] for ing in ingredients)
-            ])
+            totals = recipe_totals(recipe['ingredients'])
+            micro = totals.get('micro', {})
+            self.recipe_store.append([recipe['name']] + [
+                totals[key] if key in totals else micro.get(key, 0.0) for key in self.recipe_keys])
+
+    def _set_recipe_columns(self, keys):
+        """Show grams and these nutrient keys per recipe; the store is rebuilt to hold them"""
+        self.recipe_keys = ['gram'] + list(keys)
+        self.recipe_store = Gtk.ListStore(*([str] + [float] * len(self.recipe_keys)))
+        for column in self.recipe_tree.get_columns():
+            self.recipe_tree.remove_column(column)
+        self.recipe_tree.set_model(self.recipe_store)
+        columns = [("Recipe Name", 0.4)]
+        formats = [None]
+        for key in self.recipe_keys:
+            if key == 'gram':
+                columns.append(("Gram", 0.07))
+                formats.append("{:.1f}")
+            else:
+                columns.append((nutrients.get(key).title, 0.04 if key == 'cost' else 0.07))
+                formats.append(nutrients.get(key).format)
+        self._create_columns(self.recipe_tree, columns, sortable=True, formats=formats)
+        self.recipe_store.set_sort_column_id(0, Gtk.SortType.ASCENDING)
+
+    def _on_columns_clicked(self, widget):
+        dialog = ColumnsDialog(self.get_toplevel(), self.db_dir, 'recipes')
+        dialog.run()
+        keys = dialog.keys
+        dialog.destroy()
+        
+        if keys is not None:
+            self._set_recipe_columns(keys)
+            self._update_recipe_store()
+            self.recipe_tree.queue_resize()
 
     def _init_widgets(self, window_width):
-        self.recipe_store = Gtk.ListStore(str, float, float, float, float, float, float, float, float, float)
-        self.recipe_tree = Gtk.TreeView(model=self.recipe_store)
-        self._create_columns(self.recipe_tree, [
-            ("Recipe Name", 0.4), ("Gram", 0.07), ("Kcal", 0.07), ("Carbs", 0.07), ("Sugar", 0.07),
-            ("Fat", 0.07), ("Protein", 0.07), ("Fiber", 0.07), ("Salt", 0.07), ("Cost", 0.04)
-        ], sortable=True)
+        self.recipe_tree = Gtk.TreeView()
+        self._set_recipe_columns(nutrients.visible_columns(load_settings(self.db_dir), 'recipes'))
         
         selection = self.recipe_tree.get_selection()
         selection.set_mode(Gtk.SelectionMode.SINGLE)
         self.recipe_tree.connect("row-activated", self.on_recipe_activated)
-        self.recipe_store.set_sort_column_id(0, Gtk.SortType.ASCENDING)
 
         recipe_scrolled = Gtk.ScrolledWindow()
         recipe_scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
@@ -450,6 +445,7 @@ class RecipesTab(Gtk.Box):
         self.copy_btn = Gtk.Button(label="⎘ Copy Recipe")
         self.scale_btn = Gtk.Button(label="⚖️ Scale Recipe")
         self.save_btn = Gtk.Button(label="💾 Save Recipe")
+        self.columns_btn = Gtk.Button(label="☰ Columns")
         
         self.delete_btn.connect("clicked", self._on_delete_recipe_clicked)
         self.new_btn.connect("clicked", self._on_new_recipe_clicked)
@@ -458,9 +454,10 @@ class RecipesTab(Gtk.Box):
         self.copy_btn.connect("clicked", self._on_copy_recipe_clicked)
         self.scale_btn.connect("clicked", self._on_scale_recipe_clicked)
         self.save_btn.connect("clicked", self._on_save_recipe_clicked)
+        self.columns_btn.connect("clicked", self._on_columns_clicked)
         
         for btn in [self.delete_btn, self.new_btn, self.import_btn, self.export_btn, 
-                   self.copy_btn, self.scale_btn, self.save_btn]:
+                   self.copy_btn, self.scale_btn, self.save_btn, self.columns_btn]:
             button_box.pack_start(btn, True, True, 0)
 
         self.lower_container = Gtk.HPaned()
@@ -470,7 +467,8 @@ class RecipesTab(Gtk.Box):
 
         self.left_container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         
-        self.ingredient_store = Gtk.ListStore(str, float, float, float, float, float, float, float, float, float)
+        self.ingredient_store = Gtk.ListStore(str, float, float, float, float, float, float, float, float, float,
+                                              GObject.TYPE_PYOBJECT)
         self.ingredient_tree = Gtk.TreeView(model=self.ingredient_store)
         self._create_columns(self.ingredient_tree, [
             ("Ingredient", 0.19), ("Gram", 0.10), ("Kcal", 0.09), ("Carbs", 0.10), ("Sugar", 0.10),
@@ -699,7 +697,8 @@ class RecipesTab(Gtk.Box):
                         ingredient['protein'],
                         ingredient['fiber'],
                         ingredient['salt'],
-                        ingredient['cost']
+                        ingredient['cost'],
+                        ingredient.get('micro')
                     ])
                     totals[0] += ingredient['gram']
                     totals[1] += ingredient['kcal']
@@ -762,16 +761,11 @@ class RecipesTab(Gtk.Box):
                 if new_gram_value > 0:
                     ingredient = next((i for i in self.ingredients_data if i['name'] == ingredient_name), None)
                     if ingredient:
-                        factor = new_gram_value / 100
+                        amount = ingredient_amount(ingredient, new_gram_value)
                         model.set_value(treeiter, 1, new_gram_value)
-                        model.set_value(treeiter, 2, ingredient['kcal'] * factor)
-                        model.set_value(treeiter, 3, ingredient['carbs'] * factor)
-                        model.set_value(treeiter, 4, ingredient['sugar'] * factor)
-                        model.set_value(treeiter, 5, ingredient['fat'] * factor)
-                        model.set_value(treeiter, 6, ingredient['protein'] * factor)
-                        model.set_value(treeiter, 7, ingredient['fiber'] * factor)
-                        model.set_value(treeiter, 8, ingredient['salt'] * factor)
-                        model.set_value(treeiter, 9, ingredient['cost'] * factor)
+                        for column, key in enumerate(NUTRIENTS, start=2):
+                            model.set_value(treeiter, column, amount[key])
+                        model.set_value(treeiter, MICRO, amount.get('micro'))
                         self._update_per_portion_values()
                         self._update_current_recipe()
             except ValueError:
@@ -785,25 +779,23 @@ class RecipesTab(Gtk.Box):
         if not recipe:
             return
             
-        recipe['ingredients'] = []
-        for row in self.ingredient_store:
-            recipe['ingredients'].append({
-                'name': row[0],
-                'gram': row[1],
-                'kcal': row[2],
-                'carbs': row[3],
-                'sugar': row[4],
-                'fat': row[5],
-                'protein': row[6],
-                'fiber': row[7],
-                'salt': row[8],
-                'cost': row[9]
-            })
+        recipe['ingredients'] = [self._row_ingredient(row) for row in self.ingredient_store]
         
         self._update_recipe_store()
 
+    def _row_ingredient(self, row):
+        """Recipe ingredient record of an ingredient store row"""
+        ingredient = {'name': row[0], 'gram': row[1]}
+        for column, key in enumerate(NUTRIENTS, start=2):
+            ingredient[key] = row[column]
+        if row[MICRO]:
+            ingredient['micro'] = row[MICRO]
+        return ingredient
+
     def _on_add_ingredient_clicked(self, widget):
-        dialog = AddIngredientDialog(self.get_toplevel(), self.ingredients_data)
+        journal_tab = getattr(self.parent, 'journal_tab', None)
+        usage = usage_stats(journal_tab.journal_data) if journal_tab else None
+        dialog = AddIngredientDialog(self.get_toplevel(), shared_index('ingredients'), usage)
         response = dialog.run()
         
         if response == Gtk.ResponseType.OK:
@@ -814,19 +806,9 @@ class RecipesTab(Gtk.Box):
             if not ingredient:
                 return
 
-            factor = gram / 100
-            self.ingredient_store.append([
-                ingredient['name'],
-                gram,
-                ingredient['kcal'] * factor,
-                ingredient['carbs'] * factor,
-                ingredient['sugar'] * factor,
-                ingredient['fat'] * factor,
-                ingredient['protein'] * factor,
-                ingredient['fiber'] * factor,
-                ingredient['salt'] * factor,
-                ingredient['cost'] * factor
-            ])
+            amount = ingredient_amount(ingredient, gram)
+            self.ingredient_store.append([ingredient['name'], gram] + [amount[key] for key in NUTRIENTS]
+                                         + [amount.get('micro')])
             self.ingredient_store.set_sort_column_id(0, Gtk.SortType.ASCENDING)
             self._update_per_portion_values()
             self._update_current_recipe()
@@ -946,20 +928,7 @@ class RecipesTab(Gtk.Box):
         except ValueError:
             portions = 1
             
-        ingredients = []
-        for row in self.ingredient_store:
-            ingredients.append({
-                'name': row[0],
-                'gram': row[1],
-                'kcal': row[2],
-                'carbs': row[3],
-                'sugar': row[4],
-                'fat': row[5],
-                'protein': row[6],
-                'fiber': row[7],
-                'salt': row[8],
-                'cost': row[9]
-            })
+        ingredients = [self._row_ingredient(row) for row in self.ingredient_store]
             
         buffer = self.instructions.get_buffer()
         start_iter = buffer.get_start_iter()
@@ -1002,9 +971,7 @@ class RecipesTab(Gtk.Box):
 
     def _save_recipes_to_file(self):
         try:
-            recipes_path = os.path.join(self.db_dir, 'recipes.json')
-            with open(recipes_path, 'w', encoding='utf-8') as f:
-                json.dump({'recipes': self.recipes_data}, f, indent=2, ensure_ascii=False)
+            save_recipes(self.db_dir, self.recipes_data)
             if self.parent and hasattr(self.parent, 'on_recipes_changed'):
                 self.parent.on_recipes_changed()
         except Exception as e:
@@ -1039,35 +1006,28 @@ class RecipesTab(Gtk.Box):
         columns = self.header_tree.get_columns()
         if len(columns) != len(per_portion_values) + 1:
             return
-        format_mapping = {
-            1: "{:.1f}",
-            2: "{:.1f}",
-            3: "{:.1f}",
-            4: "{:.1f}",
-            5: "{:.1f}",
-            6: "{:.2f}",
-            7: "{:.2f}",
-            8: "{:.2f}",
-            9: "{:.3f}"
-        }
         
         for i, value in enumerate(per_portion_values):
             col_index = i + 1
             if col_index < len(columns):
                 try:
-                    formatted = format_mapping.get(col_index, "{}").format(float(value))
+                    formatted = FORMATS.get(col_index, "{}").format(float(value))
                     columns[col_index].set_title(formatted)
                 except Exception:
                     columns[col_index].set_title(str(value))
 
-    def _create_columns(self, treeview, columns, sortable=False):
+    def _create_columns(self, treeview, columns, sortable=False, formats=None):
+        # Trees whose columns are rebuilt already follow their allocation
+        if not hasattr(treeview, 'proportions'):
+            treeview.connect("size-allocate", self._update_column_widths)
         treeview.proportions = []
         for idx, (col_name, proportion) in enumerate(columns):
             renderer = Gtk.CellRendererText()
             if idx != 0:
                 renderer.set_property("xalign", 1.0)
             col = Gtk.TreeViewColumn(col_name, renderer)
-            col.set_cell_data_func(renderer, self.cell_data_func, idx)
+            cell_format = formats[idx] if formats else FORMATS.get(idx, "{}")
+            col.set_cell_data_func(renderer, self.cell_data_func, (idx, cell_format))
             if idx != 0:
                 col.set_alignment(1.0)
             col.set_resizable(True)
@@ -1079,7 +1039,6 @@ class RecipesTab(Gtk.Box):
                 
             treeview.append_column(col)
             treeview.proportions.append(proportion)
-        treeview.connect("size-allocate", self._update_column_widths)
 
     def _sort_func(self, model, iter1, iter2, sort_column_id):
         val1 = model.get_value(iter1, sort_column_id)
@@ -1093,24 +1052,14 @@ class RecipesTab(Gtk.Box):
         except (ValueError, TypeError):
             return 0
 
-    def cell_data_func(self, column, cell, model, iter, col_index):
-        format_mapping = {
-            1: "{:.1f}",
-            2: "{:.1f}",
-            3: "{:.1f}",
-            4: "{:.1f}",
-            5: "{:.1f}",
-            6: "{:.2f}",
-            7: "{:.2f}",
-            8: "{:.2f}",
-            9: "{:.3f}"
-        }
+    def cell_data_func(self, column, cell, model, iter, data):
+        col_index, cell_format = data
         value = model.get_value(iter, col_index)
         if col_index == 0:
             cell.set_property("text", str(value))
         else:
             try:
-                formatted = format_mapping.get(col_index, "{}").format(float(value))
+                formatted = cell_format.format(float(value))
             except Exception:
                 formatted = str(value)
             cell.set_property("text", formatted)
@@ -1,12 +1,14 @@
-import os
-import json
-import sys
 from datetime import datetime, timedelta
-from collections import defaultdict
 from math import pi
 import gi
 from gi.repository import Gtk, Gdk, GObject
 import cairo
+from .core.aggregation import entries_by_date
+from .core.profiler import timed
+from .core.storage import get_db_dir, load_journal
+from .hit_test import CircleGrid
+from .jobs import jobs
+from .label_cache import LabelCache
 
 gi.require_version("Gtk", "3.0")
 
@@ -34,17 +36,9 @@ class TimelineVisualizer:
         return [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in reversed(range(days))]
 
     def process_journal_data(self, journal_data):
-        """Organize journal entries by date"""
-        timeline_data = defaultdict(list)
-        for entry in journal_data:
-            if isinstance(entry, dict) and entry.get('date') and entry.get('timestamp'):
-                timeline_data[entry['date']].append(entry)
-        
-        # Sort entries by timestamp within each date
-        for date in timeline_data:
-            timeline_data[date].sort(key=lambda x: x.get('timestamp', ''))
-        
-        return timeline_data
+        """Organize journal entries by date as (parsed timestamp, entry) pairs"""
+        # Parsed once here; drawing and tooltips reuse the datetime
+        return entries_by_date(journal_data)
 
     @staticmethod
     def escape_markup(text):
@@ -68,20 +62,25 @@ class TimelineGraph(Gtk.DrawingArea):
         # Setup hover interaction
         self.hover_meal = None
         self.meal_circles = []
+        self.meal_grid = CircleGrid([])
+        self._layout_key = None
+        self._date_range_key = None
+        self.label_cache = LabelCache()
         self.set_has_tooltip(True)
         self.connect("query-tooltip", self.on_query_tooltip)
         self.add_events(Gdk.EventMask.POINTER_MOTION_MASK | Gdk.EventMask.LEAVE_NOTIFY_MASK)
         self.connect("motion-notify-event", self.on_motion_notify)
         self.connect("leave-notify-event", self.on_leave_notify)
 
+    @timed()
     def on_draw(self, widget, cr):
-        width, height = widget.get_allocated_width(), widget.get_allocated_height()
-        
-        # Setup background
         style_context = widget.get_style_context()
-        bg_color = style_context.get_background_color(Gtk.StateFlags.NORMAL)
-        text_color = style_context.get_color(Gtk.StateFlags.NORMAL)
-        
+        self.render(cr, widget.get_allocated_width(), widget.get_allocated_height(),
+                    style_context.get_background_color(Gtk.StateFlags.NORMAL),
+                    style_context.get_color(Gtk.StateFlags.NORMAL))
+
+    def render(self, cr, width, height, bg_color, text_color):
+        """Draw the timeline; needs no realized widget, so any cairo surface will do"""
         cr.set_source_rgba(bg_color.red, bg_color.green, bg_color.blue, bg_color.alpha)
         cr.rectangle(0, 0, width, height)
         cr.fill()
@@ -96,8 +95,12 @@ class TimelineGraph(Gtk.DrawingArea):
         graph_width = max(width - left_margin - right_margin - 20, 1)
         graph_height = max(height - top_margin - bottom_margin - 20, 1)
         
-        # Get complete date range
-        date_range = self.visualizer.generate_date_range(self.days)
+        # Get complete date range; only regenerated when the day rolls over
+        today = datetime.now().date()
+        if self._date_range_key != today:
+            self._date_range_key = today
+            self.date_range = self.visualizer.generate_date_range(self.days)
+        date_range = self.date_range
         
         # Draw components
         self.draw_title(cr, width, text_color)
@@ -185,7 +188,7 @@ class TimelineGraph(Gtk.DrawingArea):
             # Flip the y-position calculation
             y_pos = top_margin + graph_height - (hour / 23) * graph_height
             time_str = f"{hour:02d}:00"
-            extents = cr.text_extents(time_str)
+            extents = self.label_cache.text_extents(cr, time_str)
             cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
             cr.move_to(left_margin - extents.width - 5, y_pos + extents.height/2)
             cr.show_text(time_str)
@@ -205,18 +208,21 @@ class TimelineGraph(Gtk.DrawingArea):
                 if i >= len(date_range):
                     continue
                 
-                try:
-                    date_obj = datetime.strptime(date_range[i], "%Y-%m-%d")
-                    label = date_obj.strftime("%m/%d")
-                except:
-                    label = date_range[i][-5:] if len(date_range[i]) >= 5 else date_range[i]
+                label = self.label_cache.label(date_range[i], self.axis_label)
                 
                 x_pos = left_margin + (i * graph_width / max(len(date_range) - 1, 1))
-                extents = cr.text_extents(label)
+                extents = self.label_cache.text_extents(cr, label)
                 cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
                 cr.move_to(x_pos - extents.width/2, top_margin + graph_height + extents.height + 5)
                 cr.show_text(label)
 
+    @staticmethod
+    def axis_label(date):
+        try:
+            return datetime.strptime(date, "%Y-%m-%d").strftime("%m/%d")
+        except ValueError:
+            return date[-5:] if len(date) >= 5 else date
+
     def draw_no_data_indicators(self, cr, date_range, left_margin, top_margin, graph_width, graph_height, text_color):
         """Draw vertical gradient lines for dates with no data"""
         for date_idx, date in enumerate(date_range):
@@ -241,10 +247,16 @@ class TimelineGraph(Gtk.DrawingArea):
             cr.line_to(x_pos, top_margin + graph_height)
             cr.stroke()
 
-    def draw_meals(self, cr, date_range, left_margin, top_margin, graph_width, graph_height):
-        self.meal_circles = []
+    def layout_meals(self, date_range, left_margin, top_margin, graph_width, graph_height):
+        """Place every meal circle; reused until size, range or data change"""
+        key = (graph_width, graph_height, date_range[0] if date_range else None, len(date_range),
+               id(self.timeline_data))
+        if key == self._layout_key:
+            return self.circles_to_draw
+        self._layout_key = key
+        self.hover_meal = None
         
-        # First pass: collect all circles and sort them by radius (largest first for drawing)
+        # Collect all circles and sort them by radius (largest first for drawing)
         circles_to_draw = []
         
         for date_idx, date in enumerate(date_range):
@@ -254,9 +266,8 @@ class TimelineGraph(Gtk.DrawingArea):
             # Calculate x position with padding to prevent overflow
             x_base = left_margin + 10 + (date_idx * (graph_width - 20) / max(len(date_range) - 1, 1))
             
-            for meal in self.timeline_data[date]:
+            for dt, meal in self.timeline_data[date]:
                 try:
-                    dt = datetime.strptime(meal['timestamp'], "%Y-%m-%d %H:%M:%S")
                     time_decimal = dt.hour + dt.minute / 60.0
                     # Flip the y-position calculation (00:00 at bottom)
                     y_pos = top_margin + graph_height - (time_decimal / 23) * graph_height
@@ -278,7 +289,7 @@ class TimelineGraph(Gtk.DrawingArea):
                     
                     circle_info = {
                         'x': x_pos, 'y': y_pos, 'radius': radius,
-                        'date': date, 'meal': meal, 'category': category,
+                        'date': date, 'time': dt, 'meal': meal, 'category': category,
                         'color': color, 'alpha': alpha
                     }
                     
@@ -291,6 +302,16 @@ class TimelineGraph(Gtk.DrawingArea):
         # This ensures larger circles are drawn first and smaller ones appear on top
         circles_to_draw.sort(key=lambda c: c['radius'], reverse=True)
         
+        # Store circles sorted by radius (smallest first) for hover detection
+        # This ensures smaller circles get priority in hover detection
+        self.meal_circles = sorted(circles_to_draw, key=lambda c: c['radius'])
+        self.meal_grid = CircleGrid(self.meal_circles, slack=3)
+        self.circles_to_draw = circles_to_draw
+        return circles_to_draw
+
+    def draw_meals(self, cr, date_range, left_margin, top_margin, graph_width, graph_height):
+        circles_to_draw = self.layout_meals(date_range, left_margin, top_margin, graph_width, graph_height)
+        
         # Draw all circles
         for circle_info in circles_to_draw:
             x_pos = circle_info['x']
@@ -300,10 +321,7 @@ class TimelineGraph(Gtk.DrawingArea):
             alpha = circle_info['alpha']
             
             # Check if this specific circle is the hovered one
-            is_hovered = (self.hover_meal and 
-                         self.hover_meal.get('x') == x_pos and 
-                         self.hover_meal.get('y') == y_pos and
-                         self.hover_meal.get('radius') == radius)
+            is_hovered = circle_info is self.hover_meal
             
             # Highlight if hovered
             if is_hovered:
@@ -321,22 +339,11 @@ class TimelineGraph(Gtk.DrawingArea):
             cr.set_line_width(1)
             cr.arc(x_pos, y_pos, radius, 0, 2 * pi)
             cr.stroke()
-        
-        # Store circles sorted by radius (smallest first) for hover detection
-        # This ensures smaller circles get priority in hover detection
-        self.meal_circles = sorted(circles_to_draw, key=lambda c: c['radius'])
 
     def on_motion_notify(self, widget, event):
-        closest_meal = None
-        
-        # Iterate through circles in reverse order (smallest radius first due to sorting)
-        # This gives priority to smaller circles when they overlap with larger ones
-        for meal_info in reversed(self.meal_circles):
-            dist = ((meal_info['x'] - event.x) ** 2 + (meal_info['y'] - event.y) ** 2) ** 0.5
-            if dist < meal_info['radius'] + 3:
-                # If we find a smaller circle that contains the mouse, prefer it
-                if closest_meal is None or meal_info['radius'] < closest_meal['radius']:
-                    closest_meal = meal_info
+        # Only circles in the grid cells around the pointer can be hit; the
+        # smallest one containing the pointer gets priority
+        closest_meal = self.meal_grid.hit(event.x, event.y)
         
         # Always update and redraw if the hovered meal changes (including None to meal or meal to None)
         if closest_meal != self.hover_meal:
@@ -355,15 +362,11 @@ class TimelineGraph(Gtk.DrawingArea):
             return False
         
         meal = self.hover_meal['meal']
-        date = self.hover_meal['date']
+        dt = self.hover_meal['time']
         category = self.hover_meal['category']
         
-        try:
-            date_str = datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
-            time_str = datetime.strptime(meal['timestamp'], "%Y-%m-%d %H:%M:%S").strftime("%H:%M")
-        except:
-            date_str = date
-            time_str = "Unknown time"
+        date_str = dt.strftime("%B %d, %Y")
+        time_str = dt.strftime("%H:%M")
         
         calorie_density = meal.get('kcal', 0) / max(meal.get('gram', 1), 1)
         
@@ -381,6 +384,11 @@ class TimelineGraph(Gtk.DrawingArea):
         tooltip.set_markup(tooltip_text)
         return True
 
+def prepare_timeline_data(db_dir):
+    """Worker-thread job: load a private journal copy and group it by date"""
+    journal_data = load_journal(db_dir)
+    return journal_data, TimelineVisualizer().process_journal_data(journal_data)
+
 class TimelineTab(Gtk.Box):
     def __init__(self, window_width=1200, window_height=780):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=5)
@@ -389,39 +397,15 @@ class TimelineTab(Gtk.Box):
         self.window_width = window_width
         self.window_height = window_height
         
-        # Initialize data
-        self.db_dir = self.get_db_directory()
-        self.journal_data = self.load_journal_entries()
-        self.timeline_data = TimelineVisualizer().process_journal_data(self.journal_data)
+        # Initialize data; filled in by a background job
+        self.db_dir = get_db_dir()
+        self.journal_data = []
+        self.timeline_data = None
         
         # Build UI
         self.create_controls()
         self.create_timeline_plot()
-
-    def get_db_directory(self):
-        """Determine the correct database directory path"""
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
-    def load_journal_entries(self):
-        """Load journal entries from JSON file"""
-        try:
-            journal_path = os.path.join(self.db_dir, 'journal.json')
-            if os.path.exists(journal_path):
-                with open(journal_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('entries', []) if isinstance(data, dict) else data if isinstance(data, list) else []
-        except Exception as e:
-            print(f"Error loading journal data: {e}")
-        return []
+        self.update_timeline()
 
     def create_controls(self):
         """Create the control panel at the top right"""
@@ -448,7 +432,11 @@ class TimelineTab(Gtk.Box):
         # Create a fixed size container to prevent scrolling
         container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         
-        if not self.timeline_data:
+        if self.timeline_data is None:
+            spinner = Gtk.Spinner()
+            spinner.start()
+            container.pack_start(spinner, True, True, 0)
+        elif not self.timeline_data:
             # Show message if no data
             label = Gtk.Label(label="No timeline data available.\nAdd journal entries with timestamps.")
             label.set_halign(Gtk.Align.CENTER)
@@ -470,6 +458,8 @@ class TimelineTab(Gtk.Box):
 
     def update_timeline(self):
         """Refresh the timeline with current data"""
-        self.journal_data = self.load_journal_entries()
-        self.timeline_data = TimelineVisualizer().process_journal_data(self.journal_data)
+        jobs.submit('timeline', prepare_timeline_data, self.db_dir, on_done=self._on_timeline_data)
+
+    def _on_timeline_data(self, result):
+        self.journal_data, self.timeline_data = result
         self.create_timeline_plot()
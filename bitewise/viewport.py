@@ -0,0 +1,182 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+import gi
+from gi.repository import Gdk
+
+gi.require_version("Gdk", "3.0")
+
+DAY, WEEK, MONTH = 'day', 'week', 'month'
+
+class DateViewport:
+    """Visible date range over a sorted list of day ordinals.
+
+    Graphs zoom and pan by moving start/end; drawing only touches the days
+    that bisect into [start, end], grouped by day, week or month depending
+    on how far out the user has zoomed.
+    """
+    MIN_SPAN = 7
+    DAY_SPAN_MAX = 120
+    WEEK_SPAN_MAX = 730
+
+    def __init__(self, ordinals):
+        self.ordinals = ordinals
+        self.first = ordinals[0] if ordinals else 0
+        self.last = ordinals[-1] if ordinals else 0
+        self._groups_key = None
+        self._groups = []
+        self._labels = {}
+        self.reset()
+
+    @property
+    def span(self):
+        return self.end - self.start
+
+    def is_zoomed(self):
+        return (self.start, self.end) != (self.first, self.last)
+
+    def reset(self):
+        self.start, self.end = self.first, self.last
+
+    def zoom_at(self, fraction, factor):
+        """Scale the span by factor, keeping the day under fraction in place"""
+        full = self.last - self.first
+        if full <= 0:
+            return False
+        span = min(full, max(min(self.MIN_SPAN, full), self.span * factor))
+        anchor = self.start + fraction * self.span
+        start = anchor - fraction * span
+        return self._set(start, start + span)
+
+    def pan_by(self, fraction):
+        """Shift the range by a fraction of the visible span"""
+        shift = fraction * self.span
+        return self._set(self.start + shift, self.end + shift)
+
+    def _set(self, start, end):
+        span = end - start
+        if start < self.first:
+            start, end = self.first, self.first + span
+        if end > self.last:
+            start, end = self.last - span, self.last
+        changed = (start, end) != (self.start, self.end)
+        self.start, self.end = start, end
+        return changed
+
+    def visible_slice(self):
+        return bisect_left(self.ordinals, self.start), bisect_right(self.ordinals, self.end)
+
+    def granularity(self):
+        if self.span <= self.DAY_SPAN_MAX:
+            return DAY
+        if self.span <= self.WEEK_SPAN_MAX:
+            return WEEK
+        return MONTH
+
+    def groups(self):
+        """(start, end) index ranges of the visible days, one per plotted item"""
+        key = (self.start, self.end)
+        if key == self._groups_key:
+            return self._groups
+        lo, hi = self.visible_slice()
+        granularity = self.granularity()
+        if granularity == DAY:
+            groups = [(i, i + 1) for i in range(lo, hi)]
+        else:
+            groups = []
+            previous = None
+            for i in range(lo, hi):
+                ordinal = self.ordinals[i]
+                if granularity == WEEK:
+                    group_key = (ordinal - 1) // 7
+                else:
+                    day = date.fromordinal(ordinal)
+                    group_key = (day.year, day.month)
+                if group_key != previous:
+                    groups.append([i, i + 1])
+                    previous = group_key
+                else:
+                    groups[-1][1] = i + 1
+            groups = [tuple(g) for g in groups]
+        self._groups_key, self._groups = key, groups
+        return groups
+
+    def label(self, group, long=False):
+        """Axis or tooltip label for a (start, end) group, formatted once"""
+        key = (group[0], self.granularity(), long)
+        text = self._labels.get(key)
+        if text is None:
+            text = self._labels[key] = self._format_label(*key)
+        return text
+
+    def _format_label(self, index, granularity, long):
+        day = date.fromordinal(self.ordinals[index])
+        if granularity == MONTH:
+            return day.strftime("%B %Y" if long else "%b %Y")
+        if granularity == WEEK:
+            return ("Week of " + day.strftime("%B %d, %Y")) if long else day.strftime("%b %d")
+        return day.strftime("%B %d, %Y" if long else "%b %d")
+
+def mean_over(values, groups):
+    return [sum(values[start:end]) / (end - start) for start, end in groups]
+
+class ViewportControls:
+    """Scroll to zoom, drag to pan and double-click to reset for a graph.
+
+    The graph sets self.viewport, self.hover_point, and self.graph_left /
+    self.graph_width while drawing, and calls drag_motion() first in its
+    motion handler.
+    """
+    ZOOM_STEP = 1.2
+
+    def connect_viewport_controls(self):
+        self.drag_x = None
+        self.add_events(Gdk.EventMask.SCROLL_MASK | Gdk.EventMask.SMOOTH_SCROLL_MASK |
+                        Gdk.EventMask.BUTTON_PRESS_MASK | Gdk.EventMask.BUTTON_RELEASE_MASK)
+        self.connect("scroll-event", self.on_viewport_scroll)
+        self.connect("button-press-event", self.on_viewport_button_press)
+        self.connect("button-release-event", self.on_viewport_button_release)
+
+    def _viewport_changed(self):
+        self.hover_point = None
+        self.queue_draw()
+
+    def on_viewport_scroll(self, widget, event):
+        if not hasattr(self, 'graph_width'):
+            return False
+        if event.direction == Gdk.ScrollDirection.SMOOTH:
+            factor = self.ZOOM_STEP ** event.delta_y
+        elif event.direction == Gdk.ScrollDirection.UP:
+            factor = 1 / self.ZOOM_STEP
+        elif event.direction == Gdk.ScrollDirection.DOWN:
+            factor = self.ZOOM_STEP
+        else:
+            return False
+        fraction = min(1.0, max(0.0, (event.x - self.graph_left) / self.graph_width))
+        if self.viewport.zoom_at(fraction, factor):
+            self._viewport_changed()
+        return True
+
+    def on_viewport_button_press(self, widget, event):
+        if event.button != 1:
+            return False
+        if event.type == Gdk.EventType._2BUTTON_PRESS:
+            self.drag_x = None
+            if self.viewport.is_zoomed():
+                self.viewport.reset()
+                self._viewport_changed()
+            return True
+        self.drag_x = event.x
+        return True
+
+    def on_viewport_button_release(self, widget, event):
+        self.drag_x = None
+        return False
+
+    def drag_motion(self, event):
+        """Pan while button 1 is held; True when the event was a drag"""
+        if self.drag_x is None or not hasattr(self, 'graph_width'):
+            return False
+        if self.viewport.pan_by((self.drag_x - event.x) / self.graph_width):
+            self._viewport_changed()
+        self.drag_x = event.x
+        return True
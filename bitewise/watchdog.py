@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import threading
+import traceback
+from datetime import datetime
+from gi.repository import GLib
+
+# Opt-in: BITEWISE_WATCHDOG=1 logs the main thread's stack whenever the
+# GTK main loop is blocked for longer than BITEWISE_WATCHDOG_MS
+ENABLED = os.environ.get('BITEWISE_WATCHDOG', '') not in ('', '0')
+BUDGET_MS = int(os.environ.get('BITEWISE_WATCHDOG_MS', '50'))
+
+class MainLoopWatchdog:
+    """Heartbeat on the main loop, checked from a background thread.
+
+    A GLib timeout bumps the heartbeat; if the watcher thread sees it go
+    stale by more than the budget, some handler is blocking the loop and
+    the main thread's current Python stack is logged.
+    """
+    def __init__(self, budget_ms=BUDGET_MS, log=None):
+        self.budget = budget_ms / 1000
+        self.interval_ms = max(5, budget_ms // 2)
+        self.log = log or sys.stderr
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.stall_reported = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        GLib.timeout_add(self.interval_ms, self._beat)
+        threading.Thread(target=self._watch, name="bitewise-watchdog", daemon=True).start()
+
+    def _beat(self):
+        now = time.monotonic()
+        with self.lock:
+            stalled_for = now - self.last_beat - self.interval_ms / 1000
+            reported = self.stall_reported
+            self.last_beat = now
+            self.stall_reported = False
+        if reported:
+            self._write(f"main loop resumed after {stalled_for * 1000:.0f} ms")
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval_ms / 1000 / 2)
+            with self.lock:
+                late = time.monotonic() - self.last_beat - self.interval_ms / 1000
+                if late <= self.budget or self.stall_reported:
+                    continue
+                self.stall_reported = True
+            frame = sys._current_frames().get(self.main_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "  (no Python frame)\n"
+            self._write(f"main loop blocked for over {late * 1000:.0f} ms "
+                        f"(budget {self.budget * 1000:.0f} ms), main thread at:\n{stack}")
+
+    def _write(self, message):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{timestamp}] watchdog: {message}", file=self.log, flush=True)
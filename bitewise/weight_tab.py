@@ -1,39 +1,57 @@
-import os
-import json
-import sys
-from datetime import datetime, timedelta
-from collections import OrderedDict
+from datetime import date
 from math import pi
 import gi
 from gi.repository import Gtk, Gdk, GObject, Pango
 import cairo
+from .core.aggregation import process_weight_data
+from .core.profiler import timed
+from .core.storage import get_db_dir, load_journal
+from .downsample import lttb
+from .hit_test import nearest_point
+from .jobs import jobs
+from .label_cache import LabelCache
+from .viewport import DateViewport, ViewportControls, mean_over
 
 gi.require_version("Gtk", "3.0")
 
-class WeightGraph(Gtk.DrawingArea):
+class WeightGraph(ViewportControls, Gtk.DrawingArea):
     def __init__(self, weights_data):
         super().__init__()
         self.weights_data = weights_data
+        self.dates = sorted(weights_data.keys())
+        self.weights = [weights_data[d] for d in self.dates]
+        self.viewport = DateViewport([date.fromisoformat(d).toordinal() for d in self.dates])
+        self.label_cache = LabelCache()
         self.set_hexpand(True)
         self.set_vexpand(True)
         self.connect("draw", self.on_draw)
         
         self.hover_point = None
+        self._sample_key = None
+        self._sample_indices = []
         self.set_has_tooltip(True)
         self.connect("query-tooltip", self.on_query_tooltip)
         self.add_events(Gdk.EventMask.POINTER_MOTION_MASK | Gdk.EventMask.LEAVE_NOTIFY_MASK)
         self.connect("motion-notify-event", self.on_motion_notify)
         self.connect("leave-notify-event", self.on_leave_notify)
+        self.connect_viewport_controls()
+
+    def _sampled_indices(self, weights, graph_width):
+        # Downsample to about one vertex per pixel; only redone on resize or zoom
+        key = (int(graph_width), self.viewport.start, self.viewport.end)
+        if self._sample_key != key:
+            self._sample_key = key
+            self._sample_indices = lttb(weights, int(graph_width))
+        return self._sample_indices
 
     def calculate_averages(self):
         if len(self.weights_data) < 2:
             return None, None, None
         
-        dates = sorted(self.weights_data.keys())
-        weights = [self.weights_data[date] for date in dates]
+        weights = self.weights
         
         # Calculate daily average
-        total_days = (datetime.strptime(dates[-1], "%Y-%m-%d") - datetime.strptime(dates[0], "%Y-%m-%d")).days
+        total_days = self.viewport.last - self.viewport.first
         if total_days == 0:
             daily_avg = 0
         else:
@@ -47,36 +65,42 @@ class WeightGraph(Gtk.DrawingArea):
         
         return daily_avg, weekly_avg, monthly_avg
 
+    @timed()
     def on_draw(self, widget, cr):
-        width, height = widget.get_allocated_width(), widget.get_allocated_height()
         style_context = widget.get_style_context()
-        bg_color = style_context.get_background_color(Gtk.StateFlags.NORMAL)
-        text_color = style_context.get_color(Gtk.StateFlags.NORMAL)
+        self.render(cr, widget.get_allocated_width(), widget.get_allocated_height(),
+                    style_context.get_background_color(Gtk.StateFlags.NORMAL),
+                    style_context.get_color(Gtk.StateFlags.NORMAL))
+
+    def render(self, cr, width, height, bg_color, text_color):
         weight_color = (0.4, 0.7, 1.0, 1.0)
         
         cr.set_source_rgba(bg_color.red, bg_color.green, bg_color.blue, bg_color.alpha)
         cr.rectangle(0, 0, width, height)
         cr.fill()
         
-        if not self.weights_data:
+        groups = self.viewport.groups()
+        if not groups:
             cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
             cr.set_font_size(14)
-            text = "No weight data available."
+            text = "No weight data available." if not self.weights_data else "No weight data in this range."
             extents = cr.text_extents(text)
             cr.move_to(width/2 - extents.width/2, height/2 - extents.height/2)
             cr.show_text(text)
+            self.graph_xs, self.graph_ys, self.graph_indices, self.graph_groups = [], [], [], []
             return
         
-        dates, weights = zip(*sorted(self.weights_data.items()))
+        weights = mean_over(self.weights, groups)
         
         min_weight = max(50, min(weights) * 0.95)
         max_weight = min(150, max(weights) * 1.05)
-        weight_range = max_weight - min_weight
+        weight_range = (max_weight - min_weight) or 1
         
         left_margin, right_margin = 60, 60
         top_margin, bottom_margin = 100, 60  # Increased top_margin from 80 to 100
         graph_width = max(width - left_margin - right_margin, 1)
         graph_height = max(height - top_margin - bottom_margin, 1)
+        self.graph_left, self.graph_width = left_margin, graph_width
         
         cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
         cr.set_font_size(14)
@@ -120,28 +144,25 @@ class WeightGraph(Gtk.DrawingArea):
             cr.stroke()
             cr.set_source_rgba(text_color.red, text_color.green, text_color.blue, text_color.alpha)
         
-        num_dates = len(dates)
+        num_dates = len(groups)
         step = max(1, num_dates // 10)
         for i in range(0, num_dates, step):
-            date_str = dates[i]
-            try:
-                label = datetime.strptime(date_str, "%Y-%m-%d").strftime("%b %d")
-            except:
-                label = date_str
-            
+            label = self.viewport.label(groups[i])
             x_pos = left_margin + (i * graph_width / max(num_dates - 1, 1))
-            extents = cr.text_extents(label)
+            extents = self.label_cache.text_extents(cr, label)
             cr.move_to(x_pos - extents.width/2, height - bottom_margin + extents.height + 5)
             cr.show_text(label)
         
+        indices = self._sampled_indices(weights, graph_width)
+        
         cr.set_source_rgba(*weight_color)
         cr.set_line_width(2)
         points = []
-        for i, (date_str, weight) in enumerate(zip(dates, weights)):
+        for n, i in enumerate(indices):
             x_pos = left_margin + (i * graph_width / max(num_dates - 1, 1))
-            y_pos = height - bottom_margin - ((weight - min_weight) / weight_range * graph_height)
+            y_pos = height - bottom_margin - ((weights[i] - min_weight) / weight_range * graph_height)
             points.append((x_pos, y_pos))
-            cr.line_to(x_pos, y_pos) if i else cr.move_to(x_pos, y_pos)
+            cr.line_to(x_pos, y_pos) if n else cr.move_to(x_pos, y_pos)
         cr.stroke()
         
         point_radius = 5
@@ -151,13 +172,18 @@ class WeightGraph(Gtk.DrawingArea):
                 cr.arc(x_pos, y_pos, point_radius, 0, 2 * pi)
                 cr.fill()
         
-        if self.hover_point is not None and self.hover_point < len(points):
-            x_pos, y_pos = points[self.hover_point]
+        if self.hover_point is not None and self.hover_point < num_dates:
+            x_pos = left_margin + (self.hover_point * graph_width / max(num_dates - 1, 1))
+            y_pos = height - bottom_margin - ((weights[self.hover_point] - min_weight) / weight_range * graph_height)
             cr.set_source_rgba(weight_color[0], weight_color[1], weight_color[2], 0.8)
             cr.arc(x_pos, y_pos, point_radius + 2, 0, 2 * pi)
             cr.fill()
         
-        self.graph_points, self.graph_dates, self.graph_weights = points, dates, weights
+        # Points come out in x order, so hovers can bisect on x
+        self.graph_xs = [x for x, y in points]
+        self.graph_ys = [y for x, y in points]
+        self.graph_indices = indices
+        self.graph_groups, self.graph_weights = groups, weights
         
         cr.select_font_face("Sans", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
         cr.set_font_size(10)
@@ -183,15 +209,14 @@ class WeightGraph(Gtk.DrawingArea):
         cr.show_text("Weight")
 
     def on_motion_notify(self, widget, event):
-        if not hasattr(self, 'graph_points'):
+        if not hasattr(self, 'graph_xs'):
             return False
         
-        closest_point, min_dist = None, float('inf')
-        for i, (x, y) in enumerate(self.graph_points):
-            dist = (x - event.x)**2 + (y - event.y)**2
-            if dist < min_dist and dist < 400:
-                min_dist = dist
-                closest_point = i
+        if self.drag_motion(event):
+            return True
+        
+        nearest = nearest_point(self.graph_xs, self.graph_ys, event.x, event.y, 20)
+        closest_point = self.graph_indices[nearest] if nearest is not None else None
         
         if closest_point != self.hover_point:
             self.hover_point = closest_point
@@ -206,55 +231,30 @@ class WeightGraph(Gtk.DrawingArea):
             self.queue_draw()
     
     def on_query_tooltip(self, widget, x, y, keyboard_mode, tooltip):
-        if not hasattr(self, 'graph_points') or self.hover_point is None:
+        if not hasattr(self, 'graph_xs') or self.hover_point is None:
             return False
         
-        date = self.graph_dates[self.hover_point]
+        group = self.graph_groups[self.hover_point]
         weight = self.graph_weights[self.hover_point]
-        try:
-            date_str = datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
-        except:
-            date_str = date
+        date_str = self.viewport.label(group, long=True)
+        days = group[1] - group[0]
         
-        tooltip.set_markup(f"<b>{date_str}</b>\nWeight: {weight:.1f} kg")
+        tooltip.set_markup(f"<b>{date_str}</b>\nWeight: {weight:.1f} kg" +
+                           (f" (avg of {days} days)" if days > 1 else ""))
         return True
 
+def prepare_weight_data(db_dir):
+    """Worker-thread job: load a private journal copy and aggregate it"""
+    return process_weight_data(load_journal(db_dir))
+
 class WeightStatsTab(Gtk.Box):
     def __init__(self, window_width, window_height):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         self.set_border_width(10)
-        self.db_dir = self._get_db_dir()
-        self.journal_data = self._load_journal_data()
-        self.daily_weights = self._process_weight_data()
+        self.db_dir = get_db_dir()
+        self.daily_weights = None
         self.create_weight_plot()
-
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
-    def _load_journal_data(self):
-        try:
-            journal_path = os.path.join(self.db_dir, 'journal.json')
-            if os.path.exists(journal_path):
-                with open(journal_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('entries', []) if isinstance(data, dict) else data if isinstance(data, list) else []
-        except Exception as e:
-            print(f"Problem loading journal data: {e}")
-        return []
-
-    def _process_weight_data(self):
-        return OrderedDict((e['date'], e['weight']) for e in self.journal_data 
-                if isinstance(e, dict) and 'date' in e and 'weight' in e 
-                and isinstance(e['weight'], (int, float)) and e['weight'] > 0)
+        self.update_plot()
 
     def create_weight_plot(self):
         for child in self.get_children():
@@ -265,7 +265,11 @@ class WeightStatsTab(Gtk.Box):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         scrolled.add(box)
         
-        if not self.daily_weights:
+        if self.daily_weights is None:
+            spinner = Gtk.Spinner()
+            spinner.start()
+            box.pack_start(spinner, True, True, 0)
+        elif not self.daily_weights:
             label = Gtk.Label(label="No weight data available.")
             label.set_halign(Gtk.Align.CENTER)
             label.set_valign(Gtk.Align.CENTER)
@@ -277,6 +281,8 @@ class WeightStatsTab(Gtk.Box):
         self.show_all()
 
     def update_plot(self):
-        self.journal_data = self._load_journal_data()
-        self.daily_weights = self._process_weight_data()
+        jobs.submit('weight', prepare_weight_data, self.db_dir, on_done=self._on_weight_data)
+
+    def _on_weight_data(self, daily_weights):
+        self.daily_weights = daily_weights
         self.create_weight_plot()
@@ -3,7 +3,6 @@ import re
 import json
 import time
 import os
-import sys
 from urllib.parse import quote
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
@@ -11,6 +10,7 @@ import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('WebKit2', '4.1')
 from gi.repository import Gtk, WebKit2, GLib, GdkPixbuf, Gdk
+from .core.storage import get_db_dir
 
 class YouTubeTab(Gtk.Box):
     def __init__(self, window_width, window_height):
@@ -27,24 +27,12 @@ class YouTubeTab(Gtk.Box):
         self.load_more_row = None
         self.load_more_btn = None
         self.load_more_spinner = None
-        self.db_dir = self._get_db_dir()
+        self.db_dir = get_db_dir()
 
         # Setup main UI components
         self._setup_main_ui(window_width, window_height)
         self.show_all()
 
-    def _get_db_dir(self):
-        if 'APPIMAGE' in os.environ:
-            base_dir = os.path.dirname(os.environ['APPIMAGE'])
-        elif getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        db_dir = os.path.join(base_dir, 'db')
-        os.makedirs(db_dir, exist_ok=True)
-        return db_dir
-
     def _setup_main_ui(self, window_width, window_height):
         """Initialize the main UI layout"""
         self.paned = Gtk.Paned(orientation=Gtk.Orientation.HORIZONTAL)
@@ -1,26 +1,32 @@
+import time
+_START_TIME = time.perf_counter()
+
 import os
 import sys
 import subprocess
+import importlib
+import importlib.util
 from pathlib import Path
-import time
 import threading
 import gi
 gi.require_version('Gtk', '3.0')
+from bitewise.core.profiler import phase, record
+from bitewise.core.search_index import shared_index
+from bitewise.core.nutrients import register_custom
+from bitewise.core.storage import db_path, load_ingredients, load_recipes, load_settings, preload
+
+# Seconds from process start to the first drawn window frame
+COLD_START_TARGET = 1.5
+# Set by tools/bench_startup.py: report the first draw on stdout and quit
+EXIT_AFTER_FIRST_DRAW = os.environ.get('BITEWISE_EXIT_AFTER_FIRST_DRAW', '') not in ('', '0')
 
 def ensure_db_directory():
-    if 'APPIMAGE' in os.environ:
-        base_dir = os.path.dirname(os.environ['APPIMAGE'])
-    elif getattr(sys, 'frozen', False):
-        base_dir = os.path.dirname(sys.executable)
-    else:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
+    path = db_path()
     
-    db_path = os.path.join(base_dir, 'db')
-    
-    if not os.path.exists(db_path):
+    if not os.path.exists(path):
         try:
-            os.makedirs(db_path)
-            print(f"Created db directory at: {db_path}")
+            os.makedirs(path)
+            print(f"Created db directory at: {path}")
         except Exception as e:
             print(f"Error creating db directory: {e}")
             return False
@@ -139,32 +145,97 @@ def install_dependencies():
     return installed == total
 
 def is_module_available(module_name):
+    # find_spec locates the module without running it, so launches don't
+    # pay for importing packages that are only needed later
     try:
-        __import__(module_name)
-        return True
-    except ImportError:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
         return False
 
 if not ensure_db_directory():
     print("Failed to create db directory. The application may not work correctly.")
     sys.exit(1)
 
-if not install_dependencies():
+with phase("startup: dependency check"):
+    dependencies_ok = install_dependencies()
+if not dependencies_ok:
     print("Failed to install required dependencies. Please install them manually.")
     sys.exit(1)
 
-from gi.repository import Gtk, Pango, Gdk
-from py.recipes_tab import RecipesTab
-from py.ingredients_tab import IngredientsTab
-from py.journal_tab import JournalTab
-from py.weight_tab import WeightStatsTab
-from py.bmr_tab import BMRStatsTab
-from py.macro_tab import MacroBreakdownTab
-from py.costs_tab import CostsTab
-from py.youtube_tab import YouTubeTab
-from py.about_tab import AboutTab
-from py.nutrition_tab import NutritionTab
-from py.timeline_tab import TimelineTab
+# Import one by one first so the profiler can attribute time per module;
+# the from-imports below then just bind names
+for module_name in ['gi.repository.Gtk', 'bitewise.recipes_tab', 'bitewise.ingredients_tab',
+                    'bitewise.journal_tab', 'bitewise.weight_tab', 'bitewise.bmr_tab', 'bitewise.macro_tab',
+                    'bitewise.costs_tab', 'bitewise.about_tab', 'bitewise.nutrition_tab', 'bitewise.timeline_tab']:
+    with phase(f"startup: import {module_name}"):
+        importlib.import_module(module_name)
+
+from gi.repository import Gtk, Pango, Gdk, GLib
+from py import watchdog
+from bitewise.recipes_tab import RecipesTab
+from bitewise.ingredients_tab import IngredientsTab
+from bitewise.journal_tab import JournalTab
+from bitewise.weight_tab import WeightStatsTab
+from bitewise.bmr_tab import BMRStatsTab
+from bitewise.macro_tab import MacroBreakdownTab
+from bitewise.costs_tab import CostsTab
+from bitewise.about_tab import AboutTab
+from bitewise.nutrition_tab import NutritionTab
+from bitewise.timeline_tab import TimelineTab
+
+DB_FILES = ['journal.json', 'ingredients.json', 'recipes.json', 'diet.json', 'versions.json', 'settings.json']
+
+class TabSlot(Gtk.Box):
+    """Notebook page that shows a spinner until its tab has been built"""
+    def __init__(self):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        self.content = None
+        
+        self.placeholder = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        self.placeholder.set_halign(Gtk.Align.CENTER)
+        self.placeholder.set_valign(Gtk.Align.CENTER)
+        spinner = Gtk.Spinner()
+        spinner.set_size_request(32, 32)
+        spinner.start()
+        self.placeholder.pack_start(spinner, False, False, 0)
+        self.placeholder.pack_start(Gtk.Label(label="Loading..."), False, False, 0)
+        self.pack_start(self.placeholder, True, True, 0)
+
+    def set_content(self, content):
+        self.placeholder.destroy()
+        self.content = content
+        self.pack_start(content, True, True, 0)
+        content.show_all()
+
+class LazyTab(TabSlot):
+    """Placeholder page that builds its real tab the first time it is shown.
+
+    Used for tabs whose modules pull in heavy libraries (WebKit2, requests)
+    that most sessions never need.
+    """
+    def __init__(self, module_name, class_name, *args):
+        super().__init__()
+        self.module_name = module_name
+        self.class_name = class_name
+        self.args = args
+        self.map_handler = self.connect("map", self.on_map)
+
+    def on_map(self, widget):
+        self.disconnect(self.map_handler)
+        # Build after the page switch has been drawn
+        GLib.idle_add(self._build)
+
+    def _build(self):
+        try:
+            with phase(f"startup: import {self.module_name}"):
+                module = importlib.import_module(self.module_name)
+            with phase(f"startup: construct {self.class_name}"):
+                content = getattr(module, self.class_name)(*self.args)
+        except Exception as e:
+            print(f"Error loading {self.class_name}: {e}")
+            content = Gtk.Label(label=f"This tab could not be loaded:\n{e}")
+        self.set_content(content)
+        return False
 
 class RecipeManager(Gtk.Window):
     def __init__(self):
@@ -175,29 +246,28 @@ class RecipeManager(Gtk.Window):
         self.notebook = Gtk.Notebook()
         self.add(self.notebook)
 
-        self.journal_tab = JournalTab(1200, 780)
-        self.recipes_tab = RecipesTab(1200, 780, self)
-        self.weight_tab = WeightStatsTab(1200, 780)
-        self.bmr_tab = BMRStatsTab(1200, 780)
-        self.macro_tab = MacroBreakdownTab(1200, 780)
+        self.journal_tab = self.recipes_tab = None
+        self.weight_tab = self.bmr_tab = self.macro_tab = None
         
-        ingredients_tab = IngredientsTab(1200, 780, self.recipes_tab, self.journal_tab)
-        self.journal_tab.set_weight_tab(self.weight_tab)
-        self.journal_tab.set_bmr_tab(self.bmr_tab)
-        self.journal_tab.set_macro_tab(self.macro_tab)
+        # Pages start out as spinners; the tabs are built once the db files
+        # have been parsed in the background
+        self.slots = {key: TabSlot() for key in
+                      ['journal', 'recipes', 'ingredients', 'weight', 'bmr', 'macro',
+                       'timeline', 'nutrition', 'costs', 'about']}
+        self.slots['youtube'] = LazyTab("bitewise.youtube_tab", "YouTubeTab", 1200, 780)
 
         tabs = [
-            (self.journal_tab, "Journal"),
-            (self.recipes_tab, "Recipes"),
-            (ingredients_tab, "Ingredients"),
-            (self.weight_tab, "Weight"),
-            (self.bmr_tab, "BMR & Kcal"),
-            (self.macro_tab, "Macro"),
-            (TimelineTab(1200, 780), "Timeline"),
-            (NutritionTab(1200, 780), "Nutrition"),
-            (CostsTab(1200, 780), "Costs"),
-            (YouTubeTab(1200, 780), "Video Cookbook"),
-            (AboutTab(1200, 780), "About")
+            (self.slots['journal'], "Journal"),
+            (self.slots['recipes'], "Recipes"),
+            (self.slots['ingredients'], "Ingredients"),
+            (self.slots['weight'], "Weight"),
+            (self.slots['bmr'], "BMR & Kcal"),
+            (self.slots['macro'], "Macro"),
+            (self.slots['timeline'], "Timeline"),
+            (self.slots['nutrition'], "Nutrition"),
+            (self.slots['costs'], "Costs"),
+            (self.slots['youtube'], "Video Cookbook"),
+            (self.slots['about'], "About")
         ]
 
         css_provider = Gtk.CssProvider()
@@ -219,8 +289,69 @@ class RecipeManager(Gtk.Window):
             self.notebook.append_page(scrolled, tab_label)
 
         self.connect("key-press-event", self.on_key_press)
+        self.cold_start_handler = self.connect("draw", self.on_first_draw)
         
         self.show_all()
+        
+        threading.Thread(target=self._preload_data, daemon=True).start()
+
+    def _preload_data(self):
+        preload(db_path(), DB_FILES)
+        # Nutrients added in settings.json need registering before any view picks its columns
+        register_custom(load_settings(db_path()))
+        # Index the picker names here so the tabs' syncs find nothing to do
+        shared_index('ingredients').sync(i['name'] for i in load_ingredients(db_path()))
+        shared_index('recipes').sync(r['name'] for r in load_recipes(db_path()))
+        GLib.idle_add(self._build_next_tab, iter(self._tab_builders()))
+
+    def _tab_builders(self):
+        # Journal first since it is the page on screen; the stats tabs are
+        # linked to it as they appear, and ingredients needs recipes and journal
+        yield 'journal', lambda: JournalTab(1200, 780)
+        yield 'weight', lambda: WeightStatsTab(1200, 780)
+        yield 'bmr', lambda: BMRStatsTab(1200, 780)
+        yield 'macro', lambda: MacroBreakdownTab(1200, 780)
+        yield 'recipes', lambda: RecipesTab(1200, 780, self)
+        yield 'ingredients', lambda: IngredientsTab(1200, 780, self.recipes_tab, self.journal_tab)
+        yield 'timeline', lambda: TimelineTab(1200, 780)
+        yield 'nutrition', lambda: NutritionTab(1200, 780)
+        yield 'costs', lambda: CostsTab(1200, 780)
+        yield 'about', lambda: AboutTab(1200, 780)
+
+    def loaded_tabs(self):
+        """{key: tab} for every page whose tab has been built"""
+        return {key: slot.content for key, slot in self.slots.items()
+                if isinstance(slot.content, Gtk.Box)}
+
+    def _build_next_tab(self, builders):
+        """Build one tab per main loop iteration so the window stays live"""
+        key, build = next(builders, (None, None))
+        if key is None:
+            return False
+        
+        with phase(f"startup: construct {key} tab"):
+            tab = build()
+        self.slots[key].set_content(tab)
+        if key in ('journal', 'recipes', 'weight', 'bmr', 'macro'):
+            setattr(self, f"{key}_tab", tab)
+        if key == 'weight':
+            self.journal_tab.set_weight_tab(tab)
+        elif key == 'bmr':
+            self.journal_tab.set_bmr_tab(tab)
+        elif key == 'macro':
+            self.journal_tab.set_macro_tab(tab)
+        return True
+
+    def on_first_draw(self, widget, cr):
+        self.disconnect(self.cold_start_handler)
+        elapsed = time.perf_counter() - _START_TIME
+        record("startup: first draw", elapsed)
+        if elapsed > COLD_START_TARGET:
+            print(f"Cold start took {elapsed:.2f}s (target {COLD_START_TARGET:.1f}s)")
+        if EXIT_AFTER_FIRST_DRAW:
+            print(f"First draw after {elapsed:.3f}s", flush=True)
+            GLib.idle_add(Gtk.main_quit)
+        return False
 
     def _set_app_icon(self):
         if getattr(sys, 'frozen', False):
@@ -261,9 +392,20 @@ class RecipeManager(Gtk.Window):
         return False
 
     def on_recipes_changed(self):
-        self.journal_tab.reload_recipes()
+        if self.journal_tab:
+            self.journal_tab.reload_recipes()
+
+    def on_ingredients_changed(self):
+        # The journal tab reloads its own copy; the others follow it here
+        if self.recipes_tab:
+            self.recipes_tab.reload_ingredients()
+        ingredients_tab = self.loaded_tabs().get('ingredients')
+        if ingredients_tab:
+            ingredients_tab.reload_ingredients()
 
 if __name__ == "__main__":
+    if watchdog.ENABLED:
+        watchdog.MainLoopWatchdog().start()
     win = RecipeManager()
     win.connect("destroy", Gtk.main_quit)
     Gtk.main()
@@ -0,0 +1,61 @@
+import json
+import pytest
+from bitewise.core.barcode_index import BarcodeIndex, normalize_code, product_record
+
+CSV_DUMP = (
+    "code\tproduct_name\tbrands\tenergy-kcal_100g\tproteins_100g\tsodium_100g\tiron_100g\n"
+    "3017620422003\tNutella\tFerrero\t539\t6.3\t0.041\t\n"
+    "0012345678905\tOat drink\tOatly, Oatly AB\t46\t1\t\t0.00021\n"
+    "3017620422003\tDuplicate\t\t1\t1\t\t\n"
+    "not-a-code\tBroken\t\t\t\t\t\n"
+)
+
+def test_normalize_code():
+    assert normalize_code('0 12345-678905') == normalize_code('12345678905') == 12345678905
+    assert normalize_code('abc') is None
+
+def test_product_record_from_kj_and_sodium():
+    record = product_record({'product_name': ' ', 'energy_100g': '418.4', 'sodium_100g': '0.4'}, 42)
+    assert record['name'] == 'Barcode 42'
+    assert record['kcal'] == 100.0 and record['salt'] == 1.0
+    assert record['micro'] == {'sodium': 400.0}
+
+def test_csv_dump_lookup(tmp_path):
+    dump = tmp_path / 'off.csv'
+    dump.write_text(CSV_DUMP, encoding='utf-8')
+    index = BarcodeIndex(str(dump))
+    assert not index.is_built()
+    index.build()
+    assert index.is_built()
+    nutella = index.lookup('3017620422003')
+    assert nutella['name'] == 'Nutella (Ferrero)' and nutella['kcal'] == 539
+    oat = index.lookup('12345678905')
+    assert oat['name'] == 'Oat drink (Oatly)'
+    assert oat['micro'] == {'iron': 0.21}
+    assert index.lookup('4000000000000') is None
+    index.close()
+
+def test_jsonl_dump_lookup(tmp_path):
+    dump = tmp_path / 'off.jsonl'
+    products = [{'code': '20000001', 'product_name': 'Skyr', 'nutriments': {'energy-kcal_100g': 63}},
+                {'code': '10000002', 'product_name': 'Rye bread', 'nutriments': {'energy-kcal_100g': 210}}]
+    dump.write_text(''.join(json.dumps(p) + '\n' for p in products), encoding='utf-8')
+    index = BarcodeIndex(str(dump))
+    index.build()
+    assert index.lookup('20000001')['name'] == 'Skyr'
+    assert index.lookup('10000002')['kcal'] == 210
+    index.close()
+
+def test_index_goes_stale_when_the_dump_changes(tmp_path):
+    dump = tmp_path / 'off.csv'
+    dump.write_text(CSV_DUMP, encoding='utf-8')
+    index = BarcodeIndex(str(dump))
+    index.build()
+    dump.write_text(CSV_DUMP + "1\tNew\t\t\t\t\t\n", encoding='utf-8')
+    assert not index.is_built()
+
+def test_dump_without_code_column(tmp_path):
+    dump = tmp_path / 'off.csv'
+    dump.write_text("ean\tproduct_name\n1\tThing\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="off.csv has no 'code' column"):
+        BarcodeIndex(str(dump)).build()
@@ -0,0 +1,38 @@
+import pytest
+from bitewise.core.bulk_edit import apply_corrections, read_corrections, scale_field, set_field
+
+OATS = {'name': 'Oats', 'kcal': 380.0, 'cost': 0.3, 'micro': {'iron': 4.0}}
+
+def test_scale_field_returns_a_changed_copy():
+    scaled = scale_field(OATS, 'cost', 10)
+    assert scaled['cost'] == pytest.approx(0.33)
+    assert OATS['cost'] == 0.3
+    assert scale_field(OATS, 'iron', -50)['micro'] == {'iron': 2.0}
+    # A micronutrient the food doesn't list stays missing
+    assert 'zinc' not in scale_field(OATS, 'zinc', 10)['micro']
+
+def test_set_field_sets_and_clears_micronutrients():
+    assert set_field(OATS, 'kcal', 370)['kcal'] == 370
+    assert set_field(OATS, 'zinc', 3.0)['micro'] == {'iron': 4.0, 'zinc': 3.0}
+    assert set_field(OATS, 'iron', None)['micro'] == {}
+    assert OATS['micro'] == {'iron': 4.0}
+
+def test_read_corrections(tmp_path):
+    path = tmp_path / 'fixes.csv'
+    path.write_text('Name,cost,iron\nOats,"0,35",\nMilk,,0.1\n\n', encoding='utf-8')
+    assert read_corrections(str(path)) == {'oats': {'cost': 0.35}, 'milk': {'iron': 0.1}}
+
+@pytest.mark.parametrize('text, message', [
+    ('cost\n1\n', "'name' column"),
+    ('name,price\nOats,1\n', "Unknown columns: price"),
+    ('name,cost\nOats,cheap\n', "Line 2"),
+])
+def test_read_corrections_errors(tmp_path, text, message):
+    path = tmp_path / 'fixes.csv'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(ValueError, match=message):
+        read_corrections(str(path))
+
+def test_apply_corrections():
+    fixed = apply_corrections(OATS, {'cost': 0.35, 'zinc': 3.0})
+    assert fixed['cost'] == 0.35 and fixed['micro'] == {'iron': 4.0, 'zinc': 3.0}
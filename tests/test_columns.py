@@ -0,0 +1,37 @@
+from array import array
+from bitewise.core.aggregation import daily_sums, daily_totals
+from bitewise.core.columns import NutrientColumns, SparseColumn
+
+def test_sparse_column_set_get_and_renumber():
+    column = SparseColumn()
+    column.append(1, 2.0)
+    column.append(5, 3.0)
+    column.set(3, 4.0)
+    assert list(column.items()) == [(1, 2.0), (3, 4.0), (5, 3.0)]
+    column.set(1, None)
+    assert column.get(1) == 0.0 and column.get(1, None) is None
+    assert list(column.renumbered({3: 0, 5: 1}).items()) == [(0, 4.0), (1, 3.0)]
+    assert column.nbytes() == 32
+
+def test_nutrient_columns_sums_by_group():
+    records = [{'kcal': 100, 'micro': {'iron': 1.0}}, {'kcal': 50}, {'kcal': 25, 'micro': {'iron': 0.5}}]
+    columns = NutrientColumns(records)
+    sums = columns.sums(['kcal', 'iron', 'zinc'], [0, 1, 0], 2)
+    assert sums == {'kcal': array('d', [125, 50]), 'iron': array('d', [1.5, 0]), 'zinc': array('d', [0, 0])}
+    # Only dense keys asked for: the micro dicts aren't read at all
+    assert NutrientColumns(records, ['kcal']).sparse == {}
+
+def test_daily_sums_match_daily_totals():
+    entries = [
+        {'date': '2026-01-02', 'gram': 100.0, 'kcal': 200.0, 'weight': 80.0, 'micro': {'iron': 1.0}},
+        {'date': '2026-01-01', 'gram': 50.0, 'kcal': 100.0, 'weight': 81.0},
+        {'date': '2026-01-02', 'gram': 30.0, 'kcal': 60.0, 'weight': 79.5},
+    ]
+    dates, sums = daily_sums(entries, ['gram', 'kcal', 'iron'])
+    assert dates == ['2026-01-02', '2026-01-01']
+    totals = daily_totals(entries)
+    for i, date in enumerate(dates):
+        assert sums['kcal'][i] == totals[date]['kcal']
+        assert sums['gram'][i] == totals[date]['gram']
+    assert list(sums['iron']) == [1.0, 0.0]
+    assert totals['2026-01-02']['weight'] == 79.5
@@ -0,0 +1,38 @@
+from bitewise.core.duplicates import find_duplicates, merge_duplicates, reference_counts, tokens
+from bitewise.core.models import NUTRIENTS
+
+def ingredient(name, kcal, **values):
+    record = {key: 0.0 for key in NUTRIENTS}
+    record.update(values, name=name, kcal=kcal)
+    return record
+
+def test_tokens_ignore_order_plurals_and_stop_words():
+    assert tokens("Oats, rolled") == tokens("rolled oat")
+    assert tokens("Bread with butter") == frozenset({'bread', 'butter'})
+    assert tokens("Glass") == frozenset({'glass'})
+
+def test_find_duplicates_needs_close_names_and_values():
+    ingredients = [
+        ingredient('Oats, rolled', 380, protein=13),
+        ingredient('rolled oats', 375, protein=13.2),
+        ingredient('Rolled oats, toasted', 460, protein=13),
+        ingredient('Steel cut oats', 380, protein=13),
+        ingredient('Milk', 64),
+    ]
+    assert find_duplicates(ingredients) == [['rolled oats', 'Oats, rolled']]
+    usage = {'oats, rolled': 3}
+    assert find_duplicates(ingredients, usage) == [['Oats, rolled', 'rolled oats']]
+
+def test_merge_renames_references_and_drops_versions():
+    kept = ingredient('Oats, rolled', 380, protein=13)
+    ingredients = [kept, ingredient('rolled oats', 375)]
+    recipes = [{'name': 'Porridge', 'ingredients': [dict(ingredient('rolled oats', 187.5), gram=50.0)]}]
+    entries = [{'ate': 'Rolled Oats', 'gram': 50.0, 'kcal': 187.5, 'ref': [2, 0]}, {'ate': 'Milk'}]
+    assert reference_counts(recipes, entries)['rolled oats'] == 2
+    remaining, recipes_changed, entries_changed = merge_duplicates(
+        ingredients, recipes, entries, {'Oats, rolled': ['rolled oats']})
+    assert remaining == [kept]
+    assert (recipes_changed, entries_changed) == (1, 1)
+    row = recipes[0]['ingredients'][0]
+    assert row['name'] == 'Oats, rolled' and row['kcal'] == 190.0
+    assert entries[0] == {'ate': 'Oats, rolled', 'gram': 50.0, 'kcal': 187.5}
@@ -0,0 +1,60 @@
+import csv
+import pytest
+from bitewise.core.fdc_import import ImportCancelled, import_fdc, sodium_to_salt
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+@pytest.fixture
+def fdc_dir(tmp_path):
+    write_csv(tmp_path / 'food.csv', [
+        ['fdc_id', 'data_type', 'description', 'publication_date'],
+        ['1', 'branded_food', 'Oats', '2020-01-01'],
+        ['2', 'sr_legacy_food', 'OATS', '2019-01-01'],
+        ['3', 'foundation_food', 'Salt water', '2021-01-01'],
+        ['4', 'foundation_food', 'Mystery', '2021-01-01'],
+        ['5', 'survey_fndds_food', 'Milk', '2021-01-01'],
+    ])
+    write_csv(tmp_path / 'food_nutrient.csv', [
+        ['id', 'fdc_id', 'nutrient_id', 'amount'],
+        ['10', '1', '1008', '400'],
+        ['11', '2', '2047', '375'],
+        ['12', '2', '1008', '379'],
+        ['13', '2', '1003', '13.2'],
+        ['14', '2', '1089', '4.25'],
+        ['15', '3', '1008', '0'],
+        ['16', '3', '1093', '400'],
+        ['17', '4', '1003', '5'],
+        ['18', '5', '1008', '64'],
+        ['19', '5', '9999', '1'],
+        ['20', 'x', '1008', '1'],
+    ])
+    return str(tmp_path)
+
+def test_import_prefers_curated_data_and_preferred_nutrient_ids(fdc_dir):
+    records, stats = import_fdc(fdc_dir)
+    by_name = {record['name']: record for record in records}
+    assert sorted(by_name) == ['Milk', 'OATS', 'Salt water']
+    oats = by_name['OATS']
+    assert oats['kcal'] == 379 and oats['protein'] == 13.2
+    assert oats['micro'] == {'iron': 4.25}
+    assert by_name['Salt water']['salt'] == sodium_to_salt(400)
+    assert stats == {'imported': 3, 'duplicates': 1, 'without energy': 1}
+
+def test_import_skips_existing_names(fdc_dir):
+    records, stats = import_fdc(fdc_dir, ['milk'])
+    assert 'Milk' not in [record['name'] for record in records]
+    assert stats['duplicates'] == 2
+
+def test_missing_files_and_columns(tmp_path, fdc_dir):
+    with pytest.raises(FileNotFoundError):
+        import_fdc(str(tmp_path / 'nowhere'))
+    write_csv(tmp_path / 'food_nutrient.csv', [['fdc_id', 'amount'], ['1', '2']])
+    with pytest.raises(ValueError, match="food_nutrient.csv has no 'nutrient_id' column"):
+        import_fdc(fdc_dir)
+
+def test_cancel(fdc_dir, monkeypatch):
+    monkeypatch.setattr('bitewise.core.fdc_import.BATCH_SIZE', 2)
+    with pytest.raises(ImportCancelled):
+        import_fdc(fdc_dir, cancelled=lambda: True)
@@ -0,0 +1,72 @@
+from bitewise.core.ingredient_table import IngredientTable
+from bitewise.core.models import NUTRIENTS
+
+def record(name, kcal, **values):
+    result = {key: 0.0 for key in NUTRIENTS}
+    result.update(values, name=name, kcal=kcal)
+    return result
+
+RECORDS = [
+    record('Oats', 380, protein=13, cost=0.3, id=1, version=0),
+    record('Milk', 64, protein=3.4, cost=0.1, micro={'calcium': 120.0}),
+    record('Butter', 740, fat=82, cost=1.2),
+]
+
+def test_records_round_trip():
+    table = IngredientTable(RECORDS)
+    assert len(table) == 3
+    assert table.records() == RECORDS
+    assert table.record(1) == RECORDS[1]
+
+def test_values_and_find():
+    table = IngredientTable(RECORDS)
+    assert table.find('MILK') == 1
+    assert table.find('Cheese') is None
+    assert table.value(1, 'calcium') == 120.0
+    assert table.value(0, 'calcium') == 0.0
+    assert table.value(0, 'protein') == 13.0
+
+def test_update_renames_and_keeps_other_keys():
+    table = IngredientTable(RECORDS)
+    table.update(0, record('Rolled oats', 370))
+    assert table.find('oats') is None
+    assert table.find('rolled oats') == 0
+    assert table.record(0)['id'] == 1 and table.value(0, 'kcal') == 370.0
+    # micro stays unless the record brings its own
+    table.update(1, record('Milk', 60))
+    assert table.value(1, 'calcium') == 120.0
+    table.update(1, dict(record('Milk', 60), micro={'iron': 0.1}))
+    assert table.value(1, 'calcium') == 0.0 and table.value(1, 'iron') == 0.1
+
+def test_update_keeps_the_key_of_a_name_differing_in_case():
+    table = IngredientTable([record('Milk', 64), record('milk', 60)])
+    assert table.find('milk') == 1
+    table.update(0, record('Oat milk', 45))
+    assert table.find('milk') == 1
+    assert table.find('oat milk') == 0
+
+def test_remove_renumbers_rows_and_sparse_columns():
+    table = IngredientTable(RECORDS)
+    table.remove([0])
+    assert table.names == ['Milk', 'Butter']
+    assert table.find('butter') == 1
+    assert table.value(0, 'calcium') == 120.0
+
+def test_order_is_cached_until_a_change():
+    table = IngredientTable(RECORDS)
+    assert table.order('kcal') == [1, 0, 2]
+    assert table.order('name', True) == [0, 1, 2]
+    assert table.order('calcium', True)[0] == 1
+    table.append(record('Water', 0))
+    assert table.order('kcal') == [3, 1, 0, 2]
+
+def test_rankings_skip_undefined_values():
+    table = IngredientTable(RECORDS + [record('Free sample', 100, protein=10)])
+    assert table.top('cost_per_protein', 5) == [0, 1]
+    assert table.top('protein_per_kcal', 2) == [3, 1]
+    assert table.value(2, 'cost_per_protein') != table.value(2, 'cost_per_protein')
+
+def test_nbytes_grows_with_rows():
+    small = IngredientTable(RECORDS)
+    large = IngredientTable(RECORDS * 100)
+    assert 0 < small.nbytes() < large.nbytes()
@@ -0,0 +1,26 @@
+from bitewise.core.search_index import SearchIndex
+
+NAMES = ['Yogurt, plain', 'Yogurt, greek', 'Strawberries, raw', 'Strawberry jam', 'Cheese, cheddar']
+
+def test_comma_separated_names_match_by_word():
+    index = SearchIndex(NAMES)
+    assert index.ranked('plain') == ['Yogurt, plain']
+    assert index.ranked('cheddar') == ['Cheese, cheddar']
+    assert index.ranked('yoghurt') == ['Yogurt, greek', 'Yogurt, plain']
+
+def test_two_typos_in_a_long_word():
+    index = SearchIndex(NAMES)
+    assert index.ranked('strewbarry') == ['Strawberry jam']
+
+def test_removed_names_leave_no_neighbours():
+    index = SearchIndex(NAMES)
+    index.sync([])
+    assert not index.neighbours and not index.words
+
+def test_query_without_words():
+    index = SearchIndex(NAMES + ['Pie - apple'])
+    assert index.ranked('%') == []
+    assert index.ranked('...') == []
+    assert index.ranked('-') == []
+    assert index.ranked(' - ') == []
+    assert index.ranked('e - a') == ['Pie - apple']
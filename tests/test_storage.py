@@ -0,0 +1,86 @@
+import json
+import os
+from bitewise.core import storage
+
+def entry(day, kcal=100.0):
+    return {'date': f'2026-01-{day:02d}', 'ate': 'Soup', 'gram': 200.0, 'kcal': kcal}
+
+def journal_file(db):
+    return os.path.join(db, 'journal.json')
+
+def full_save_bytes(tmp_path, entries):
+    other = tmp_path / 'full'
+    other.mkdir()
+    storage.save_journal(str(other), entries)
+    return (other / 'journal.json').read_bytes()
+
+def test_load_json_hands_out_copies(tmp_path):
+    path = str(tmp_path / 'data.json')
+    storage.save_json(path, {'items': [1, 2]})
+    first = storage.load_json(path)
+    first['items'].append(3)
+    assert storage.load_json(path) == {'items': [1, 2]}
+
+def test_missing_and_old_files(tmp_path):
+    db = str(tmp_path)
+    assert storage.load_journal(db) == []
+    (tmp_path / 'recipes.json').write_text(json.dumps([{'name': 'Stew'}]))
+    assert storage.load_recipes(db) == [{'name': 'Stew'}]
+
+def test_append_writes_what_a_full_save_writes(tmp_path):
+    db = str(tmp_path / 'db')
+    os.mkdir(db)
+    entries = [entry(1), entry(2)]
+    storage.save_journal(db, entries)
+    entries.append(dict(entry(3), ate='Crème brûlée'))
+    storage.append_journal(db, entries)
+    entries.append(entry(4))
+    storage.append_journal(db, entries)
+    assert open(journal_file(db), 'rb').read() == full_save_bytes(tmp_path, entries)
+    storage.forget(journal_file(db))
+    assert storage.load_journal(db) == entries
+
+def test_append_updates_the_parsed_cache(tmp_path):
+    db = str(tmp_path)
+    entries = [entry(1)]
+    storage.save_journal(db, entries)
+    assert storage.load_journal(db) == entries
+    cached_key = storage._cache[journal_file(db)][0]
+    entries.append(entry(2))
+    storage.append_journal(db, entries)
+    stat = os.stat(journal_file(db))
+    key, data = storage._cache[journal_file(db)]
+    assert key != cached_key and key == (stat.st_mtime_ns, stat.st_size)
+    assert data == {'entries': entries}
+    assert storage.load_journal(db) == entries
+
+def test_append_after_an_external_edit_saves_everything(tmp_path):
+    db = str(tmp_path)
+    entries = [entry(1), entry(2)]
+    storage.save_journal(db, entries)
+    # Another program drops an entry; the count no longer lines up
+    with open(journal_file(db), 'w', encoding='utf-8') as f:
+        json.dump({'entries': [entry(1)]}, f, indent=2)
+    entries.append(entry(3))
+    storage.append_journal(db, entries)
+    storage.forget(journal_file(db))
+    assert storage.load_journal(db) == entries
+
+def test_append_to_a_file_with_another_layout_saves_everything(tmp_path):
+    db = str(tmp_path)
+    entries = [entry(1)]
+    storage.save_journal(db, entries)
+    # Same entries written compactly; the closing brackets don't match
+    with open(journal_file(db), 'w', encoding='utf-8') as f:
+        json.dump({'entries': entries}, f)
+    storage.load_journal(db)
+    entries.append(entry(2))
+    storage.append_journal(db, entries)
+    storage.forget(journal_file(db))
+    assert storage.load_journal(db) == entries
+    assert open(journal_file(db), 'rb').read() == full_save_bytes(tmp_path, entries)
+
+def test_append_without_a_journal_file(tmp_path):
+    db = str(tmp_path)
+    storage.append_journal(db, [entry(1)])
+    assert storage.load_journal(db) == [entry(1)]
@@ -0,0 +1,128 @@
+import pytest
+from bitewise.core import storage
+from bitewise.core.models import NUTRIENTS, ingredient_entry
+from bitewise.core.versions import VersionTable
+
+def ingredient(name, kcal, **values):
+    record = {key: 0.0 for key in NUTRIENTS}
+    record.update(values, name=name, kcal=kcal)
+    return record
+
+def test_register_adds_a_version_only_for_new_values():
+    table = VersionTable()
+    oats = ingredient('Oats', 380)
+    assert table.register(oats)
+    assert (oats['id'], oats['version']) == (1, 0)
+    assert not table.register(oats)
+    oats['kcal'] = 370.0
+    assert table.register(oats)
+    assert (oats['id'], oats['version']) == (1, 1)
+
+def test_register_matches_records_without_an_id_by_name():
+    table = VersionTable()
+    table.register(ingredient('Oats', 380))
+    again = ingredient('oats', 380)
+    table.register(again)
+    assert again['id'] == 1
+    table.register(ingredient('Rice', 130))
+    assert table.next_id == 3
+
+def test_pin_from_a_date_resolves_later_entries_only():
+    table = VersionTable()
+    oats = ingredient('Oats', 380)
+    table.register(oats)
+    oats['kcal'] = 370.0
+    table.register(oats)
+    table.pin(1, 1, '2026-03-01')
+    assert table.resolve(1, 0, '2026-02-28') == 0
+    assert table.resolve(1, 0, '2026-03-01') == 1
+    assert table.resolve(1, 0, None) == 0
+
+def test_pin_for_all_history_replaces_later_pins():
+    table = VersionTable()
+    oats = ingredient('Oats', 380)
+    table.register(oats)
+    for kcal in (370.0, 360.0):
+        oats['kcal'] = kcal
+        table.register(oats)
+    table.pin(1, 1, '2026-03-01')
+    table.pin(1, 2)
+    assert table.items[1]['pins'] == [['', 2]]
+    assert table.resolve(1, 0, '2020-01-01') == 2
+    # A pin never moves an entry back to an older version
+    table.pin(1, 1)
+    assert table.resolve(1, 2, '2026-01-01') == 2
+
+def test_compact_keeps_name_and_kcal():
+    table = VersionTable()
+    oats = ingredient('Oats', 380, protein=13, micro={'iron': 4})
+    table.register(oats)
+    entry = dict(ingredient_entry(oats, 50), date='2026-01-01', gram=50)
+    stored, = table.compact([entry])
+    assert stored == {'ate': 'Oats', 'kcal': 190.0, 'ref': [1, 0], 'date': '2026-01-01', 'gram': 50}
+
+def test_compact_links_legacy_entries_with_matching_values():
+    table = VersionTable()
+    oats = ingredient('Oats', 380, protein=13)
+    table.register(oats)
+    legacy = {'ate': 'Oats', 'gram': 200.0, 'date': '2020-01-01'}
+    legacy.update({key: oats[key] * 2 for key in NUTRIENTS})
+    other = dict(legacy, kcal=1.0)
+    recipe = dict(legacy, pts=True)
+    stored = table.compact([legacy, other, recipe])
+    assert legacy['ref'] == [1, 0]
+    assert 'protein' not in stored[0]
+    assert 'ref' not in other and stored[1] is other
+    assert 'ref' not in recipe and stored[2] is recipe
+
+def test_materialize_scales_the_resolved_version():
+    table = VersionTable()
+    oats = ingredient('Oats', 380)
+    table.register(oats)
+    oats['kcal'] = 370.0
+    table.register(oats)
+    table.pin(1, 1, '2026-03-01')
+    entries = [{'ref': [1, 0], 'gram': 50, 'date': '2026-02-01'},
+               {'ref': [1, 0], 'gram': 50, 'date': '2026-03-02'},
+               {'ref': [9, 0], 'gram': 50, 'ate': 'Lost', 'kcal': 10.0}]
+    assert table.materialize(entries) == 1
+    assert [e['kcal'] for e in entries] == [190.0, 185.0, 10.0]
+    assert entries[0]['ate'] == 'Oats' and entries[2]['ate'] == 'Lost'
+
+def test_data_round_trip():
+    table = VersionTable()
+    table.register(ingredient('Oats', 380))
+    table.pin(1, 0, '2026-01-01')
+    copy = VersionTable(table.data())
+    assert copy.data() == table.data()
+    assert copy.ids_by_name == {'oats': 1}
+
+def test_journal_load_save_round_trip(tmp_path):
+    db = str(tmp_path)
+    ingredients = [ingredient('Oats', 380, protein=13, micro={'iron': 4.0})]
+    storage.save_ingredients(db, ingredients)
+    entries = [dict(ingredient_entry(ingredients[0], 50), date='2026-01-01', gram=50.0),
+               {'ate': 'Apple pie', 'gram': 100.0, 'date': '2026-01-01', 'kcal': 250.0, 'pts': False}]
+    storage.save_journal(db, entries)
+    loaded = storage.load_journal(db)
+    assert loaded == entries
+    storage.save_journal(db, loaded)
+    storage.forget(str(tmp_path / 'journal.json'))
+    assert storage.load_journal(db) == entries
+
+def test_journal_without_versions_keeps_name_and_kcal(tmp_path):
+    db = str(tmp_path)
+    ingredients = [ingredient('Oats', 380, protein=13)]
+    storage.save_ingredients(db, ingredients)
+    storage.save_journal(db, [dict(ingredient_entry(ingredients[0], 50), date='2026-01-01', gram=50.0)])
+    (tmp_path / 'versions.json').unlink()
+    storage.forget(str(tmp_path / 'journal.json'))
+    entry, = storage.load_journal(db)
+    assert (entry['ate'], entry['kcal']) == ('Oats', 190.0)
+
+def test_damaged_versions_file_is_not_replaced(tmp_path):
+    db = str(tmp_path)
+    (tmp_path / 'versions.json').write_text('{not json')
+    with pytest.raises(ValueError):
+        storage.save_ingredients(db, [ingredient('Oats', 380)])
+    assert (tmp_path / 'versions.json').read_text() == '{not json'
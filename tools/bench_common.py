@@ -0,0 +1,36 @@
+import json
+import statistics
+import time
+
+def measure(func, repeat=5, setup=None):
+    """Milliseconds per call of func over repeat runs.
+
+    setup, when given, runs before every call outside the timing and its
+    result is passed to func, so operations that change their input get
+    a fresh copy each time.
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg) if setup else func()
+        times.append((time.perf_counter() - start) * 1000)
+    return summarize(times)
+
+def summarize(times):
+    """Median, min and max of a list of milliseconds"""
+    return {'median': statistics.median(times), 'min': min(times), 'max': max(times)}
+
+def print_report(title, results):
+    """results maps a dataset or size label to {operation: measure() result}"""
+    print(f"\n{title}")
+    for label, operations in results.items():
+        width = max([len(name) for name in operations] + [9])
+        header = f"{'Operation':<{width}}  {'Median ms':>10}  {'Min ms':>9}  {'Max ms':>9}"
+        print(f"\n{label}\n{header}\n{'-' * len(header)}")
+        for name, stat in operations.items():
+            print(f"{name:<{width}}  {stat['median']:>10.2f}  {stat['min']:>9.2f}  {stat['max']:>9.2f}")
+
+def write_json(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
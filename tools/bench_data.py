@@ -0,0 +1,149 @@
+"""Time the data layer against synthetic or real db folders.
+
+    python -m tools.bench_data                    # generated 1y and 5y datasets
+    python -m tools.bench_data --preset 20y
+    python -m tools.bench_data --db ~/BiteWise/db --json results.json
+
+Generated datasets are cached in the temp folder, so later runs compare
+like with like. Nothing under --db is modified; saves go to a scratch folder.
+"""
+import argparse
+import os
+import random
+import tempfile
+from bitewise.core import aggregation, nutrients, storage
+from bitewise.core.bulk_edit import scale_field
+from bitewise.core.duplicates import find_duplicates
+from bitewise.core.ingredient_table import IngredientTable
+from bitewise.core.models import apply_ingredient_update, apply_ingredient_updates, ingredient_entry
+from bitewise.core.search_index import SearchIndex, split_words
+from .bench_common import measure, print_report, write_json
+from .generate_dataset import PRESETS, generate
+
+MACRO_METRICS = ['gram', 'kcal', 'carbs', 'fat', 'protein', 'fiber']
+
+def dataset_dir(preset):
+    path = os.path.join(tempfile.gettempdir(), 'bitewise-bench', preset)
+    if not os.path.exists(os.path.join(path, 'journal.json')):
+        print(f"Generating {preset} dataset in {path} ...")
+        config = PRESETS[preset]
+        generate(path, config['years'], config['ingredients'], config['recipes'])
+    return path
+
+def bench_dataset(db_dir, repeat):
+    rng = random.Random(1)
+    journal = storage.load_journal(db_dir)
+    ingredients = storage.load_ingredients(db_dir)
+    diet = storage.load_diet(db_dir)
+    journal_path = os.path.join(db_dir, 'journal.json')
+    target = rng.choice(ingredients)
+    updated = dict(target, kcal=target['kcal'] * 1.1)
+    dates = sorted({e['date'] for e in journal})
+    doomed = set(rng.sample(dates, min(30, len(dates))))
+    results = {}
+
+    def parse(path, load):
+        storage.forget(path)
+        return load(db_dir)
+
+    results['load journal (parse)'] = measure(lambda: parse(journal_path, storage.load_journal), repeat)
+    results['load journal (cached)'] = measure(lambda: storage.load_journal(db_dir), repeat)
+    results['load ingredients (parse)'] = measure(
+        lambda: parse(os.path.join(db_dir, 'ingredients.json'), storage.load_ingredients), repeat)
+    results['load recipes (parse)'] = measure(
+        lambda: parse(os.path.join(db_dir, 'recipes.json'), storage.load_recipes), repeat)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        entries = storage.load_journal(db_dir)
+        storage.save_journal(scratch, entries)
+
+        def add_entry():
+            item = next(i for i in ingredients if i['name'] == target['name'])
+            entry = {'timestamp': '2100-01-01 12:00:00', 'date': '2100-01-01', 'weight': 80.0, 'gram': 150.0}
+            entry.update(ingredient_entry(item, 150.0))
+            entries.append(entry)
+            storage.append_journal(scratch, entries)
+
+        def cascade(data):
+            recipes, entries = data
+            for recipe in recipes:
+                apply_ingredient_update(recipe['ingredients'], 'name', target['name'], updated)
+            apply_ingredient_update(entries, 'ate', target['name'], updated)
+
+        results['add entry + save'] = measure(add_entry, repeat)
+        results['bulk delete 30 days'] = measure(
+            lambda entries: aggregation.remove_dates(entries, doomed), repeat, lambda: storage.load_journal(db_dir))
+        results['ingredient cascade update'] = measure(
+            cascade, repeat, lambda: (storage.load_recipes(db_dir), storage.load_journal(db_dir)))
+        prices = {i['name'].lower(): scale_field(i, 'cost', 5) for i in ingredients[:200]}
+
+        def bulk_cascade(data):
+            recipes, entries = data
+            for recipe in recipes:
+                apply_ingredient_updates(recipe['ingredients'], 'name', prices)
+            apply_ingredient_updates(entries, 'ate', prices)
+
+        results['bulk price update (200)'] = measure(
+            bulk_cascade, repeat, lambda: (storage.load_recipes(db_dir), storage.load_journal(db_dir)))
+        results['daily totals'] = measure(lambda: aggregation.daily_totals(journal), repeat)
+        # Generated entries carry no micronutrients; give each a handful, as imported foods list
+        micro_rng = random.Random(7)
+        micro_keys = nutrients.micronutrients()
+        wide = [dict(e, micro={key: micro_rng.uniform(0, 50) for key in micro_rng.sample(micro_keys, 6)})
+                for e in journal]
+        all_keys = ['gram'] + list(nutrients.REGISTRY)
+        results['daily sums (all nutrients)'] = measure(lambda: aggregation.daily_sums(wide, all_keys), repeat)
+        results['weight series'] = measure(lambda: aggregation.process_weight_data(journal), repeat)
+        results['BMR series'] = measure(lambda: aggregation.process_bmr_kcal_data(journal, diet), repeat)
+        results['nutrient series'] = measure(lambda: aggregation.process_nutrient_data(journal), repeat)
+        results['cost series'] = measure(lambda: aggregation.process_cost_data(journal), repeat)
+        results['timeline grouping'] = measure(lambda: aggregation.entries_by_date(journal), repeat)
+        results['top 10 foods'] = measure(lambda: aggregation.process_macro_data(journal, MACRO_METRICS), repeat)
+        names = [i['name'] for i in ingredients]
+        index = SearchIndex(names)
+        # The typo query drops a letter, so it needs a word that still allows one after that
+        query = max(split_words(target['name']), key=len)
+        if len(query) < 5:
+            query = next(word for i in ingredients for word in split_words(i['name']) if len(word) >= 5)
+        results['search index build'] = measure(lambda: SearchIndex(names), repeat)
+        usage = aggregation.usage_stats(journal)
+        typo = query[:2] + query[3:]
+        results['picker search'] = measure(
+            lambda: [index.ranked(query[:n], usage) for n in range(1, len(query) + 1)], repeat)
+        results['picker search with typo'] = measure(lambda: index.ranked(typo, usage), repeat)
+        results['ingredient table build'] = measure(lambda: IngredientTable(ingredients), repeat)
+        results['ingredient sort (kcal)'] = measure(
+            lambda table: table.order('kcal', True), repeat, lambda: IngredientTable(ingredients))
+        results['ranking top 25 (cost per protein)'] = measure(
+            lambda table: table.top('cost_per_protein', 25), repeat, lambda: IngredientTable(ingredients))
+        results['duplicate scan'] = measure(lambda: find_duplicates(ingredients), repeat)
+        results['save journal'] = measure(lambda: storage.save_journal(scratch, journal), repeat)
+    return results
+
+def run(presets=(), db_dirs=(), repeat=5):
+    """Results keyed by dataset label, then operation name"""
+    datasets = [(preset, dataset_dir(preset)) for preset in presets]
+    datasets += [(os.path.abspath(path), path) for path in db_dirs]
+    results = {}
+    for label, path in datasets:
+        print(f"Benchmarking {label}: {len(storage.load_journal(path))} journal entries")
+        results[label] = bench_dataset(path, repeat)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', action='append', choices=sorted(PRESETS),
+                        help="generated dataset to use; repeatable (default: 1y and 5y)")
+    parser.add_argument('--db', action='append', default=[], help="existing db folder to use; repeatable")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    presets = args.preset or ([] if args.db else ['1y', '5y'])
+    results = run(presets, args.db, args.repeat)
+    print_report("BiteWise data benchmarks", results)
+    if args.json:
+        write_json(args.json, results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Time every chart's drawing code on an offscreen cairo surface.
+
+    python -m tools.bench_render                   # 1y and 5y data, three sizes
+    python -m tools.bench_render --preset 20y --size 1920x1080
+
+Each chart is built from a generated dataset (see tools.bench_data) and
+rendered into a cairo.ImageSurface; no window is shown and the style
+context colours are passed in, so only PyGObject, GTK and pycairo need to
+be importable. Reported per chart and size:
+
+    first frame   a new chart's first paint, including downsampling and layout
+    redraw        a repaint with nothing changed
+    hover redraw  a pointer move onto a data point plus the repaint it causes
+"""
+import argparse
+from collections import namedtuple
+import gi
+gi.require_version('Gtk', '3.0')
+import cairo
+from bitewise.bmr_tab import BMRGraph, prepare_bmr_data
+from bitewise.costs_tab import CostsGraph, prepare_cost_data
+from bitewise.macro_tab import METRICS, PieChart, prepare_macro_data
+from bitewise.nutrition_tab import NutrientGraph, prepare_nutrient_data
+from bitewise.timeline_tab import TimelineGraph, prepare_timeline_data
+from bitewise.weight_tab import WeightGraph, prepare_weight_data
+from .bench_common import measure, print_report, write_json
+from .bench_data import dataset_dir
+from .generate_dataset import PRESETS
+
+# Stand-ins for the Gdk.RGBA values a style context hands to on_draw
+RGBA = namedtuple('RGBA', 'red green blue alpha')
+BACKGROUND = RGBA(1.0, 1.0, 1.0, 1.0)
+FOREGROUND = RGBA(0.1, 0.1, 0.1, 1.0)
+
+PointerEvent = namedtuple('PointerEvent', 'x y')
+
+SIZES = [(800, 500), (1200, 780), (1920, 1080)]
+
+def middle(items):
+    return items[len(items) // 2]
+
+def hover_weight(graph):
+    i = len(graph.graph_xs) // 2
+    graph.on_motion_notify(graph, PointerEvent(graph.graph_xs[i], graph.graph_ys[i]))
+
+def hover_bmr(graph):
+    i = len(graph.graph_xs) // 2
+    graph.on_motion_notify(graph, PointerEvent(graph.graph_xs[i], graph.graph_line_ys[0][i]))
+
+def hover_costs(graph):
+    (x, y, w, h), i = middle(graph.bar_rects)
+    graph.on_motion_notify(graph, PointerEvent(x + w / 2, y + h / 2))
+
+def hover_nutrients(graph):
+    rects = [r['rect'] for r in middle(graph.bar_rects)['rects']]
+    x, y, w, h = max(rects, key=lambda rect: rect[3])
+    graph.on_motion_notify(graph, PointerEvent(x + w / 2, y + h / 2))
+
+def hover_pie(graph):
+    # PieChart hit-tests against its allocation, which an offscreen chart
+    # doesn't have, so the hovered slice is set directly
+    graph.hover_slice = 0
+
+def hover_timeline(graph):
+    circle = middle(graph.meal_circles)
+    graph.on_motion_notify(graph, PointerEvent(circle['x'], circle['y']))
+
+def chart_factories(db_dir):
+    """(name, make_chart, hover, hover_attribute) for every chart, with data prepared once"""
+    weights = prepare_weight_data(db_dir)
+    bmr_journal, bmr_data = prepare_bmr_data(db_dir)
+    cost_journal, costs = prepare_cost_data(db_dir)
+    nutrients = prepare_nutrient_data(db_dir)
+    macro_data = prepare_macro_data(db_dir)
+    timeline_journal, timeline = prepare_timeline_data(db_dir)
+    metric, title = METRICS[1]
+    return [
+        ('WeightGraph', lambda: WeightGraph(weights), hover_weight, 'hover_point'),
+        ('BMRGraph', lambda: BMRGraph(bmr_data, bmr_journal), hover_bmr, 'hover_point'),
+        ('CostsGraph', lambda: CostsGraph(costs, cost_journal), hover_costs, 'hover_point'),
+        ('NutrientGraph', lambda: NutrientGraph(nutrients), hover_nutrients, 'hover_point'),
+        ('PieChart', lambda: PieChart(title, macro_data[metric]), hover_pie, 'hover_slice'),
+        ('TimelineGraph', lambda: TimelineGraph(timeline, 30), hover_timeline, 'hover_meal'),
+    ]
+
+def paint(chart, width, height):
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    chart.render(cairo.Context(surface), width, height, BACKGROUND, FOREGROUND)
+    surface.flush()
+
+def bench_chart(make_chart, hover, hover_attribute, width, height, repeat):
+    results = {'first frame': measure(lambda chart: paint(chart, width, height), repeat, make_chart)}
+    chart = make_chart()
+    paint(chart, width, height)
+    results['redraw'] = measure(lambda: paint(chart, width, height), repeat)
+
+    def hover_redraw(chart):
+        hover(chart)
+        paint(chart, width, height)
+
+    def fresh_hover_state():
+        setattr(chart, hover_attribute, None)
+        paint(chart, width, height)
+        return chart
+
+    results['hover redraw'] = measure(hover_redraw, repeat, fresh_hover_state)
+    return results
+
+def run(presets=('1y', '5y'), sizes=SIZES, repeat=5, charts=None):
+    """Results keyed by "dataset chart WxH", then phase; charts limits which chart names run"""
+    results = {}
+    for preset in presets:
+        for name, make_chart, hover, hover_attribute in chart_factories(dataset_dir(preset)):
+            if charts and name not in charts:
+                continue
+            for width, height in sizes:
+                results[f"{preset} {name} {width}x{height}"] = bench_chart(
+                    make_chart, hover, hover_attribute, width, height, repeat)
+    return results
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', action='append', choices=sorted(PRESETS),
+                        help="generated dataset to use; repeatable (default: 1y and 5y)")
+    parser.add_argument('--size', action='append', type=parse_size,
+                        help="surface size as WIDTHxHEIGHT; repeatable (default: 800x500, 1200x780, 1920x1080)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.preset or ['1y', '5y'], args.size or SIZES, args.repeat)
+    print_report("BiteWise chart render benchmarks", results)
+    if args.json:
+        write_json(args.json, results)
+
+if __name__ == '__main__':
+    main()
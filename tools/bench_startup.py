@@ -0,0 +1,54 @@
+"""Time BiteWise launches from process start to the first drawn window.
+
+    python -m tools.bench_startup --preset 5y --repeat 5
+
+Runs main.py with BITEWISE_EXIT_AFTER_FIRST_DRAW set, so each launch
+quits on its own once the window has painted. Needs a display.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from .bench_common import print_report, summarize, write_json
+from .bench_data import dataset_dir
+from .generate_dataset import PRESETS
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+def launch(db_dir, timeout=60):
+    """Milliseconds from spawning main.py to its first-draw report"""
+    env = dict(os.environ, BITEWISE_DB_DIR=db_dir, BITEWISE_EXIT_AFTER_FIRST_DRAW='1')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, MAIN], env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            if line.startswith("First draw after"):
+                return (time.perf_counter() - start) * 1000
+        raise RuntimeError(f"main.py exited with {process.wait()} before drawing its window")
+    finally:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def run(presets=('1y',), repeat=3):
+    """Results keyed by dataset label, with a single "cold start" operation"""
+    return {preset: {'cold start': summarize([launch(dataset_dir(preset)) for _ in range(repeat)])}
+            for preset in presets}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', action='append', choices=sorted(PRESETS),
+                        help="generated dataset to launch with; repeatable (default: 1y)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.preset or ['1y'], args.repeat)
+    print_report("BiteWise startup benchmarks", results)
+    if args.json:
+        write_json(args.json, results)
+
+if __name__ == '__main__':
+    main()
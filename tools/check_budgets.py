@@ -0,0 +1,104 @@
+"""Run the benchmarks named in tools/budgets.json and fail on regressions.
+
+    python -m tools.check_budgets                    # every budget
+    python -m tools.check_budgets --suite data       # headless CI: data layer only
+
+A budget fails when its median exceeds max_ms by more than the tolerance.
+The exit status is 1 when any budget fails or could not be measured.
+"""
+import argparse
+import json
+import os
+import sys
+
+BUDGETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budgets.json')
+SUITES = ['data', 'render', 'startup']
+
+def load_budgets(path=BUDGETS):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def run_suite(suite, cases, repeat):
+    """Benchmark results for the cases one suite's budgets refer to"""
+    if suite == 'data':
+        from .bench_data import run
+        return run(sorted(cases), repeat=repeat)
+    if suite == 'render':
+        from .bench_render import parse_size, run
+        # Group by dataset and size so each dataset's chart data is prepared once per size
+        charts = {}
+        for case in cases:
+            preset, chart, size = case.split()
+            charts.setdefault((preset, size), []).append(chart)
+        results = {}
+        for (preset, size), names in charts.items():
+            results.update(run([preset], [parse_size(size)], repeat, charts=names))
+        return results
+    if suite == 'startup':
+        from .bench_startup import run
+        return run(sorted(cases), repeat)
+    raise ValueError(f"Unknown benchmark suite: {suite}")
+
+def check(budgets, results, tolerance):
+    """(rows, failed) comparing every budget with its measured median"""
+    rows, failed = [], False
+    for budget in budgets:
+        stat = results.get(budget['suite'], {}).get(budget['case'], {}).get(budget['operation'])
+        limit = budget['max_ms']
+        if stat is None:
+            rows.append((budget, None, None, "NOT RUN"))
+            failed = True
+            continue
+        measured = stat['median']
+        over = (measured - limit) / limit * 100
+        if measured <= limit:
+            status = "ok"
+        elif over <= tolerance:
+            status = "ok (within tolerance)"
+        else:
+            status = "OVER"
+            failed = True
+        rows.append((budget, measured, over, status))
+    return rows, failed
+
+def print_table(rows):
+    names = [f"{b['suite']}: {b['case']} / {b['operation']}" for b, measured, over, status in rows]
+    width = max([len(name) for name in names] + [6])
+    header = f"{'Budget':<{width}}  {'Limit ms':>9}  {'Median ms':>10}  {'Diff':>8}  Status"
+    print(f"{header}\n{'-' * len(header)}")
+    for name, (budget, measured, over, status) in zip(names, rows):
+        measured_text = f"{measured:.2f}" if measured is not None else "-"
+        over_text = f"{over:+.1f}%" if over is not None else "-"
+        print(f"{name:<{width}}  {budget['max_ms']:>9.1f}  {measured_text:>10}  {over_text:>8}  {status}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budgets', default=BUDGETS, help="budget file (default: tools/budgets.json)")
+    parser.add_argument('--suite', action='append', choices=SUITES, help="only check this suite; repeatable")
+    parser.add_argument('--tolerance', type=float, help="percent over budget still accepted (default: from the file)")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    config = load_budgets(args.budgets)
+    tolerance = args.tolerance if args.tolerance is not None else config.get('tolerance_percent', 0)
+    budgets = [b for b in config['budgets'] if not args.suite or b['suite'] in args.suite]
+
+    results = {}
+    for suite in SUITES:
+        cases = {b['case'] for b in budgets if b['suite'] == suite}
+        if not cases:
+            continue
+        try:
+            results[suite] = run_suite(suite, cases, args.repeat)
+        except Exception as e:
+            print(f"Error running {suite} benchmarks: {e}")
+
+    rows, failed = check(budgets, results, tolerance)
+    print(f"\nPerformance budgets (tolerance {tolerance:g}%)")
+    print_table(rows)
+    if failed:
+        print("\nSome budgets were exceeded or could not be measured.")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Write a synthetic BiteWise db/ folder for benchmarking.
+
+    python -m tools.generate_dataset --preset 5y --out /tmp/bitewise-5y
+
+Files use the same schemas the app writes: ingredients carry per-100 g
+values, recipe ingredients and journal entries carry values scaled to
+their grams, and the journal holds 8-15 timestamped entries per day plus
+the occasional walk.
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from bitewise.core import storage
+from bitewise.core.models import ingredient_amount, ingredient_entry, recipe_entry, walk_entry
+
+PRESETS = {
+    '1y': {'years': 1, 'ingredients': 500, 'recipes': 500},
+    '5y': {'years': 5, 'ingredients': 10000, 'recipes': 2500},
+    '10y': {'years': 10, 'ingredients': 25000, 'recipes': 5000},
+    '20y': {'years': 20, 'ingredients': 100000, 'recipes': 10000},
+}
+
+FOODS = [
+    'Apple', 'Banana', 'Oats', 'Rice', 'Pasta', 'Bread', 'Cheese', 'Milk', 'Yoghurt', 'Egg',
+    'Chicken', 'Beef', 'Pork', 'Salmon', 'Tuna', 'Cod', 'Tofu', 'Lentils', 'Chickpeas', 'Beans',
+    'Potato', 'Carrot', 'Broccoli', 'Spinach', 'Tomato', 'Cucumber', 'Pepper', 'Onion', 'Garlic',
+    'Butter', 'Olive oil', 'Peanuts', 'Almonds', 'Walnuts', 'Avocado', 'Orange', 'Pear', 'Berries',
+    'Honey', 'Chocolate', 'Granola', 'Quinoa', 'Couscous', 'Sausage', 'Ham', 'Shrimp', 'Mushroom',
+]
+STYLES = [
+    'Raw', 'Boiled', 'Fried', 'Baked', 'Smoked', 'Organic', 'Light', 'Wholegrain', 'Frozen',
+    'Canned', 'Dried', 'Fresh', 'Grilled', 'Sweetened', 'Unsalted', 'Spiced',
+]
+DISHES = ['Salad', 'Stew', 'Soup', 'Bowl', 'Casserole', 'Curry', 'Wrap', 'Pie', 'Stir fry', 'Porridge']
+
+def unique_names(rng, count, make):
+    names, seen = [], set()
+    while len(names) < count:
+        name = make()
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def make_ingredients(rng, count):
+    names = unique_names(rng, count, lambda: f"{rng.choice(STYLES)} {rng.choice(FOODS).lower()}")
+    ingredients = []
+    for name in names:
+        carbs = round(rng.uniform(0, 80), 1)
+        fat = round(rng.uniform(0, 40), 1)
+        protein = round(rng.uniform(0, 35), 1)
+        ingredients.append({
+            'name': name,
+            'kcal': round(carbs * 4 + fat * 9 + protein * 4, 1),
+            'carbs': carbs,
+            'sugar': round(carbs * rng.uniform(0, 0.6), 1),
+            'fat': fat,
+            'protein': protein,
+            'fiber': round(rng.uniform(0, 12), 1),
+            'salt': round(rng.uniform(0, 2.5), 2),
+            'cost': round(rng.uniform(0.1, 8), 2),
+        })
+    return ingredients
+
+def make_recipes(rng, count, ingredients):
+    names = unique_names(rng, count, lambda: f"{rng.choice(FOODS)} {rng.choice(DISHES).lower()}")
+    recipes = []
+    for name in names:
+        rows = []
+        for ingredient in rng.sample(ingredients, min(len(ingredients), rng.randint(3, 12))):
+            gram = float(rng.randrange(10, 400, 5))
+            row = {'name': ingredient['name'], 'gram': gram}
+            row.update(ingredient_amount(ingredient, gram))
+            rows.append(row)
+        recipes.append({
+            'name': name,
+            'portions': rng.randint(1, 6),
+            'ingredients': rows,
+            'instructions': "Mix everything and cook until done.",
+        })
+    return recipes
+
+def make_journal(rng, years, ingredients, recipes, per_day=(8, 15), end=None):
+    end = end or date.today()
+    day = end - timedelta(days=int(years * 365))
+    # People eat the same things over and over; a small favourites pool
+    # makes the top-N foods realistic
+    favourites = rng.sample(ingredients, min(len(ingredients), 150))
+    favourite_recipes = rng.sample(recipes, min(len(recipes), 40))
+    weight = rng.uniform(65, 100)
+    entries = []
+    while day <= end:
+        weight = min(150, max(45, weight + rng.gauss(0, 0.15)))
+        day_weight = round(weight, 1)
+        date_text = day.isoformat()
+        seconds = sorted(rng.sample(range(6 * 3600, 23 * 3600), rng.randint(*per_day)))
+        for second in seconds:
+            timestamp = f"{date_text} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+            entry = {'timestamp': timestamp, 'date': date_text, 'weight': day_weight}
+            if recipes and rng.random() < 0.25:
+                if rng.random() < 0.5:
+                    entry['gram'] = float(rng.randint(1, 2))
+                    entry.update(recipe_entry(rng.choice(favourite_recipes), entry['gram'], True))
+                else:
+                    entry['gram'] = float(rng.randrange(100, 600, 10))
+                    entry.update(recipe_entry(rng.choice(favourite_recipes), entry['gram'], False))
+            else:
+                pool = favourites if rng.random() < 0.9 else ingredients
+                entry['gram'] = float(rng.randrange(5, 400, 5))
+                entry.update(ingredient_entry(rng.choice(pool), entry['gram']))
+            entries.append(entry)
+        if rng.random() < 0.1:
+            entries.append(walk_entry(round(rng.uniform(1, 10), 2), day_weight, date_text, f"{date_text} 23:59:59"))
+        day += timedelta(days=1)
+    return entries
+
+def generate(out_dir, years, ingredient_count, recipe_count, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    ingredients = make_ingredients(rng, ingredient_count)
+    recipes = make_recipes(rng, recipe_count, ingredients)
+    journal = make_journal(rng, years, ingredients, recipes)
+    storage.save_ingredients(out_dir, ingredients)
+    storage.save_recipes(out_dir, recipes)
+    storage.save_journal(out_dir, journal)
+    storage.save_diet(out_dir, {'date_of_birth': '19850614', 'height_cm': 178,
+                                'gender': 'Male', 'diet': 'WHO Guidelines'})
+    return {'ingredients': len(ingredients), 'recipes': len(recipes), 'journal entries': len(journal)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True, help="db folder to write; existing files are replaced")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='1y')
+    parser.add_argument('--years', type=float, help="override the preset's journal length")
+    parser.add_argument('--ingredients', type=int, help="override the preset's ingredient count")
+    parser.add_argument('--recipes', type=int, help="override the preset's recipe count")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    counts = generate(args.out,
+                      args.years if args.years is not None else preset['years'],
+                      args.ingredients if args.ingredients is not None else preset['ingredients'],
+                      args.recipes if args.recipes is not None else preset['recipes'],
+                      args.seed)
+    print(f"Wrote {args.out}: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""Add USDA FoodData Central foods to a db folder's ingredients.json.
+
+    python -m tools.import_fdc ~/Downloads/FoodData_Central_csv --db ~/BiteWise/db
+
+The same import runs from the Ingredients tab; this is for seeding a db
+folder without starting the app.
+"""
+import argparse
+from bitewise.core.fdc_import import import_fdc
+from bitewise.core.storage import db_path, load_ingredients, save_ingredients
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fdc_dir', help="folder holding food.csv and food_nutrient.csv")
+    parser.add_argument('--db', default=db_path(), help="db folder to add to (default: the app's)")
+    args = parser.parse_args()
+
+    ingredients = load_ingredients(args.db)
+    records, stats = import_fdc(args.fdc_dir, [i['name'] for i in ingredients],
+                                progress=lambda fraction, text: print(f"{fraction:6.1%}  {text}"))
+    save_ingredients(args.db, ingredients + records)
+    print(", ".join(f"{count} {name}" for name, count in stats.items()))
+
+if __name__ == '__main__':
+    main()